@@ -4,7 +4,12 @@ class Configurations(object):
                  dampingRatio=0.02,
                  liquidSpecificMass=998.2071, kineticViscosity=1.003e-6, gravity=9.807, pipeRoughness=0.0015e-3,
                  dmfDiscretizationPoints=200, dmfUpperLimitFactor=2,
-                 nonLinearAnalysis=True, structureType='Shear Building'):
+                 nonLinearAnalysis=True, structureType='Shear Building',
+                 absoluteTolerance=1.e-9, relativeTolerance=1.e-6,
+                 numberOfModes=None, modalMassParticipation=0.95, responseDofs=None,
+                 dmfMethod='Time History', numberOfWorkers=1,
+                 kernelBackend='NumPy', excitationInterpolation='Linear',
+                 outputBlockSize=4096, matrixStructure='Dense'):
         """
         :param method: str - ODE solution method to be used by DynaSolver.ODESolver()
         :param timeStep: float - time step between iterations (s)
@@ -14,6 +19,21 @@ class Configurations(object):
         :param liquidSpecificMass: float - Tlcd liquid specific mass (kg/m**3)
         :param kineticViscosity: float - Tlcd liquid kinetic viscosity (m**2/s)
         :param gravity: float - Gravity acceleration (m/s**2)
+        :param absoluteTolerance: float - Absolute local error tolerance of adaptive methods (m, m/s)
+        :param relativeTolerance: float - Relative local error tolerance of adaptive methods
+        :param numberOfModes: int - Modes kept by modal superposition (None to choose by modalMassParticipation)
+        :param modalMassParticipation: float - Effective mass ratio reached by the modes kept by modal superposition
+        :param responseDofs: list - DOFs projected back by modal superposition (None for all DOFs)
+        :param dmfMethod: str - 'Time History' or 'Steady State' (closed-form harmonic response, linear analysis only)
+        :param numberOfWorkers: int - Worker processes used by DMF sweeps (1 to run them in process, None for one per
+        CPU). Starting the pool takes seconds, so it only pays off for sweeps that take longer than that in process
+        :param kernelBackend: str - 'NumPy' or 'Numba' (compiled step loops, NumPy is used if numba is not installed)
+        :param excitationInterpolation: str - 'Linear', 'Zero-Order Hold' or 'Cubic' resampling of General Excitation
+        :param outputBlockSize: int - Time steps per block handed to the sinks of a streamed ODESolver run
+        :param matrixStructure: str - 'Dense' or 'Banded' (band factorization of the step operators of the Finite
+        Differences, Newmark and Runge-Kutta methods, O(n) per step; for tall buildings). Banded is only used when
+        numba is installed: the interpreted band solves are slower than the dense products at any size, so Dense is
+        used without it. The other methods always use dense matrices
         :return: None
         """
         self.method = method
@@ -27,5 +47,16 @@ class Configurations(object):
         self.pipeRoughness = pipeRoughness
         self.dmfDiscretizationPoints = dmfDiscretizationPoints
         self.dmfUpperLimitFactor = dmfUpperLimitFactor
+        self.dmfMethod = dmfMethod
+        self.numberOfWorkers = numberOfWorkers
+        self.kernelBackend = kernelBackend
+        self.excitationInterpolation = excitationInterpolation
+        self.outputBlockSize = outputBlockSize
+        self.matrixStructure = matrixStructure
         self.nonLinearAnalysis = nonLinearAnalysis
         self.structureType = structureType
+        self.absoluteTolerance = absoluteTolerance
+        self.relativeTolerance = relativeTolerance
+        self.numberOfModes = numberOfModes
+        self.modalMassParticipation = modalMassParticipation
+        self.responseDofs = responseDofs
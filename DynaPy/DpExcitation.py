@@ -2,6 +2,10 @@ from numpy import sqrt
 
 
 class Excitation(object):
+    __slots__ = ('type', 'structure', 'tlcd', 'amplitude', 'frequency', 'frequencyInput', 'exctDuration',
+                 'anlyDuration', 'relativeFrequency', 't_input', 'a_input', 'fileName')
+    types = ('Sine Wave', 'General Excitation')
+
     def __init__(self, exctType='Sine Wave', amplitude=5., frequency=20.,
                  relativeFrequency=False, exctDuration=3., anlyDuration=5.,
                  structure=None, tlcd=None, t=None, a=None, fileName=None, **kwargs):
@@ -14,12 +18,15 @@ class Excitation(object):
         :param anlyDuration: float - Duration of analysis (s)
         :param structure: dict - Dictionary of objects including all data of each story
         :param tlcd: object - Data of the building tlcd including every paramater
-        :param kwargs: any type - Used for future implementation of new parameters
+        :param kwargs: any type - Values of other Excitation attributes
         :return: None
         """
+        if exctType not in self.types:
+            raise ValueError('Unknown excitation type: {}.'.format(exctType))
         self.type = exctType
         self.structure = structure
         self.tlcd = tlcd
+        self.fileName = fileName
         if self.type == 'Sine Wave':
             self.amplitude = amplitude
             self.frequency = frequency
@@ -27,6 +34,8 @@ class Excitation(object):
             self.exctDuration = exctDuration
             self.anlyDuration = anlyDuration
             self.relativeFrequency = relativeFrequency
+            self.t_input = None
+            self.a_input = None
 
             self.calc_frequency()
 
@@ -35,10 +44,15 @@ class Excitation(object):
             self.a_input = a
             self.exctDuration = t[-1]
             self.anlyDuration = t[-1]
-            self.fileName = fileName
+            self.amplitude = None
+            self.frequency = None
+            self.frequencyInput = None
+            self.relativeFrequency = False
 
         for (i, j) in kwargs.items():
-            exec('self.{} = {}'.format(i, j))
+            if i not in self.__slots__:
+                raise TypeError("Excitation got an unexpected keyword argument '{}'".format(i))
+            setattr(self, i, j)
 
     def calc_frequency(self):
         if self.relativeFrequency:
@@ -51,3 +65,28 @@ class Excitation(object):
             self.frequency = self.frequencyInput * sqrt(stiffness / mass)
         else:
             self.frequency = self.frequencyInput
+
+    def replace(self, **changes):
+        """ Copy of the excitation with some attributes changed (e.g. frequencyInput=30., amplitude=2.). The
+        frequency is only recalculated when the input frequency, the relativeFrequency flag, the structure or the
+        tlcd change.
+
+        :param changes: any type - New values of Excitation attributes.
+        :return: Excitation - Modified copy.
+        """
+        excitation = Excitation.__new__(Excitation)
+        excitation.type, excitation.structure, excitation.tlcd = self.type, self.structure, self.tlcd
+        excitation.amplitude, excitation.frequency, excitation.frequencyInput = (self.amplitude, self.frequency,
+                                                                                 self.frequencyInput)
+        excitation.exctDuration, excitation.anlyDuration = self.exctDuration, self.anlyDuration
+        excitation.relativeFrequency, excitation.fileName = self.relativeFrequency, self.fileName
+        excitation.t_input, excitation.a_input = self.t_input, self.a_input
+        for (i, j) in changes.items():
+            if i not in self.__slots__:
+                raise TypeError("Excitation got an unexpected keyword argument '{}'".format(i))
+            setattr(excitation, i, j)
+
+        if excitation.type == 'Sine Wave' and \
+                not changes.keys().isdisjoint(('frequencyInput', 'relativeFrequency', 'structure', 'tlcd')):
+            excitation.calc_frequency()
+        return excitation
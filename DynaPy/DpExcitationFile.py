@@ -0,0 +1,246 @@
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+from .DpExcitation import Excitation
+from .DpProjectFile import load_arrays
+
+excitationUnits = ('g', 'm/s2')
+
+
+def read_excitation_file(fileName, gravity=9.807, cache=True):
+    """ Reads an excitation text file (as written by the Excitation Generator) and returns its time and acceleration
+    in m/s**2. Accelerations in g are converted with the gravity acceleration given.
+
+    :param fileName: str - Path of the excitation file.
+    :param gravity: float - Gravity acceleration (m/s**2).
+    :param cache: bool - Use (and refresh) the binary cache of the file (see read_excitation_table).
+    :return: tuple - Time (s) and acceleration (m/s**2) as np.ndarray.
+    """
+    unit, t, a = read_excitation_table(fileName, cache)
+    if unit == 'g':
+        a = a * gravity
+    return t, a
+
+
+def read_excitation_table(fileName, cache=True):
+    """ Reads an excitation text file as written, without unit conversion. The file has the following structure:
+
+    unit: /g or m/s2/
+    /number of rows/
+    /time/, /acceleration/
+    ...
+
+    The data block is parsed in one vectorized read. The parsed arrays are cached in a binary file of the per-user
+    cache directory (see excitation_cache_file), never next to the source, keyed by the path, size and modification
+    time of the source, so reading the same file again only memory-maps the cache. The cache is rebuilt when the
+    source changes and silently skipped when it cannot be written.
+
+    :param fileName: str - Path of the excitation file.
+    :param cache: bool - Use (and refresh) the binary cache.
+    :return: tuple - Unit ('g' or 'm/s2'), time (s) and acceleration as np.ndarray.
+    """
+    path = os.path.abspath(fileName)
+    status = os.stat(path)
+    cacheFileName = excitation_cache_file(path)
+
+    if cache and os.path.isfile(cacheFileName):
+        try:
+            arrays = load_arrays(cacheFileName)
+            if str(arrays['path']) == path and int(arrays['size']) == status.st_size and \
+                    int(arrays['mtime']) == status.st_mtime_ns:
+                return str(arrays['unit']), arrays['t'], arrays['a']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    with open(path, 'r', encoding='utf-8') as file:
+        unit = file.readline().strip()
+        if not unit.startswith('unit:') or unit[5:].strip() not in excitationUnits:
+            raise ValueError("Invalid excitation file header '{}' in {} (expected 'unit: g' or 'unit: m/s2').".format(
+                unit, fileName))
+        unit = unit[5:].strip()
+        rows = int(file.readline())
+        data = np.loadtxt(file, delimiter=',', max_rows=rows, ndmin=2) if rows > 0 else np.empty((0, 2))
+
+    if data.shape[0] != rows:
+        raise ValueError('Excitation file {} has {} rows, {} expected.'.format(fileName, data.shape[0], rows))
+    t = np.ascontiguousarray(data[:, 0])
+    a = np.ascontiguousarray(data[:, 1])
+
+    if cache:
+        temporaryFileName = cacheFileName + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(cacheFileName), exist_ok=True)
+            with open(temporaryFileName, 'wb') as file:
+                np.savez(file, t=t, a=a, unit=np.array(unit), path=np.array(path), size=np.array(status.st_size),
+                         mtime=np.array(status.st_mtime_ns))
+            os.replace(temporaryFileName, cacheFileName)
+        except OSError:
+            pass
+    return unit, t, a
+
+
+def excitation_cache_directory():
+    """ Per-user directory of the excitation caches: the DYNAPY_CACHE_DIR environment variable if set, otherwise
+    'DynaPy/cache' in %LOCALAPPDATA% on Windows, 'dynapy' in $XDG_CACHE_HOME (~/.cache by default) elsewhere.
+
+    :return: str - Path of the directory (it may not exist yet).
+    """
+    directory = os.environ.get('DYNAPY_CACHE_DIR')
+    if directory:
+        return directory
+    if sys.platform == 'win32':
+        return os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'DynaPy', 'cache')
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser(os.path.join('~', '.cache')),
+                        'dynapy')
+
+
+def excitation_cache_file(path):
+    """ Cache file of an excitation file, named after a hash of its absolute path. The size and modification
+    time of the source are checked against the ones stored in the cache when it is read.
+
+    :param path: str - Absolute path of the excitation file.
+    :return: str - Path of the cache file.
+    """
+    return os.path.join(excitation_cache_directory(), hashlib.sha1(path.encode('utf-8')).hexdigest() + '.npz')
+
+
+class StrongMotionRecord(object):
+    unitFactors = {'g': None, 'cm/s2': 0.01, 'm/s2': 1.}
+
+    def __init__(self, fileName, title, npts, dt, unit, a):
+        """ Acceleration record read from a strong-motion file (see read_peer_record).
+
+        :param fileName: str - Path of the record file.
+        :param title: list - Header lines of the file (event, station and component descriptions).
+        :param npts: int - Number of samples.
+        :param dt: float - Time step of the samples (s).
+        :param unit: str - Unit of the acceleration in the file ('g', 'cm/s2' or 'm/s2').
+        :param a: np.ndarray - Acceleration (m/s**2).
+        :return: None
+        """
+        self.fileName = fileName
+        self.title = title
+        self.npts = npts
+        self.dt = dt
+        self.unit = unit
+        self.a = a
+
+    @property
+    def t(self):
+        """ Time of the samples, starting at zero (s). """
+        return self.dt * np.arange(self.npts)
+
+    def excitation(self, structure=None, tlcd=None):
+        """ General Excitation with the acceleration of the record.
+
+        :param structure: dict - Dictionary of objects including all data of each story
+        :param tlcd: object - Data of the building tlcd including every paramater
+        :return: object - Excitation of type 'General Excitation'.
+        """
+        return Excitation('General Excitation', t=self.t, a=self.a, fileName=self.fileName, structure=structure,
+                          tlcd=tlcd)
+
+
+def read_peer_record(fileName, gravity=9.807, blockSize=65536, fieldWidth=None):
+    """ Reads an acceleration record in the PEER NGA format (.AT2). The file has four header lines, the third giving
+    the unit and the fourth the number of samples and the time step, in either of the layouts
+
+    NPTS=  4000, DT=   .0100 SEC
+    4000    .0100    NPTS, DT
+
+    followed by the samples, several per line. The samples are parsed block by block (about blockSize characters at a
+    time) straight into the acceleration array, which is converted to m/s**2. Samples are separated by whitespace,
+    as in the PEER files; other fixed-width records whose fields touch are read by giving fieldWidth.
+
+    :param fileName: str - Path of the record file.
+    :param gravity: float - Gravity acceleration (m/s**2), used for records in g.
+    :param blockSize: int - Approximate number of characters parsed at a time.
+    :param fieldWidth: int - Width of the fixed-width fields (None for whitespace separated samples).
+    :return: object - StrongMotionRecord of the file.
+    """
+    with open(fileName, 'r') as file:
+        title = [file.readline().strip() for i in range(3)]
+        npts, dt = parse_peer_sampling(file.readline(), fileName)
+        unit = parse_record_unit(title[2], fileName)
+
+        a = np.empty(npts)
+        n = 0
+        for block in read_record_blocks(file, blockSize, fieldWidth, fileName):
+            m = min(block.size, npts - n)
+            a[n:n + m] = block[:m]
+            n += m
+            if n == npts:
+                break
+
+    if n < npts:
+        raise ValueError('Record {} has {} samples, {} expected.'.format(fileName, n, npts))
+    factor = gravity if unit == 'g' else StrongMotionRecord.unitFactors[unit]
+    if factor != 1.:
+        a *= factor
+    return StrongMotionRecord(fileName, title, npts, dt, unit, a)
+
+
+def read_record_blocks(file, blockSize=65536, fieldWidth=None, fileName=''):
+    """ Generator of the samples of the data block of a record file, read a block of whole lines at a time.
+
+    The samples are separated by whitespace, or, when fieldWidth is given, sliced from each line in fields of
+    fieldWidth characters (fixed-width layouts whose fields may touch, e.g. '-0.1234E-01-0.5678E-02'). Touching
+    fields without fieldWidth raise ValueError.
+
+    :param file: object - Text file positioned at the start of the data block.
+    :param blockSize: int - Approximate number of characters read at a time.
+    :param fieldWidth: int - Width of the fixed-width fields (None for whitespace separated samples).
+    :param fileName: str - Path of the record file (for error messages).
+    :return: generator - np.ndarray of the samples of each block.
+    """
+    touching = re.compile(r'[\d.][-+]')
+    while True:
+        lines = file.readlines(blockSize)
+        if not lines:
+            return
+        if fieldWidth is None:
+            text = ''.join(lines)
+            if touching.search(text) is not None:
+                raise ValueError('Record {} has fixed-width fields with no blank between them, give their width in '
+                                 'fieldWidth to read it.'.format(fileName))
+            yield np.fromstring(text, sep=' ')
+        else:
+            fields = [line[i:i + fieldWidth] for line in lines for i in range(0, len(line.rstrip('\r\n')), fieldWidth)]
+            yield np.array([i for i in fields if not i.isspace()], dtype=np.float64)
+
+
+def parse_peer_sampling(line, fileName=''):
+    """ Number of samples and time step of the fourth header line of a PEER record.
+
+    :param line: str - Header line.
+    :param fileName: str - Path of the record file (for error messages).
+    :return: tuple - Number of samples (int) and time step (float, s).
+    """
+    npts = re.search(r'NPTS\s*=\s*(\d+)', line, re.IGNORECASE)
+    dt = re.search(r'DT\s*=\s*([-+.\dEe]+)', line, re.IGNORECASE)
+    if npts is not None and dt is not None:
+        return int(npts.group(1)), float(dt.group(1))
+
+    values = re.match(r'\s*(\d+)\s+([-+.\dEe]+)\s+NPTS\s*,\s*DT', line, re.IGNORECASE)
+    if values is not None:
+        return int(values.group(1)), float(values.group(2))
+    raise ValueError("Invalid sampling line '{}' in record {}.".format(line.strip(), fileName))
+
+
+def parse_record_unit(line, fileName=''):
+    """ Unit of the acceleration of a record from its header line ('... IN UNITS OF G').
+
+    :param line: str - Header line.
+    :param fileName: str - Path of the record file (for error messages).
+    :return: str - 'g', 'cm/s2' or 'm/s2'.
+    """
+    units = {'G': 'g', 'CM/S/S': 'cm/s2', 'CM/S2': 'cm/s2', 'GAL': 'cm/s2', 'M/S/S': 'm/s2', 'M/S2': 'm/s2'}
+    unit = re.search(r'UNITS?\s+(?:OF\s+)?(\S+)', line, re.IGNORECASE)
+    if unit is not None:
+        unit = unit.group(1).upper().replace('SEC', 'S').replace('^', '').replace('**', '')
+    if unit not in units:
+        raise ValueError("Unknown acceleration unit in '{}' of record {}.".format(line.strip(), fileName))
+    return units[unit]
@@ -0,0 +1,258 @@
+""" Compiled step loops of DynaSolver.ODESolver.
+
+The kernels are written with explicit loops over small arrays so numba can compile them to machine code without
+BLAS/LAPACK. They are compiled on first use and cached on disk. When numba is not installed they are left as plain
+Python functions and ODESolver keeps its NumPy step loops (see kernels_available).
+"""
+from math import log10
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def jit(function):
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+def kernels_available(configurations):
+    """ Function that tells if the compiled kernels should be used in a run.
+
+    :param configurations: object - Configurations with the kernelBackend of the run.
+    :return: bool - True if the backend is 'Numba' and numba is installed.
+    """
+    return configurations.kernelBackend == 'Numba' and numba is not None
+
+
+def banded_available():
+    """ Function that tells if the band factorization and solve (banded_factor and banded_solve) are compiled. As
+    interpreted loops they are slower than the dense products they replace, so band storage is only used with numba.
+
+    :return: bool - True if numba is installed.
+    """
+    return numba is not None
+
+
+def tlcd_constants(tlcd):
+    """ Function that packs the TLCD parameters used by tlcd_damping.
+
+    :param tlcd: object - Data of the building tlcd.
+    :return: np.ndarray - Damping constant, contraction damping constant, diameter, kinetic viscosity and pipe
+    roughness.
+    """
+    return np.array([tlcd.dampingCoefficientConstant, tlcd.contracionDampingConstant, tlcd.diameter,
+                     tlcd.kineticViscosity, tlcd.pipeRoughness])
+
+
+@jit
+def tlcd_damping(velocity, constants):
+    # Same as TLCD.calculate_damping_coefficient
+    D = constants[2]
+    k = constants[4]
+    f = 0.
+    if velocity != 0.:
+        Re = velocity * D / constants[3]
+        b = (k / (3.7 * D) - (5.16 / Re) * log10((k / 3.7 * D) + (5.09 / (Re ** 0.87))))
+        if not b < 0:
+            a = -2 * log10(b)
+            f = (1 / a) ** 2
+    return constants[0] * f * velocity + constants[1] * velocity
+
+
+@jit
+def matvec(A, x, out):
+    for i in range(A.shape[0]):
+        s = 0.
+        for j in range(A.shape[1]):
+            s += A[i, j] * x[j]
+        out[i] = s
+
+
+@jit
+def low_rank_correction(y, Z, G, dofs, s):
+    # y -= s*Z*(I + s*G)^-1*y[dofs], with Gaussian elimination on the small (TLCD) system
+    m = dofs.size
+    A = np.empty((m, m))
+    w = np.empty(m)
+    for i in range(m):
+        for j in range(m):
+            A[i, j] = s * G[i, j]
+        A[i, i] += 1.
+        w[i] = y[dofs[i]]
+
+    for j in range(m):
+        p = j
+        for i in range(j + 1, m):
+            if abs(A[i, j]) > abs(A[p, j]):
+                p = i
+        for q in range(m):
+            A[j, q], A[p, q] = A[p, q], A[j, q]
+        w[j], w[p] = w[p], w[j]
+        for i in range(j + 1, m):
+            r = A[i, j] / A[j, j]
+            for q in range(j, m):
+                A[i, q] -= r * A[j, q]
+            w[i] -= r * w[j]
+    for j in range(m - 1, -1, -1):
+        for q in range(j + 1, m):
+            w[j] -= A[j, q] * w[q]
+        w[j] /= A[j, j]
+
+    for i in range(y.size):
+        for j in range(m):
+            y[i] -= s * Z[i, j] * w[j]
+
+
+@jit
+def fdm_kernel(x, xm1, gammaIF, gammaIBeta, gammaIAlpha, Z, G, dofs, dt, c, constants, nonlinear,
+               dampingVelocity):
+    """ Step loop of ODESolver.fdm_solver. Fills x and dampingVelocity in place.
+
+    :return: tuple - Displacement after the last sample (xM1) and last TLCD damping coefficient.
+    """
+    nt, n = x.shape
+    tmp = np.empty(n)
+    xM1 = np.empty(n)
+
+    for i in range(nt):
+        if nonlinear and 2 <= i < nt - 1:
+            dampingVelocity[i + 1] = (x[i - 2, n - 1] - x[i, n - 1]) / (2 * dt)
+            c = tlcd_damping(abs(dampingVelocity[i + 1]), constants)
+
+        previous = xm1 if i == 0 else x[i - 1]
+        out = xM1 if i == nt - 1 else x[i + 1]
+        matvec(gammaIBeta, x[i], out)
+        matvec(gammaIAlpha, previous, tmp)
+        for j in range(n):
+            out[j] = gammaIF[i, j] - out[j] - tmp[j]
+
+        if nonlinear:
+            s = c / (2 * dt)
+            for j in range(n):
+                for q in range(dofs.size):
+                    out[j] += s * Z[j, q] * previous[dofs[q]]
+            low_rank_correction(out, Z, G, dofs, s)
+    return xM1, c
+
+
+@jit
+def newmark_kernel(x, v, acc, F, k_effI, a, b, Z, G, dofs, dt, gamma, beta, constants, nonlinear):
+    """ Step loop of ODESolver.newmark_solver. Fills x, v and acc in place.
+
+    :return: float - Last TLCD damping coefficient.
+    """
+    nt, n = x.shape
+    dp_eff = np.empty(n)
+    dx = np.empty(n)
+    tmp = np.empty(n)
+    c = 0.
+
+    for i in range(nt - 2):
+        matvec(a, v[i], dp_eff)
+        matvec(b, acc[i], tmp)
+        for j in range(n):
+            dp_eff[j] += F[i + 1, j] - F[i, j] + tmp[j]
+
+        if nonlinear:
+            c = tlcd_damping(abs(v[i, n - 1]), constants)
+            for q in range(dofs.size):
+                d = dofs[q]
+                dp_eff[d] += c * (gamma/beta * v[i, d] + dt * ((gamma/(2*beta)) - 1) * acc[i, d])
+
+        matvec(k_effI, dp_eff, dx)
+        if nonlinear:
+            low_rank_correction(dx, Z, G, dofs, gamma/(beta*dt) * c)
+
+        for j in range(n):
+            dv = gamma/(beta * dt)*dx[j] - gamma/beta*v[i, j] + dt * (1 - (gamma/(2*beta))) * acc[i, j]
+            da = 1/(beta*dt**2)*dx[j] - 1/(beta*dt)*v[i, j] - 1/(2*beta)*acc[i, j]
+            x[i + 1, j] = x[i, j] + dx[j]
+            v[i + 1, j] = v[i, j] + dv
+            acc[i + 1, j] = acc[i, j] + da
+    return c
+
+
+@jit
+def rk4_derivative(x, v, f, MIK, MIC, MIP, dofs, c, nonlinear, outx, outv, tmp):
+    n = x.size
+    matvec(MIK, x, outv)
+    matvec(MIC, v, tmp)
+    for j in range(n):
+        outx[j] = v[j]
+        outv[j] = f[j] - outv[j] - tmp[j]
+    if nonlinear:
+        for j in range(n):
+            for q in range(dofs.size):
+                outv[j] -= c * MIP[j, q] * v[dofs[q]]
+
+
+@jit
+def rk4_kernel(X, V, A, MIF, MIFm, MIK, MIC, MIP, dofs, dt, constants, nonlinear):
+    """ Step loop of ODESolver.rk4_solver. Fills X, V and A in place.
+
+    :return: float - Last TLCD damping coefficient.
+    """
+    nt, n = X.shape
+    k = np.empty((4, 2, n))
+    y = np.empty((2, n))
+    tmp = np.empty(n)
+    c = 0.
+
+    for i in range(nt):
+        if nonlinear:
+            c = tlcd_damping(abs(V[i, n - 1]), constants)
+        rk4_derivative(X[i], V[i], MIF[i], MIK, MIC, MIP, dofs, c, nonlinear, k[0, 0], k[0, 1], tmp)
+        A[i] = k[0, 1]
+        if i == nt - 1:
+            break
+
+        for stage in range(1, 4):
+            h = dt if stage == 3 else dt / 2
+            for j in range(n):
+                y[0, j] = X[i, j] + h * k[stage - 1, 0, j]
+                y[1, j] = V[i, j] + h * k[stage - 1, 1, j]
+            f = MIF[i + 1] if stage == 3 else MIFm[i]
+            rk4_derivative(y[0], y[1], f, MIK, MIC, MIP, dofs, c, nonlinear, k[stage, 0], k[stage, 1], tmp)
+
+        for j in range(n):
+            X[i + 1, j] = X[i, j] + dt/6 * (k[0, 0, j] + 2*k[1, 0, j] + 2*k[2, 0, j] + k[3, 0, j])
+            V[i + 1, j] = V[i, j] + dt/6 * (k[0, 1, j] + 2*k[1, 1, j] + 2*k[2, 1, j] + k[3, 1, j])
+    return c
+
+
+@jit
+def banded_factor(ab, lower, upper):
+    """ In-place LU factorization without pivoting of a band matrix in LAPACK band storage (A[i, j] at
+    ab[upper + i - j, j]), used by DynaSolver.BandedMatrix. L (unit diagonal) and U overwrite the bands of A.
+    """
+    n = ab.shape[1]
+    for k in range(n - 1):
+        pivot = ab[upper, k]
+        for i in range(k + 1, min(n, k + lower + 1)):
+            ab[upper + i - k, k] /= pivot
+        for j in range(k + 1, min(n, k + upper + 1)):
+            akj = ab[upper + k - j, j]
+            if akj != 0.:
+                for i in range(k + 1, min(n, k + lower + 1)):
+                    ab[upper + i - j, j] -= ab[upper + i - k, k] * akj
+
+
+@jit
+def banded_solve(ab, lower, upper, b, out):
+    # Forward and back substitution with the factors of banded_factor, O(n*(lower + upper))
+    n = ab.shape[1]
+    for i in range(n):
+        s = b[i]
+        for k in range(max(0, i - lower), i):
+            s -= ab[upper + i - k, k] * out[k]
+        out[i] = s
+    for i in range(n - 1, -1, -1):
+        s = out[i]
+        for j in range(i + 1, min(n, i + upper + 1)):
+            s -= ab[upper + i - j, j] * out[j]
+        out[i] = s / ab[upper, i]
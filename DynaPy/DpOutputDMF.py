@@ -1,5 +1,130 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from .DpOutputData import OutputData
+from .DynaSolver import ExcitationForce, SweepSolver, dense_matrix, matrix_diagonal, solve_frequency_response
+
+
 class OutputDMF(object):
-    def __init__(self, frequencies, displacements, dmf):
+    def __init__(self, frequencies, displacements, dmf, solverTime=None):
         self.frequencies = frequencies
         self.displacements = displacements
-        self.dmf = dmf
\ No newline at end of file
+        self.dmf = dmf
+        self.solverTime = solverTime
+
+
+def calc_steady_state_dmf(mass, damping, stiffness, excitation, frequencies):
+    """ Function that computes the dynamic magnification factor curves of a linear system from its steady-state
+    harmonic response, without time integration.
+
+    The amplitude of each DOF is |(K - w**2*M + i*w*C)^-1 * F| with the same force amplitude as a 'Sine Wave'
+    excitation (story mass times excitation.amplitude, no force on the TLCDs). As in OutputData.calc_dmf, only the
+    loaded DOFs are kept and the static displacement is F/K at each DOF.
+
+    :param mass: np.matrix - Mass matrix of the system (or BandedMatrix).
+    :param damping: np.matrix - Damping matrix of the system (or BandedMatrix).
+    :param stiffness: np.matrix - Stiffness matrix of the system (or BandedMatrix).
+    :param excitation: object - Excitation object with the amplitude (m/s**2) and tlcd of the analysis.
+    :param frequencies: np.ndarray - Excitation frequencies (rad/s).
+    :return: object - OutputDMF with one row of displacements and DMFs per frequency.
+    """
+    start = time.perf_counter()
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    mass, damping, stiffness = dense_matrix(mass), dense_matrix(damping), dense_matrix(stiffness)
+    force = excitation.amplitude * np.diag(mass).copy()
+    if excitation.tlcd is not None:
+        force[force.size - excitation.tlcd.amount:] = 0.
+
+    x = np.absolute(solve_frequency_response(mass, damping, stiffness, 1j * frequencies, force))
+
+    dofs = np.nonzero(force)[0]
+    x_stat = np.absolute(force[dofs]) / np.diag(np.asarray(stiffness))[dofs]
+    displacements = np.mat(x[:, dofs])
+    dmf = np.mat(x[:, dofs] / x_stat)
+    return OutputDMF(frequencies, displacements, dmf, time.perf_counter() - start)
+
+
+def calc_dmf_sweep(mass, damping, stiffness, excitation, frequencies, configurations, tlcd, progress=None,
+                   workers=None):
+    """ Function that runs the time history analyses of a 'Sine Wave' frequency sweep and returns its dynamic
+    magnification factor curves.
+
+    With one worker (the default of Configurations) the sweep is solved in process. With more, the frequencies are
+    split in chunks that are solved in parallel on a pool of worker processes (see dmf_sweep_chunk) and reassembled
+    in the order of the frequencies. Each chunk is integrated in one batched run by SweepSolver when the method
+    allows it, which is usually fast enough that the seconds taken to start the pool are not recovered: only ask
+    for workers for long nonlinear sweeps.
+
+    :param mass: np.matrix - Mass matrix of the system.
+    :param damping: np.matrix - Damping matrix of the system.
+    :param stiffness: np.matrix - Stiffness matrix of the system.
+    :param excitation: object - 'Sine Wave' excitation of the analysis (its frequency is overwritten by the sweep).
+    :param frequencies: np.ndarray - Absolute excitation frequencies (rad/s).
+    :param configurations: object - Configurations of the analysis.
+    :param tlcd: object - Data of the building tlcd.
+    :param progress: function - Optional callback, called with the fraction of the sweep done (0 to 1).
+    :param workers: int - Number of worker processes (None for configurations.numberOfWorkers, which may itself be
+    None for one per CPU).
+    :return: object - OutputDMF with one row of displacements and DMFs per frequency.
+    """
+    start = time.perf_counter()
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    if workers is None:
+        workers = configurations.numberOfWorkers
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, frequencies.size))
+
+    if workers == 1:
+        displacements, dmf = dmf_sweep_chunk(mass, damping, stiffness, excitation, frequencies, configurations, tlcd,
+                                             progress)
+        if progress is not None:
+            progress(1.)
+        return OutputDMF(frequencies, np.mat(displacements), np.mat(dmf), time.perf_counter() - start)
+
+    # A few chunks per worker balance the load and give a finer progress report
+    chunks = np.array_split(np.arange(frequencies.size), min(4 * workers, frequencies.size))
+    results = [None] * len(chunks)
+    done = 0
+
+    # Worker processes are spawned, not forked, as the sweep may be started from a GUI thread
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(dmf_sweep_chunk, mass, damping, stiffness, excitation, frequencies[chunk],
+                               configurations, tlcd): i for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            done += chunks[i].size
+            if progress is not None:
+                progress(done / frequencies.size)
+
+    displacements = np.concatenate([i[0] for i in results])
+    dmf = np.concatenate([i[1] for i in results])
+    return OutputDMF(frequencies, np.mat(displacements), np.mat(dmf), time.perf_counter() - start)
+
+
+def dmf_sweep_chunk(mass, damping, stiffness, excitation, frequencies, configurations, tlcd, progress=None):
+    """ Function that solves one chunk of a frequency sweep. Runs in the worker processes of calc_dmf_sweep.
+
+    :param frequencies: np.ndarray - Absolute excitation frequencies of the chunk (rad/s).
+    :param progress: function - Optional callback, called with the fraction of the chunk done (0 to 1).
+    :return: tuple - Peak displacements and DMFs of the loaded DOFs as np.ndarray, one row per frequency.
+    """
+    if configurations.method in SweepSolver.methods:
+        sweep = SweepSolver(mass, damping, stiffness, excitation, frequencies, configurations, tlcd, progress)
+        return sweep.maxDisplacement, sweep.DMF
+
+    displacements = []
+    dmf = []
+    for i, frequency in enumerate(frequencies):
+        force = ExcitationForce(excitation.replace(relativeFrequency=False, frequencyInput=frequency), mass,
+                                configurations)
+        outputData = OutputData(mass, damping.copy(), stiffness, force, configurations, tlcd, summary=True)
+        displacements.append(outputData.maxDisplacement)
+        dmf.append(outputData.DMF)
+        if progress is not None:
+            progress((i + 1) / len(frequencies))
+    return np.array(displacements), np.array(dmf)
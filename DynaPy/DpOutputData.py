@@ -1,33 +1,84 @@
+import time
+
 import numpy as np
-from .DynaSolver import ODESolver
+from .DpResponseSinks import StatisticsSink
+from .DynaSolver import ODESolver, matrix_diagonal
 
 
 class OutputData(object):
-    def __init__(self, massMatrix, dampingMatrix, stiffnessMatrix, forceMatrix, configurations, tlcd):
+    def __init__(self, massMatrix, dampingMatrix, stiffnessMatrix, forceMatrix, configurations, tlcd, summary=False):
         """
         :param massMatrix: np.matrix - Any n by n sized mass matrix
         :param dampingMatrix: np.matrix - Any n by n sized damping matrix
         :param stiffnessMatrix: np.matrix - Any n by n sized stiffness matrix
         :param forceMatrix: np.matrix - Any n by t sized matrix composed of n by 1 sized force vectors (force over time)
+        or a ForceProvider
         :param configurations: object - Configurations object containing informations like time step.
+        :param tlcd: object - Data of the building tlcd.
+        :param summary: bool - True to only keep a summary of the response (see summarize), computed block by block
+        while integrating, instead of the whole history. Used by DMF sweeps.
         :return: None
         """
         self.massMatrix = massMatrix
         self.dampingMatrix = dampingMatrix
         self.stiffnessMatrix = stiffnessMatrix
         self.forceMatrix = forceMatrix
+        self.configurations = configurations
+        self.tlcd = tlcd
+        self.summary = summary
 
-        self.dynamicResponse = ODESolver(self.massMatrix, self.dampingMatrix, self.stiffnessMatrix, self.forceMatrix,
-                                         configurations, tlcd)
+        start = time.perf_counter()
+        if summary:
+            self.statistics = StatisticsSink()
+            if configurations.method == 'Frequency Domain Method':
+                # The frequency domain solver needs the whole record, the summary is taken from its response
+                self.dynamicResponse = ODESolver(self.massMatrix, self.dampingMatrix, self.stiffnessMatrix,
+                                                 self.forceMatrix, configurations, tlcd)
+                self.statistics.write(self.dynamicResponse.t, self.dynamicResponse.displacementArray,
+                                      self.dynamicResponse.velocityArray, self.dynamicResponse.accelerationArray)
+                self.statistics.close()
+            else:
+                self.dynamicResponse = ODESolver(self.massMatrix, self.dampingMatrix, self.stiffnessMatrix,
+                                                 self.forceMatrix, configurations, tlcd, sinks=[self.statistics])
+            self.summarize()
+        else:
+            self.dynamicResponse = ODESolver(self.massMatrix, self.dampingMatrix, self.stiffnessMatrix,
+                                             self.forceMatrix, configurations, tlcd)
+        self.solverTime = time.perf_counter() - start
         self.calc_dmf()
 
+    def summarize(self):
+        """ Takes the summary of the response from the statistics of the run: per DOF peak absolute displacement,
+        velocity and acceleration (peakDisplacement, peakVelocity, peakAcceleration), their times
+        (peakDisplacementTime, ...) and RMS values (rmsDisplacement, ...), and the liquid stroke extremes of each
+        TLCD (minStroke and maxStroke, None without TLCD).
+
+        :return: None
+        """
+        for name in ('Displacement', 'Velocity', 'Acceleration'):
+            for attribute in ('peak' + name, 'peak' + name + 'Time', 'rms' + name):
+                setattr(self, attribute, getattr(self.statistics, attribute))
+
+        if self.tlcd is None:
+            self.minStroke = None
+            self.maxStroke = None
+        else:
+            self.minStroke = self.statistics.minDisplacement[-self.tlcd.amount:]
+            self.maxStroke = self.statistics.maxDisplacement[-self.tlcd.amount:]
+
     def calc_dmf(self):
         self.maxDisplacement = []
         self.DMF = []
+        if self.summary:
+            xMax = self.statistics.peakDisplacement
+        else:
+            xMax = np.absolute(self.dynamicResponse.displacementArray).max(axis=0)
+        FMax = self.dynamicResponse.forceProvider.peak()
+        stiffness = matrix_diagonal(self.stiffnessMatrix)
         for i in range(self.massMatrix.shape[0]):
-            x_dyn = max(np.absolute(self.dynamicResponse.x[i, :].A1))
-            F = max(np.absolute(self.forceMatrix[i, :].A1))
-            K = self.stiffnessMatrix[i, i]
+            x_dyn = xMax[i]
+            F = FMax[i]
+            K = stiffness[i]
             x_stat = F/K
             if F != 0:
                 self.maxDisplacement.append(x_dyn)
@@ -0,0 +1,266 @@
+import ast
+import inspect
+import json
+import os
+import re
+import struct
+import zipfile
+
+import numpy as np
+from .DpConfigurations import Configurations
+from .DpExcitation import Excitation
+from .DpInputData import InputData
+from .DpStory import Story
+from .DpTLCD import TLCD
+
+projectFileMarker = 'DynaPy Project File'
+projectFileVersion = 2
+
+
+def save_project(fileName, inputData):
+    """ Saves the input data of an analysis to a DynaPy file (.dpfl), version 2.
+
+    The file starts with a marker line ('DynaPy Project File 2') followed by a JSON header with the stories, the
+    tlcd, the excitation and the configurations. The time and acceleration arrays of a 'General Excitation' are not
+    written as text: they go to a binary sidecar next to the file (same name, .npz extension), stored without
+    compression so they can be memory-mapped by load_project.
+
+    :param fileName: str - Path of the .dpfl file.
+    :param inputData: object - InputData with stories, tlcd, excitation and configurations.
+    :return: None
+    """
+    stories = []
+    for i in sorted(inputData.stories):
+        story = inputData.stories[i]
+        data = {'mass': story.mass, 'height': story.height, 'width': story.width, 'depth': story.depth, 'E': story.E,
+                'support': story.support}
+        for j in ('dampingRatio', 'dampingCoefficient'):
+            if getattr(story, j) is not None:
+                data[j] = getattr(story, j)
+        stories.append(data)
+
+    tlcd = inputData.tlcd
+    if tlcd is not None:
+        tlcd = tlcd_to_data(tlcd)
+
+    excitation = inputData.excitation
+    if excitation.type == 'Sine Wave':
+        excitation = {'type': excitation.type, 'amplitude': excitation.amplitude,
+                      'frequency': excitation.frequencyInput, 'relativeFrequency': excitation.relativeFrequency,
+                      'exctDuration': excitation.exctDuration, 'anlyDuration': excitation.anlyDuration}
+    elif excitation.type == 'General Excitation':
+        # The arrays may be memory-mapped from the sidecar being replaced (the project is saved back to the file it
+        # was opened from), so they are copied and written to a new file that takes its place
+        arraysFileName = os.path.splitext(fileName)[0] + '.npz'
+        temporaryFileName = arraysFileName + '.tmp'
+        with open(temporaryFileName, 'wb') as file:
+            np.savez(file, t=np.array(excitation.t_input, dtype=np.float64).ravel(),
+                     a=np.array(excitation.a_input, dtype=np.float64).ravel())
+        os.replace(temporaryFileName, arraysFileName)
+        excitation = {'type': excitation.type, 'fileName': excitation.fileName,
+                      'arrays': os.path.basename(arraysFileName)}
+
+    configurations = inputData.configurations
+    if configurations is not None:
+        configurations = configurations_to_data(configurations)
+
+    header = {'version': projectFileVersion, 'stories': stories, 'tlcd': tlcd, 'excitation': excitation,
+              'configurations': configurations}
+    with open(fileName, 'w', encoding='utf-8') as file:
+        file.write('{} {}\n'.format(projectFileMarker, projectFileVersion))
+        json.dump(header, file, indent=1)
+        file.write('\n')
+
+
+def load_project(fileName, mmap=True):
+    """ Loads the input data of an analysis from a DynaPy file (.dpfl). Version 2 files are read from their JSON
+    header and binary sidecar. Version 1 files (Python literals written by older versions) are parsed as literals,
+    without evaluating any code.
+
+    :param fileName: str - Path of the .dpfl file.
+    :param mmap: bool - Memory-map the excitation arrays of the sidecar instead of reading them to memory. The
+    sidecar then stays open while the arrays exist; on Windows it cannot be replaced by saving the project back.
+    :return: object - InputData with stories, tlcd, excitation and configurations.
+    """
+    with open(fileName, 'r', encoding='utf-8') as file:
+        marker = file.readline()
+        if marker.startswith(projectFileMarker):
+            header = json.load(file)
+        else:
+            header = read_project_v1(marker + file.read())
+
+    if header['version'] > projectFileVersion:
+        raise ValueError('DynaPy file version {} is not supported (latest is {}).'.format(header['version'],
+                                                                                          projectFileVersion))
+
+    inputData = InputData()
+    configurations = header['configurations']
+    if configurations is not None:
+        inputData.configurations = configurations_from_data(configurations)
+
+    for i, story in enumerate(header['stories']):
+        inputData.stories[i + 1] = Story(**story)
+
+    tlcd = header['tlcd']
+    if tlcd is not None:
+        inputData.tlcd = tlcd_from_data(tlcd, inputData.configurations)
+
+    excitation = header['excitation']
+    if excitation['type'] == 'Sine Wave':
+        inputData.excitation = Excitation(excitation['type'], excitation['amplitude'], excitation['frequency'],
+                                          excitation['relativeFrequency'], excitation['exctDuration'],
+                                          excitation['anlyDuration'], inputData.stories, inputData.tlcd)
+    elif excitation['type'] == 'General Excitation':
+        if 'arrays' in excitation:
+            arrays = load_arrays(os.path.join(os.path.dirname(fileName), excitation['arrays']), mmap)
+        else:
+            arrays = {'t': np.array(excitation['t'], dtype=np.float64),
+                      'a': np.array(excitation['a'], dtype=np.float64)}
+        inputData.excitation = Excitation(excitation['type'], t=arrays['t'], a=arrays['a'],
+                                          fileName=excitation['fileName'], structure=inputData.stories,
+                                          tlcd=inputData.tlcd)
+    else:
+        raise ValueError("Unknown excitation type '{}' in {}.".format(excitation['type'], fileName))
+    return inputData
+
+
+def convert_project(fileName, newFileName=None):
+    """ Converts a version 1 DynaPy file to version 2.
+
+    :param fileName: str - Path of the version 1 .dpfl file.
+    :param newFileName: str - Path of the version 2 file (None to overwrite fileName).
+    :return: object - InputData read from the file.
+    """
+    inputData = load_project(fileName, mmap=False)
+    save_project(fileName if newFileName is None else newFileName, inputData)
+    return inputData
+
+
+def configurations_to_data(configurations):
+    """ Configurations as a dict of its constructor arguments, for the JSON headers of DynaPy files.
+
+    :param configurations: object - Configurations to be saved.
+    :return: dict - Arguments of Configurations() by name.
+    """
+    parameters = inspect.signature(Configurations).parameters
+    return {i: j for i, j in vars(configurations).items() if i in parameters}
+
+
+def configurations_from_data(data):
+    """ Configurations from a dict written by configurations_to_data. Unknown arguments (from newer versions) are
+    ignored and missing ones take their default values.
+
+    :param data: dict - Arguments of Configurations() by name.
+    :return: object - Configurations.
+    """
+    parameters = inspect.signature(Configurations).parameters
+    return Configurations(**{i: j for i, j in data.items() if i in parameters})
+
+
+def tlcd_to_data(tlcd):
+    """ TLCD as a dict of its constructor arguments, for the JSON headers of DynaPy files.
+
+    :param tlcd: object - TLCD to be saved.
+    :return: dict - Type and dimensions of the TLCD.
+    """
+    return {'type': tlcd.type, 'diameter': tlcd.diameter, 'width': tlcd.width, 'waterHeight': tlcd.waterHeight,
+            'gasHeight': tlcd.gasHeight, 'gasPressure': tlcd.gasPressure, 'amount': tlcd.amount,
+            'contraction': tlcd.contraction}
+
+
+def tlcd_from_data(data, configurations=None):
+    """ TLCD from a dict written by tlcd_to_data.
+
+    :param data: dict - Type and dimensions of the TLCD.
+    :param configurations: object - Configurations with the liquid parameters (None for the default ones).
+    :return: object - TLCD.
+    """
+    data = dict(data)
+    return TLCD(data.pop('type'), configurations=Configurations() if configurations is None else configurations,
+                **data)
+
+
+def read_project_v1(text):
+    """ Parses the text of a version 1 DynaPy file (see the format in MainWindow.save_file of older versions) into
+    the header of a version 2 file. The sections hold Python literals, read with ast.literal_eval.
+
+    :param text: str - Contents of the file.
+    :return: dict - Header with version, stories, tlcd, excitation and configurations.
+    """
+    lines = text.splitlines()
+    sections = {}
+    for i, line in enumerate(lines):
+        if line.strip() in ('Structure:', 'TLCD:', 'Excitation:', 'Configurations:'):
+            sections[line.strip()[:-1]] = i + 2
+
+    storyArguments = ('mass', 'height', 'width', 'depth', 'E', 'support')
+    storyCall = re.compile(r'^\s*Story\((.*)\)\s*$', re.DOTALL)
+    storiesData = ast.literal_eval(lines[sections['Structure'] + 1])
+    stories = []
+    for i in sorted(storiesData):
+        call = storyCall.match(storiesData[i])
+        if call is None:
+            raise ValueError('Invalid story in DynaPy file: {}'.format(storiesData[i]))
+        stories.append(dict(zip(storyArguments, ast.literal_eval('({},)'.format(call.group(1))))))
+
+    tlcdData = ast.literal_eval(lines[sections['TLCD']])
+    if tlcdData is None:
+        tlcd = None
+    elif tlcdData[0] == 'Basic TLCD':
+        tlcd = dict(zip(('type', 'diameter', 'width', 'waterHeight', 'amount', 'contraction'), tlcdData))
+    elif tlcdData[0] == 'Pressurized TLCD':
+        tlcd = dict(zip(('type', 'diameter', 'width', 'waterHeight', 'gasHeight', 'gasPressure', 'amount',
+                         'contraction'), tlcdData))
+    else:
+        raise ValueError("Unknown TLCD type '{}' in DynaPy file.".format(tlcdData[0]))
+
+    excitationData = ast.literal_eval(lines[sections['Excitation']])
+    if excitationData[0] == 'Sine Wave':
+        excitation = dict(zip(('type', 'amplitude', 'frequency', 'relativeFrequency', 'exctDuration',
+                               'anlyDuration'), excitationData))
+    else:
+        excitation = dict(zip(('type', 't', 'a', 'fileName'), excitationData))
+
+    # Gravity, the last field, was saved but never read back
+    configurationsData = ast.literal_eval(lines[sections['Configurations']])
+    configurations = dict(zip(('method', 'timeStep', 'initialDisplacement', 'initialVelocity', 'dampingRatio',
+                               'liquidSpecificMass', 'kineticViscosity'), configurationsData))
+
+    return {'version': 1, 'stories': stories, 'tlcd': tlcd, 'excitation': excitation,
+            'configurations': configurations}
+
+
+def load_arrays(fileName, mmap=True):
+    """ Reads the arrays of an .npz file. Members stored without compression (as written by np.savez) are
+    memory-mapped read-only straight from the archive when mmap is True; compressed members are read to memory.
+
+    :param fileName: str - Path of the .npz file.
+    :param mmap: bool - Memory-map the uncompressed members.
+    :return: dict - Arrays by name.
+    """
+    arrays = {}
+    with zipfile.ZipFile(fileName) as archive, open(fileName, 'rb') as file:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+
+            # Data starts after the local file header: 30 bytes, then the member name and the extra field
+            file.seek(info.header_offset + 26)
+            nameLength, extraLength = struct.unpack('<HH', file.read(4))
+            file.seek(info.header_offset + 30 + nameLength + extraLength)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortranOrder, dtype = np.lib.format.read_array_header_2_0(file)
+
+            if dtype.hasobject or int(np.prod(shape)) == 0:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+            else:
+                arrays[name] = np.memmap(fileName, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                         order='F' if fortranOrder else 'C')
+    return arrays
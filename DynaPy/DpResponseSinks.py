@@ -0,0 +1,178 @@
+import numpy as np
+
+
+class ResponseSink(object):
+    def write(self, t, x, v, a):
+        """ Receives the next block of the response of a streamed ODESolver run.
+
+        :param t: np.ndarray - Time of each step of the block (s).
+        :param x: np.ndarray - Displacements, shape (steps, DOFs).
+        :param v: np.ndarray - Velocities, shape (steps, DOFs).
+        :param a: np.ndarray - Accelerations, shape (steps, DOFs).
+        :return: None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ Called once after the last block of the run.
+
+        :return: None
+        """
+        pass
+
+
+class FileSink(ResponseSink):
+    def __init__(self, fileName, dofs=None, responses='xva', decimation=1, precision=None, tlcdAmount=0):
+        """ Writes the response to a CSV file as it is computed, one line per time step with the time followed by
+        the selected responses of the selected DOFs, in the format of the CSV export of the GUI (values separated by
+        ', ', no header). Each block is formatted with a single string operation.
+
+        :param fileName: str - Path of the CSV file.
+        :param dofs: list - DOFs written (None for all).
+        :param responses: str - Responses written, in order: any of 'x', 'v', 'a' and 's' (TLCD stroke, the
+        displacement of the last tlcdAmount DOFs, whatever dofs is).
+        :param decimation: int - Only every decimation-th time step is written.
+        :param precision: int - Significant digits of the values (None for the shortest exact representation).
+        :param tlcdAmount: int - Number of TLCDs, whose DOFs are the last ones.
+        :return: None
+        """
+        for i in responses:
+            if i not in 'xvas':
+                raise ValueError("Unknown response '{}' (use 'x', 'v', 'a' or 's').".format(i))
+        if 's' in responses and tlcdAmount == 0:
+            raise ValueError('The TLCD stroke is only available for structures with TLCD.')
+        self.fileName = fileName
+        self.dofs = dofs
+        self.responses = responses
+        self.decimation = decimation
+        self.precision = precision
+        self.tlcdAmount = tlcdAmount
+        self.format = '%r' if precision is None else '%.{}g'.format(precision)
+        self.count = 0
+        self.file = open(fileName, 'w')
+
+    def write(self, t, x, v, a):
+        keep = slice((-self.count) % self.decimation, None, self.decimation)
+        self.count += t.size
+
+        columns = {'x': x, 'v': v, 'a': a}
+        data = [t[keep, None]]
+        for i in self.responses:
+            if i == 's':
+                data.append(x[keep, x.shape[1] - self.tlcdAmount:])
+            else:
+                data.append(columns[i][keep] if self.dofs is None else columns[i][keep][:, self.dofs])
+        data = np.hstack(data)
+        if data.shape[0] == 0:
+            return
+        line = ', '.join([self.format] * data.shape[1]) + '\n'
+        self.file.write((line * data.shape[0]) % tuple(data.ravel().tolist()))
+
+    def close(self):
+        self.file.close()
+
+
+def export_response_csv(fileName, response, responses='x', dofs=None, decimation=1, precision=None, tlcdAmount=0,
+                        blockSize=65536):
+    """ Exports a computed response to a CSV file (see FileSink for the format and the options), in blocks of
+    blockSize time steps so the text of the whole history is never held in memory.
+
+    :param fileName: str - Path of the CSV file.
+    :param response: object - ODESolver of a run (not streamed) or any object with t, displacementArray,
+    velocityArray and accelerationArray, e.g. outputData.dynamicResponse.
+    :param responses: str - Responses written, in order: any of 'x', 'v', 'a' and 's' (TLCD stroke).
+    :param dofs: list - DOFs written (None for all).
+    :param decimation: int - Only every decimation-th time step is written.
+    :param precision: int - Significant digits of the values (None for the shortest exact representation).
+    :param tlcdAmount: int - Number of TLCDs, whose DOFs are the last ones.
+    :param blockSize: int - Time steps formatted at a time.
+    :return: None
+    """
+    sink = FileSink(fileName, dofs, responses, decimation, precision, tlcdAmount)
+    try:
+        for start in range(0, len(response.t), blockSize):
+            stop = start + blockSize
+            sink.write(response.t[start:stop], response.displacementArray[start:stop],
+                       response.velocityArray[start:stop], response.accelerationArray[start:stop])
+    finally:
+        sink.close()
+
+
+class PlotSink(ResponseSink):
+    def __init__(self, line, dof=0, response='x', maxPoints=2000):
+        """ Live plot of one response of one DOF on a matplotlib line, redrawn after each block. The points kept are
+        decimated (every other point is dropped and the stride doubled when there are more than maxPoints), so the
+        memory used does not grow with the run.
+
+        :param line: object - matplotlib Line2D to be updated.
+        :param dof: int - DOF plotted.
+        :param response: str - 'x', 'v' or 'a'.
+        :param maxPoints: int - Maximum number of points kept.
+        :return: None
+        """
+        self.line = line
+        self.dof = dof
+        self.response = response
+        self.maxPoints = maxPoints
+        self.stride = 1
+        self.count = 0
+        self.index = np.empty(0, dtype=int)
+        self.t = np.empty(0)
+        self.y = np.empty(0)
+
+    def write(self, t, x, v, a):
+        y = {'x': x, 'v': v, 'a': a}[self.response][:, self.dof]
+        index = self.count + np.arange(t.size)
+        keep = index % self.stride == 0
+        self.count += t.size
+        self.index = np.concatenate((self.index, index[keep]))
+        self.t = np.concatenate((self.t, t[keep]))
+        self.y = np.concatenate((self.y, y[keep]))
+        while self.index.size > self.maxPoints:
+            self.stride *= 2
+            keep = self.index % self.stride == 0
+            self.index, self.t, self.y = self.index[keep], self.t[keep], self.y[keep]
+
+        self.line.set_data(self.t, self.y)
+        self.line.axes.relim()
+        self.line.axes.autoscale_view()
+        self.line.figure.canvas.draw_idle()
+
+
+class StatisticsSink(ResponseSink):
+    def __init__(self):
+        """ Running statistics of the response: peak absolute value, time of the peak, minimum, maximum and RMS of
+        the displacement, velocity and acceleration of each DOF. Results are attributes named after the response,
+        e.g. peakDisplacement, peakDisplacementTime, minDisplacement, maxDisplacement and rmsDisplacement, available
+        after close().
+
+        :return: None
+        """
+        self.steps = 0
+        self.stats = {}
+
+    def write(self, t, x, v, a):
+        for name, y in (('Displacement', x), ('Velocity', v), ('Acceleration', a)):
+            if name not in self.stats:
+                n = y.shape[1]
+                self.stats[name] = {'peak': np.zeros(n), 'peakTime': np.zeros(n), 'min': np.full(n, np.inf),
+                                    'max': np.full(n, -np.inf), 'squares': np.zeros(n)}
+            s = self.stats[name]
+
+            i = np.absolute(y).argmax(axis=0)
+            peak = np.absolute(y[i, np.arange(y.shape[1])])
+            higher = peak > s['peak']
+            s['peak'][higher] = peak[higher]
+            s['peakTime'][higher] = t[i[higher]]
+            np.minimum(s['min'], y.min(axis=0), out=s['min'])
+            np.maximum(s['max'], y.max(axis=0), out=s['max'])
+            s['squares'] += (y ** 2).sum(axis=0)
+        self.steps += t.size
+
+    def close(self):
+        for name, s in self.stats.items():
+            setattr(self, 'peak' + name, s['peak'])
+            setattr(self, 'peak' + name + 'Time', s['peakTime'])
+            setattr(self, 'min' + name, s['min'])
+            setattr(self, 'max' + name, s['max'])
+            setattr(self, 'rms' + name, np.sqrt(s['squares'] / self.steps))
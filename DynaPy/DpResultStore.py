@@ -0,0 +1,280 @@
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+from .DpOutputData import OutputData
+from .DpOutputDMF import OutputDMF
+from .DpProjectFile import configurations_from_data, configurations_to_data, tlcd_from_data, tlcd_to_data
+from .DpResponseSinks import ResponseSink
+from .DynaSolver import BandedMatrix, MatrixForce
+
+resultStoreVersion = 1
+
+
+class ResultStoreSink(ResponseSink):
+    def __init__(self, fileName, metadata=None, arrays=None, forceProvider=None):
+        """ Writes the response to a result store as it is computed: a zip archive of compressed .npy members, in
+        which t, x, v and a (and the force F, when forceProvider is given) are split in time chunks, one per block
+        written ('x/00000.npy', 'x/00001.npy', ...). A JSON header ('header.json') with the chunk layout and the
+        metadata, and the other arrays, are written on close(). The store is read by ResultStore.
+
+        The archive is written to fileName + '.tmp' and only takes the place of fileName on close(), so a run that
+        fails leaves any previous store untouched instead of a truncated one.
+
+        :param fileName: str - Path of the store (.npz).
+        :param metadata: dict - JSON serializable data kept in the header (e.g. configurations and timing).
+        :param arrays: dict - Other arrays kept in the store by name (e.g. the system matrices).
+        :param forceProvider: object - ForceProvider of the run, whose blocks are stored with the response.
+        :return: None
+        """
+        self.fileName = fileName
+        self.metadata = {} if metadata is None else metadata
+        self.arrays = {} if arrays is None else arrays
+        self.forceProvider = forceProvider
+        self.chunks = []
+        self.dofs = None
+        self.temporaryFileName = fileName + '.tmp'
+        self.archive = zipfile.ZipFile(self.temporaryFileName, 'w', zipfile.ZIP_DEFLATED)
+
+    def write(self, t, x, v, a):
+        start = self.chunks[-1][1] if self.chunks else 0
+        i = len(self.chunks)
+        quantities = [('t', t), ('x', x), ('v', v), ('a', a)]
+        if self.forceProvider is not None:
+            quantities.append(('F', self.forceProvider.block(start, start + t.size)))
+        for name, y in quantities:
+            write_member(self.archive, '{}/{:05d}.npy'.format(name, i), np.ascontiguousarray(y))
+        self.chunks.append([start, start + t.size])
+        self.dofs = x.shape[1]
+
+    def close(self):
+        for name, y in self.arrays.items():
+            write_member(self.archive, name + '.npy', np.asarray(y))
+        header = {'version': resultStoreVersion, 'chunks': self.chunks, 'dofs': self.dofs,
+                  'force': self.forceProvider is not None, 'arrays': sorted(self.arrays), 'metadata': self.metadata}
+        self.archive.writestr('header.json', json.dumps(header, indent=1))
+        self.archive.close()
+        os.replace(self.temporaryFileName, self.fileName)
+
+
+class ResultStore(object):
+    def __init__(self, fileName):
+        """ Reader of a result store written by ResultStoreSink. Only the chunks needed by a read are decompressed.
+
+        :param fileName: str - Path of the store (.npz).
+        :return: None
+        """
+        self.fileName = fileName
+        self.archive = zipfile.ZipFile(fileName, 'r')
+        self.header = json.loads(self.archive.read('header.json').decode('utf-8'))
+        if self.header['version'] > resultStoreVersion:
+            raise ValueError('Result store version {} is not supported (latest is {}).'.format(
+                self.header['version'], resultStoreVersion))
+        self.metadata = self.header['metadata']
+        self.chunks = np.array(self.header['chunks'], dtype=int).reshape(-1, 2)
+        self.dofs = self.header['dofs']
+        self.force = self.header.get('force', False)
+        self.t = np.concatenate([self.read_member('t/{:05d}.npy'.format(i)) for i in range(len(self.chunks))]) \
+            if len(self.chunks) else np.empty(0)
+
+    def read(self, quantity, dofs=None, start=None, stop=None):
+        """ Reads a window of the response.
+
+        :param quantity: str - 'x', 'v', 'a' or 'F' (displacement, velocity, acceleration or force, if the force
+        was stored).
+        :param dofs: list - DOFs read (None for all).
+        :param start: float - Time where the window starts (s, None for the start of the analysis).
+        :param stop: float - Time where the window ends, included (s, None for the end of the analysis).
+        :return: tuple - Time of the window (np.ndarray) and the response, shape (time steps, DOFs).
+        """
+        if quantity not in ('x', 'v', 'a', 'F'):
+            raise ValueError("Unknown quantity '{}' (use 'x', 'v', 'a' or 'F').".format(quantity))
+        if quantity == 'F' and not self.force:
+            raise ValueError('{} does not hold the force of the run.'.format(self.fileName))
+        first = 0 if start is None else int(np.searchsorted(self.t, start, 'left'))
+        last = self.t.size if stop is None else int(np.searchsorted(self.t, stop, 'right'))
+        columns = slice(None) if dofs is None else np.asarray(dofs, dtype=int)
+
+        blocks = []
+        for i, (chunkStart, chunkStop) in enumerate(self.chunks):
+            if chunkStop <= first or chunkStart >= last:
+                continue
+            block = self.read_member('{}/{:05d}.npy'.format(quantity, i))
+            blocks.append(block[max(first, chunkStart) - chunkStart:min(last, chunkStop) - chunkStart, columns])
+
+        if blocks:
+            y = np.concatenate(blocks)
+        else:
+            y = np.empty((0, self.dofs if dofs is None else len(dofs)))
+        return self.t[first:max(first, last)], y
+
+    def array(self, name):
+        """ Other array kept in the store (e.g. 'massMatrix').
+
+        :param name: str - Name of the array.
+        :return: np.ndarray - Array.
+        """
+        return self.read_member(name + '.npy')
+
+    def read_member(self, name):
+        with self.archive.open(name) as member:
+            return np.lib.format.read_array(member)
+
+    def close(self):
+        self.archive.close()
+
+
+class StoredResponse(object):
+    def __init__(self, t, x, v, a, force=None):
+        """ Response read from a result store, with the attributes of ODESolver used by the plots, exports and
+        reports.
+
+        :param t: np.ndarray - Time of each step (s).
+        :param x: np.ndarray - Displacements, shape (time steps, DOFs).
+        :param v: np.ndarray - Velocities, shape (time steps, DOFs).
+        :param a: np.ndarray - Accelerations, shape (time steps, DOFs).
+        :param force: np.ndarray - Force, shape (time steps, DOFs), kept as a MatrixForce in forceProvider (None if
+        it was not stored).
+        :return: None
+        """
+        self.t = t
+        self.displacementArray = x
+        self.velocityArray = v
+        self.accelerationArray = a
+        self.forceProvider = None if force is None else MatrixForce(np.asmatrix(force.T))
+
+    @property
+    def x(self):
+        return np.asmatrix(self.displacementArray.T)
+
+    @property
+    def v(self):
+        return np.asmatrix(self.velocityArray.T)
+
+    @property
+    def a(self):
+        return np.asmatrix(self.accelerationArray.T)
+
+
+def save_output_data(fileName, outputData, chunkSize=4096):
+    """ Saves the results of an analysis to a result store: t, x, v, a and the force in compressed time chunks of
+    chunkSize steps, the system matrices, the configurations, the TLCD, the peak displacements and DMFs and the
+    solver time.
+
+    :param fileName: str - Path of the store (.npz).
+    :param outputData: object - OutputData of a full (not summary) run.
+    :param chunkSize: int - Time steps per chunk.
+    :return: None
+    """
+    if outputData.summary:
+        raise ValueError('Summary runs keep no response history to be saved.')
+
+    matrices = {}
+    for name in ('massMatrix', 'dampingMatrix', 'stiffnessMatrix'):
+        A = getattr(outputData, name)
+        matrices[name] = A.todense() if isinstance(A, BandedMatrix) else np.asarray(A)
+    metadata = {'type': 'OutputData', 'savedAt': time.time(), 'solverTime': outputData.solverTime,
+                'configurations': configurations_to_data(outputData.configurations),
+                'tlcd': None if outputData.tlcd is None else tlcd_to_data(outputData.tlcd),
+                'tlcdAmount': 0 if outputData.tlcd is None else outputData.tlcd.amount,
+                'maxDisplacement': [float(i) for i in outputData.maxDisplacement],
+                'DMF': [float(i) for i in outputData.DMF]}
+
+    response = outputData.dynamicResponse
+    sink = ResultStoreSink(fileName, metadata, matrices, response.forceProvider)
+    for start in range(0, len(response.t), chunkSize):
+        stop = start + chunkSize
+        sink.write(response.t[start:stop], response.displacementArray[start:stop],
+                   response.velocityArray[start:stop], response.accelerationArray[start:stop])
+    sink.close()
+
+
+def load_output_data(fileName, dofs=None, start=None, stop=None):
+    """ Loads the results of an analysis saved by save_output_data, without running it again. A window of the
+    response can be read instead of the whole history.
+
+    The OutputData returned has the attributes of the run (massMatrix, dampingMatrix, stiffnessMatrix, forceMatrix,
+    configurations, tlcd, solverTime, maxDisplacement, DMF) and its dynamicResponse holds t, x, v, a and the force
+    (forceProvider) of the window read. The TLCD is built again from its stored dimensions.
+
+    :param fileName: str - Path of the store (.npz).
+    :param dofs: list - DOFs read (None for all).
+    :param start: float - Time where the window starts (s, None for the start of the analysis).
+    :param stop: float - Time where the window ends, included (s, None for the end of the analysis).
+    :return: object - OutputData.
+    """
+    store = ResultStore(fileName)
+    try:
+        if store.metadata.get('type') != 'OutputData':
+            raise ValueError('{} does not hold the results of an analysis.'.format(fileName))
+        outputData = OutputData.__new__(OutputData)
+        outputData.massMatrix = np.mat(store.array('massMatrix'))
+        outputData.dampingMatrix = np.mat(store.array('dampingMatrix'))
+        outputData.stiffnessMatrix = np.mat(store.array('stiffnessMatrix'))
+        outputData.configurations = configurations_from_data(store.metadata['configurations'])
+        tlcd = store.metadata.get('tlcd')
+        outputData.tlcd = None if tlcd is None else tlcd_from_data(tlcd, outputData.configurations)
+        outputData.summary = False
+        outputData.solverTime = store.metadata['solverTime']
+        outputData.maxDisplacement = store.metadata['maxDisplacement']
+        outputData.DMF = store.metadata['DMF']
+
+        t, x = store.read('x', dofs, start, stop)
+        v = store.read('v', dofs, start, stop)[1]
+        a = store.read('a', dofs, start, stop)[1]
+        force = store.read('F', dofs, start, stop)[1] if store.force else None
+        outputData.dynamicResponse = StoredResponse(t, x, v, a, force)
+        forceProvider = outputData.dynamicResponse.forceProvider
+        outputData.forceMatrix = None if forceProvider is None else forceProvider.matrix()
+    finally:
+        store.close()
+    return outputData
+
+
+def save_output_dmf(fileName, outputDMF, configurations=None):
+    """ Saves the dynamic magnification factor curves of a frequency sweep to a result store.
+
+    :param fileName: str - Path of the store (.npz).
+    :param outputDMF: object - OutputDMF of the sweep.
+    :param configurations: object - Configurations of the sweep (optional).
+    :return: None
+    """
+    metadata = {'type': 'OutputDMF', 'savedAt': time.time(), 'solverTime': outputDMF.solverTime,
+                'configurations': None if configurations is None else configurations_to_data(configurations)}
+    arrays = {'frequencies': np.asarray(outputDMF.frequencies), 'displacements': np.asarray(outputDMF.displacements),
+              'dmf': np.asarray(outputDMF.dmf)}
+    ResultStoreSink(fileName, metadata, arrays).close()
+
+
+def load_output_dmf(fileName):
+    """ Loads the dynamic magnification factor curves saved by save_output_dmf.
+
+    :param fileName: str - Path of the store (.npz).
+    :return: tuple - OutputDMF and the Configurations of the sweep (None if they were not saved).
+    """
+    store = ResultStore(fileName)
+    try:
+        if store.metadata.get('type') != 'OutputDMF':
+            raise ValueError('{} does not hold dynamic magnification factor curves.'.format(fileName))
+        outputDMF = OutputDMF(store.array('frequencies'), np.mat(store.array('displacements')),
+                              np.mat(store.array('dmf')), store.metadata['solverTime'])
+        configurations = store.metadata['configurations']
+        if configurations is not None:
+            configurations = configurations_from_data(configurations)
+    finally:
+        store.close()
+    return outputDMF, configurations
+
+
+def write_member(archive, name, y):
+    """ Writes an array as a .npy member of a zip archive.
+
+    :param archive: object - zipfile.ZipFile opened for writing.
+    :param name: str - Name of the member.
+    :param y: np.ndarray - Array.
+    :return: None
+    """
+    with archive.open(name, 'w', force_zip64=True) as member:
+        np.lib.format.write_array(member, y, allow_pickle=False)
@@ -1,7 +1,13 @@
 from math import sqrt
 
+import numpy as np
+
 
 class Story(object):
+    __slots__ = ('mass', 'height', 'width', 'depth', 'E', 'support', 'tlcd', 'I', 'stiffness', 'naturalFrequency',
+                 'criticalDamping', 'dampingRatio', 'dampingCoefficient')
+    stiffnessFactors = {'Fix-Fix': 24, 'Fix-Pin': 15, 'Pin-Fix': 15, 'Pin-Pin': 6}
+
     def __init__(self, mass=10.e3, height=3., width=.35, depth=.35, E=25.e9, support='Fix-Fix',
                  tlcd=None, **kwargs):
         """
@@ -12,7 +18,7 @@ class Story(object):
         :param E: float - Elasticity module of the column (Pa)
         :param support: str - Type of support o the column base
         :param tlcd: object - Data of the building tlcd
-        :param kwargs: any type - Used for implamentation of future parameters
+        :param kwargs: any type - Values of other Story attributes (e.g. dampingCoefficient)
         :return:
         """
         self.mass = mass
@@ -22,18 +28,26 @@ class Story(object):
         self.E = E
         self.support = support
         self.tlcd = tlcd
+        self.dampingRatio = None
+        self.dampingCoefficient = None
 
         for (i, j) in kwargs.items():
-            exec('self.{} = {}'.format(i, j))
+            if i not in self.__slots__:
+                raise TypeError("Story got an unexpected keyword argument '{}'".format(i))
+            setattr(self, i, j)
 
+        self.calc_stiffness()
+        self.calc_natural_frequency()
+        if self.dampingRatio is not None and self.dampingCoefficient is None:
+            self.calc_damping_coefficient(self.dampingRatio)
+
+    def calc_stiffness(self):
+        if self.support not in self.stiffnessFactors:
+            raise ValueError('Unknown support type: {}.'.format(self.support))
         self.I = (self.width*self.depth**3)/12
-        if support == 'Fix-Fix':
-            self.stiffness = 24*self.E*self.I/(self.height**3)
-        elif support == 'Fix-Pin' or support == 'Pin-Fix':
-            self.stiffness = 15*self.E*self.I/(self.height**3)
-        elif support == 'Pin-Pin':
-            self.stiffness = 6*self.E*self.I/(self.height**3)
+        self.stiffness = self.stiffnessFactors[self.support]*self.E*self.I/(self.height**3)
 
+    def calc_natural_frequency(self):
         if self.tlcd is None:
             self.naturalFrequency = sqrt(self.stiffness/self.mass)
             self.criticalDamping = 2*self.mass*self.naturalFrequency
@@ -41,5 +55,128 @@ class Story(object):
             self.naturalFrequency = sqrt(self.stiffness/(self.mass + self.tlcd.mass))
             self.criticalDamping = 2*(self.mass + self.tlcd.mass)*self.naturalFrequency
 
+    def calc_damping_coefficient(self, dampingRatio):
+        self.dampingRatio = dampingRatio
+        self.dampingCoefficient = self.criticalDamping * dampingRatio
+
+    def replace(self, **changes):
+        """ Copy of the story with some attributes changed. Only the derived properties that depend on the changed
+        attributes are recalculated: the damping coefficient follows the critical damping when it was given by a
+        damping ratio (calc_damping_coefficient) and is reset to None otherwise, unless it is changed too.
+
+        :param changes: any type - New values of Story attributes (e.g. mass=12.e3, support='Pin-Pin').
+        :return: Story - Modified copy.
+        """
+        story = Story.__new__(Story)
+        story.mass, story.height, story.width, story.depth = self.mass, self.height, self.width, self.depth
+        story.E, story.support, story.tlcd = self.E, self.support, self.tlcd
+        story.I, story.stiffness = self.I, self.stiffness
+        story.naturalFrequency, story.criticalDamping = self.naturalFrequency, self.criticalDamping
+        story.dampingRatio, story.dampingCoefficient = self.dampingRatio, self.dampingCoefficient
+        for (i, j) in changes.items():
+            if i not in self.__slots__:
+                raise TypeError("Story got an unexpected keyword argument '{}'".format(i))
+            setattr(story, i, j)
+
+        if not changes.keys().isdisjoint(('height', 'width', 'depth', 'E', 'support')):
+            story.calc_stiffness()
+        recalculate = not changes.keys().isdisjoint(('mass', 'height', 'width', 'depth', 'E', 'support', 'tlcd'))
+        if recalculate:
+            story.calc_natural_frequency()
+        if 'dampingCoefficient' not in changes and (recalculate or 'dampingRatio' in changes):
+            if story.dampingRatio is not None:
+                story.calc_damping_coefficient(story.dampingRatio)
+            else:
+                story.dampingCoefficient = None
+        return story
+
+
+class StoryTable(object):
+    supports = ['Fix-Fix', 'Fix-Pin', 'Pin-Fix', 'Pin-Pin']
+    stiffnessFactors = np.array([24., 15., 15., 6.])
+
+    def __init__(self, mass, height, width, depth, E, support, dampingCoefficient=None):
+        """ Columnar model of the stories of a building: one array per story parameter, first story first. Used by
+        the matrix assembly functions of DynaSolver, which accept it in place of a {int: Story} dictionary.
+
+        :param mass: np.ndarray - mass of each story (kg)
+        :param height: np.ndarray - height of each story (m)
+        :param width: np.ndarray - width of the columns (m)
+        :param depth: np.ndarray - depth of the columns (m)
+        :param E: np.ndarray - Elasticity module of the columns (Pa)
+        :param support: np.ndarray - Support code of each story, index of its support type in StoryTable.supports
+        :param dampingCoefficient: np.ndarray - Damping coefficient of each story (None for NaN, see
+        calc_damping_coefficient)
+        :return: None
+        """
+        self.mass = np.asarray(mass, dtype=np.float64)
+        n = self.mass.size
+        self.height = np.broadcast_to(np.asarray(height, dtype=np.float64), n).copy()
+        self.width = np.broadcast_to(np.asarray(width, dtype=np.float64), n).copy()
+        self.depth = np.broadcast_to(np.asarray(depth, dtype=np.float64), n).copy()
+        self.E = np.broadcast_to(np.asarray(E, dtype=np.float64), n).copy()
+        self.support = np.broadcast_to(np.asarray(support, dtype=np.int64), n).copy()
+        if dampingCoefficient is None:
+            self.dampingCoefficient = np.full(n, np.nan)
+        else:
+            self.dampingCoefficient = np.broadcast_to(np.asarray(dampingCoefficient, dtype=np.float64), n).copy()
+
+    def __len__(self):
+        return self.mass.size
+
+    @classmethod
+    def support_code(cls, support):
+        """ Code of a support type.
+
+        :param support: str - Type of support of the column base ('Fix-Fix', 'Fix-Pin', 'Pin-Fix' or 'Pin-Pin').
+        :return: int - Index of the support in StoryTable.supports.
+        """
+        if support not in cls.supports:
+            raise ValueError('Unknown support type: {}.'.format(support))
+        return cls.supports.index(support)
+
+    @classmethod
+    def from_stories(cls, stories):
+        """ Story table with the parameters of a story dictionary.
+
+        :param stories: dict - Dictionary of Story objects, numbered from 1.
+        :return: StoryTable - Table of the stories.
+        """
+        stories = [stories[i + 1] for i in range(len(stories))]
+        return cls([story.mass for story in stories], [story.height for story in stories],
+                   [story.width for story in stories], [story.depth for story in stories],
+                   [story.E for story in stories], [cls.support_code(story.support) for story in stories],
+                   [getattr(story, 'dampingCoefficient', np.nan) for story in stories])
+
+    def to_stories(self):
+        """ Story dictionary with the parameters of the table.
+
+        :return: dict - Dictionary of Story objects, numbered from 1.
+        """
+        stories = {}
+        for i in range(len(self)):
+            story = Story(self.mass[i], self.height[i], self.width[i], self.depth[i], self.E[i],
+                          self.supports[self.support[i]])
+            if not np.isnan(self.dampingCoefficient[i]):
+                story.dampingCoefficient = self.dampingCoefficient[i]
+            stories[i + 1] = story
+        return stories
+
+    @property
+    def I(self):
+        return (self.width*self.depth**3)/12
+
+    @property
+    def stiffness(self):
+        return self.stiffnessFactors[self.support]*self.E*self.I/(self.height**3)
+
+    @property
+    def naturalFrequency(self):
+        return np.sqrt(self.stiffness/self.mass)
+
+    @property
+    def criticalDamping(self):
+        return 2*self.mass*self.naturalFrequency
+
     def calc_damping_coefficient(self, dampingRatio):
         self.dampingCoefficient = self.criticalDamping * dampingRatio
@@ -5,6 +5,12 @@ from .DpConfigurations import Configurations
 
 
 class TLCD(object):
+    __slots__ = ('type', 'diameter', 'width', 'waterHeight', 'gasHeight', 'gasPressure', 'liquidSpecificMass',
+                 'kineticViscosity', 'pipeRoughness', 'nonLinearAnalysis', 'gravity', 'amount', 'contraction', 'area',
+                 'length', 'liquidMass', 'gasMass', 'mass', 'liquidStiffness', 'gasStiffness', 'stiffness',
+                 'naturalFrequency', 'dampingCoefficientConstant', 'dampingCoefficient', 'contracionDampingConstant')
+    types = ('Basic TLCD', 'Pressurized TLCD')
+
     def __init__(self, tlcdType='Basic TLCD', diameter=0.6, width=20., waterHeight=1.,
                  gasHeight=0.1, gasPressure=202650,
                  amount=1, contraction=1,
@@ -15,13 +21,15 @@ class TLCD(object):
         :param width: float - Width of the tlcd tube (m)
         :param waterHeight: float - Water height inside the tlcd at rest (m)
         :param configurations: object - Configurations containing fluid parameters and gravity acceleration
-        :param kwargs: any type - Used for future implementation of new parameters
+        :param kwargs: any type - Values of other TLCD attributes
         :return:
         """
         self.type = tlcdType
         self.diameter = diameter
         self.width = width
         self.waterHeight = waterHeight
+        self.gasHeight = gasHeight
+        self.gasPressure = gasPressure
         self.liquidSpecificMass = configurations.liquidSpecificMass
         self.kineticViscosity = configurations.kineticViscosity
         self.pipeRoughness = configurations.pipeRoughness
@@ -31,37 +39,74 @@ class TLCD(object):
         self.contraction = contraction
 
         for (i, j) in kwargs.items():
-            exec('self.{} = {}'.format(i, j))
+            if i not in self.__slots__:
+                raise TypeError("TLCD got an unexpected keyword argument '{}'".format(i))
+            setattr(self, i, j)
 
-        self.area = 0.25 * pi * self.diameter ** 2
+        self.calc_mass_and_stiffness()
+        self.calc_damping()
 
-        if self.type == 'Basic TLCD':
-            self.length = self.width + 2 * self.waterHeight
-            self.mass = pi * ((self.diameter / 2) ** 2) * self.length * self.liquidSpecificMass
-            self.stiffness = pi * (self.diameter ** 2) * self.liquidSpecificMass * self.gravity / 2
-            self.naturalFrequency = (self.stiffness / self.mass) ** 0.5
+    def calc_mass_and_stiffness(self):
+        if self.type not in self.types:
+            raise ValueError('Unknown TLCD type: {}.'.format(self.type))
 
+        # The gas mass and stiffness are null in the Basic TLCD
+        self.area = 0.25 * pi * self.diameter ** 2
+        self.length = self.width + 2 * self.waterHeight
+        self.liquidMass = pi * ((self.diameter / 2) ** 2) * self.length * self.liquidSpecificMass
+        self.gasMass = 0
+        self.mass = self.liquidMass + self.gasMass
+        self.liquidStiffness = pi * (self.diameter ** 2) * self.liquidSpecificMass * self.gravity / 2
         if self.type == 'Pressurized TLCD':
-            self.gasHeight = gasHeight
-            self.gasPressure = gasPressure
-
-            self.length = self.width + 2 * self.waterHeight
-            self.liquidMass = pi * ((self.diameter / 2) ** 2) * self.length * self.liquidSpecificMass
-            self.gasMass = 0
-            self.mass = self.liquidMass + self.gasMass
-            self.liquidStiffness = pi * (self.diameter ** 2) * self.liquidSpecificMass * self.gravity / 2
             self.gasStiffness = 1.4 * self.gasPressure / self.gasHeight * pi * (self.diameter ** 2) / 2
-            self.stiffness = self.liquidStiffness + self.gasStiffness
-            self.naturalFrequency = (self.stiffness / self.mass) ** 0.5
-        
+        else:
+            self.gasStiffness = 0
+        self.stiffness = self.liquidStiffness + self.gasStiffness
+        self.naturalFrequency = (self.stiffness / self.mass) ** 0.5
+
+    def calc_damping(self):
+        self.dampingCoefficientConstant = pi * self.length * self.diameter * self.liquidSpecificMass / 8
         if self.nonLinearAnalysis:
-            self.dampingCoefficientConstant = pi * self.length * self.diameter * self.liquidSpecificMass / 8
             self.dampingCoefficient = 0
         else:
             self.dampingCoefficient = 8 * pi * self.length * self.kineticViscosity * self.liquidSpecificMass
 
         self.contracionDampingConstant = self.calculate_contraction_damping_constant()
 
+    def replace(self, **changes):
+        """ Copy of the TLCD with some attributes changed (e.g. diameter=0.4, amount=2). Only the derived properties
+        that depend on the changed attributes are recalculated.
+
+        :param changes: any type - New values of TLCD attributes.
+        :return: TLCD - Modified copy.
+        """
+        tlcd = TLCD.__new__(TLCD)
+        tlcd.type, tlcd.diameter, tlcd.width, tlcd.waterHeight = self.type, self.diameter, self.width, self.waterHeight
+        tlcd.gasHeight, tlcd.gasPressure, tlcd.amount, tlcd.contraction = (self.gasHeight, self.gasPressure,
+                                                                           self.amount, self.contraction)
+        tlcd.liquidSpecificMass, tlcd.kineticViscosity, tlcd.pipeRoughness = (self.liquidSpecificMass,
+                                                                              self.kineticViscosity, self.pipeRoughness)
+        tlcd.nonLinearAnalysis, tlcd.gravity = self.nonLinearAnalysis, self.gravity
+        tlcd.area, tlcd.length, tlcd.liquidMass, tlcd.gasMass, tlcd.mass = (self.area, self.length, self.liquidMass,
+                                                                            self.gasMass, self.mass)
+        tlcd.liquidStiffness, tlcd.gasStiffness, tlcd.stiffness = (self.liquidStiffness, self.gasStiffness,
+                                                                   self.stiffness)
+        tlcd.naturalFrequency, tlcd.dampingCoefficientConstant = self.naturalFrequency, self.dampingCoefficientConstant
+        tlcd.dampingCoefficient, tlcd.contracionDampingConstant = (self.dampingCoefficient,
+                                                                   self.contracionDampingConstant)
+        for (i, j) in changes.items():
+            if i not in self.__slots__:
+                raise TypeError("TLCD got an unexpected keyword argument '{}'".format(i))
+            setattr(tlcd, i, j)
+
+        geometry = not changes.keys().isdisjoint(('type', 'diameter', 'width', 'waterHeight', 'gasHeight',
+                                                  'gasPressure', 'liquidSpecificMass', 'gravity'))
+        if geometry:
+            tlcd.calc_mass_and_stiffness()
+        if geometry or not changes.keys().isdisjoint(('kineticViscosity', 'nonLinearAnalysis', 'contraction')):
+            tlcd.calc_damping()
+        return tlcd
+
     def calculate_reynolds(self, velocity):
         return velocity * self.diameter / self.kineticViscosity
 
@@ -86,8 +131,183 @@ class TLCD(object):
         f = self.calculate_friction_factor(velocity)
         return f * velocity
 
+    def calculate_damping_coefficient(self, velocity):
+        """ Nonlinear damping coefficient of the TLCD for a given liquid velocity, including the friction and
+        contraction terms.
+
+        :param velocity: float - Liquid velocity (m/s)
+        :return: float - Damping coefficient (N.s/m)
+        """
+        correctionFactor = self.calculate_damping_correction_factor(velocity)
+        contractionDampingCoefficient = self.calculate_contraction_damping(velocity)
+        return self.dampingCoefficientConstant * correctionFactor + contractionDampingCoefficient
+
+    def damping_table(self):
+        """ Damping correction table of the TLCD tube, built on first use and shared by every TLCD with the same
+        diameter, liquid viscosity and pipe roughness.
+
+        :return: object - DampingTable of the tube.
+        """
+        key = (self.diameter, self.kineticViscosity, self.pipeRoughness)
+        if key not in dampingTables:
+            dampingTables[key] = DampingTable(*key)
+        return dampingTables[key]
+
+    def interpolate_damping_coefficient(self, velocity):
+        """ Vectorized nonlinear damping coefficient of the TLCD, with the damping correction factor read from the
+        damping table of the tube (see DampingTable for its error).
+
+        :param velocity: np.ndarray - Liquid velocities (m/s), non-negative.
+        :return: np.ndarray - Damping coefficients (N.s/m).
+        """
+        velocity = np.asarray(velocity, dtype=np.float64)
+        correctionFactor = self.damping_table().evaluate(velocity)
+        return self.dampingCoefficientConstant * correctionFactor + self.contracionDampingConstant * velocity
+
     def calculate_contraction_damping_constant(self):
         return 0.5 * self.liquidSpecificMass * self.area * (1 / self.contraction - 1) ** 2
 
     def calculate_contraction_damping(self, velocity):
         return self.contracionDampingConstant * velocity
+
+
+# Damping tables of the TLCD tubes already used, by (diameter, kinetic viscosity, pipe roughness)
+dampingTables = {}
+
+
+class DampingTable(object):
+    def __init__(self, diameter, kineticViscosity, pipeRoughness, maxVelocity=100., points=4096):
+        """ Monotone interpolation table of the TLCD damping correction factor g(v) = f(v)*v, f being the friction
+        factor of TLCD.calculate_friction_factor.
+
+        g is zero up to the velocity where the friction factor formula becomes positive (thresholdVelocity, v0) and
+        increases from there with a logarithmic singularity, so it is tabulated against u = ln(v - v0) on an equally
+        spaced grid from v - v0 = 1e-9*v0 to maxVelocity and interpolated with a shape-preserving (Fritsch-Carlson)
+        cubic. The interpolation error is O(du**3); with the default 4096 points it is about 3e-8 relative to g for
+        usual tubes (0.05 to 1 m). The maximum relative error at the midpoints of the grid, where it is largest, is
+        computed when the table is built and kept in error. Velocities closer than 1e-9*v0 to the threshold, where the
+        table would have to extrapolate the singularity, and velocities above maxVelocity use the exact formula.
+
+        Close to v0 the formula itself is ill-conditioned: b of the friction factor is the difference of two terms of
+        about 1e-4 and vanishes at v0, so it carries a rounding error of about 1e-20 whatever way it is evaluated. Two
+        evaluations of g (the table and TLCD.calculate_damping_correction_factor, or the scalar and vectorized
+        formulas) then differ by up to about 1e-16*v0/(v - v0) relative to g, e.g. 2e-5 at v - v0 = 1e-12*v0. From
+        v - v0 = 1e-7*v0 on the table error dominates.
+
+        :param diameter: float - Diameter of the tlcd tube (m)
+        :param kineticViscosity: float - Tlcd liquid kinetic viscosity (m**2/s)
+        :param pipeRoughness: float - Roughness of the tlcd tube (m)
+        :param maxVelocity: float - Upper limit of the table (m/s)
+        :param points: int - Number of points of the table
+        :return: None
+        """
+        self.diameter = diameter
+        self.kineticViscosity = kineticViscosity
+        self.pipeRoughness = pipeRoughness
+        self.maxVelocity = maxVelocity
+
+        # Bisection of the sign change of the friction factor formula
+        low, high = 1.e-12, maxVelocity
+        if self.formula(high) <= 0:
+            low = high
+        for i in range(200):
+            if high / low < 1 + 1.e-15:
+                break
+            middle = (low * high) ** 0.5
+            if self.formula(middle) > 0:
+                high = middle
+            else:
+                low = middle
+        self.thresholdVelocity = high
+
+        self.u = np.linspace(np.log(1.e-9 * high), np.log(max(maxVelocity - high, 1.e-9 * high)), points)
+        self.du = self.u[1] - self.u[0]
+        self.g = self.exact(high + np.exp(self.u))
+        self.dg = self.pchip_slopes(self.u, self.g)
+        g0, g1 = self.g[:-1], self.g[1:]
+        d0, d1 = self.du * self.dg[:-1], self.du * self.dg[1:]
+        self.coefficients = np.stack([g0, d0, 3 * (g1 - g0) - 2 * d0 - d1, 2 * (g0 - g1) + d0 + d1], axis=-1)
+        self.firstDifference = np.exp(self.u[0])
+        self.lastDifference = np.exp(self.u[-1])
+
+        um = (self.u[:-1] + self.u[1:]) / 2
+        gm = self.exact(high + np.exp(um))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            error = np.absolute(self.interpolate(um) - gm) / gm
+        self.error = float(np.max(error[gm > 0], initial=0.))
+
+    def formula(self, velocity):
+        # b of the friction factor formula, f = (1/(-2*log10(b)))**2 for b > 0
+        Re = velocity * self.diameter / self.kineticViscosity
+        k = self.pipeRoughness
+        D = self.diameter
+        return k / (3.7 * D) - (5.16 / Re) * np.log10((k / 3.7 * D) + (5.09 / (Re ** 0.87)))
+
+    def exact(self, velocity):
+        """ Vectorized exact damping correction factor, as TLCD.calculate_damping_correction_factor.
+
+        :param velocity: np.ndarray - Liquid velocities (m/s), non-negative.
+        :return: np.ndarray - f(v)*v for each velocity.
+        """
+        velocity = np.asarray(velocity, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            b = self.formula(velocity)
+            f = (1 / (-2 * np.log10(np.where(b > 0, b, 0.5)))) ** 2
+        return np.where((velocity != 0) & (b > 0), f * velocity, 0.)
+
+    @staticmethod
+    def pchip_slopes(x, y):
+        """ Slopes of the shape-preserving piecewise cubic Hermite interpolation (Fritsch and Carlson).
+
+        :param x: np.ndarray - Increasing abscissas.
+        :param y: np.ndarray - Ordinates.
+        :return: np.ndarray - Slope at each abscissa.
+        """
+        h = np.diff(x)
+        delta = np.diff(y) / h
+        d = np.zeros_like(y)
+
+        w1 = 2 * h[1:] + h[:-1]
+        w2 = h[1:] + 2 * h[:-1]
+        sameSign = delta[:-1] * delta[1:] > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d[1:-1] = np.where(sameSign, (w1 + w2) / (w1 / delta[:-1] + w2 / delta[1:]), 0.)
+
+        def end_slope(h0, h1, m0, m1):
+            slope = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+            if np.sign(slope) != np.sign(m0):
+                return 0.
+            if np.sign(m0) != np.sign(m1) and abs(slope) > abs(3 * m0):
+                return 3 * m0
+            return slope
+
+        d[0] = end_slope(h[0], h[1], delta[0], delta[1])
+        d[-1] = end_slope(h[-1], h[-2], delta[-1], delta[-2])
+        return d
+
+    def interpolate(self, u):
+        # Cubic of each interval in powers of s = (u - u[i])/du, with u[0] <= u <= u[-1]
+        i = np.minimum(((u - self.u[0]) * (1 / self.du)).astype(np.intp), self.u.size - 2)
+        s = (u - self.u[i]) * (1 / self.du)
+        c = self.coefficients[i]
+        return ((c[..., 3] * s + c[..., 2]) * s + c[..., 1]) * s + c[..., 0]
+
+    def evaluate(self, velocity):
+        """ Vectorized damping correction factor read from the table.
+
+        :param velocity: np.ndarray - Liquid velocities (m/s), non-negative.
+        :return: np.ndarray - f(v)*v for each velocity, same shape as velocity.
+        """
+        velocity = np.asarray(velocity, dtype=np.float64)
+        d = velocity - self.thresholdVelocity
+        g = self.interpolate(np.log(np.minimum(np.maximum(d, self.firstDifference), self.lastDifference)))
+
+        # Below the first point of the grid g is still logarithmic in v - v0, the exact formula is used there
+        near = d < self.firstDifference
+        if near.any():
+            g = np.where(near, self.exact(velocity), g)
+
+        above = velocity > self.maxVelocity
+        if above.any():
+            g = np.where(above, self.exact(velocity), g)
+        return g
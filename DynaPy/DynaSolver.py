@@ -1,27 +1,54 @@
-from copy import copy
-
 from .DpConfigurations import Configurations
+from .DpStory import StoryTable
+from .DpKernels import kernels_available, tlcd_constants, fdm_kernel, newmark_kernel, rk4_kernel, banded_factor, \
+    banded_solve, banded_available
 import numpy as np
-import sympy
+
+# Dormand-Prince 5(4) tableau, error weights (5th minus 4th order) and 4th order dense output coefficients
+DP_C = np.array([0, 1/5, 3/10, 4/5, 8/9, 1])
+DP_A = np.array([[0, 0, 0, 0, 0],
+                 [1/5, 0, 0, 0, 0],
+                 [3/40, 9/40, 0, 0, 0],
+                 [44/45, -56/15, 32/9, 0, 0],
+                 [19372/6561, -25360/2187, 64448/6561, -212/729, 0],
+                 [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656]])
+DP_B = np.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84])
+DP_E = np.array([71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+DP_P = np.array([[1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+                 [0, 0, 0, 0],
+                 [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+                 [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+                 [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+                 [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+                 [0, 40617522/29380423, -110615467/29380423, 69997945/29380423]])
 
 
 class ODESolver(object):
-    def __init__(self, mass, damping, stiffness, force, configurations=Configurations(), tlcd=None):
+    def __init__(self, mass, damping, stiffness, force, configurations=Configurations(), tlcd=None, sinks=None):
         """ ODE solver for dynamics problems.
 
-        :param mass: np.matrix - Mass matrix including structure and damper masses.
-        :param damping: np.matrix - Damping matrix including structure and damper damping coefficients.
-        :param stiffness: np.matrix - Stiffness matrix including structure and damper stiffness coefficients.
-        :param force: np.matrix - Force vector representing force over time in each DOF.
+        :param mass: np.matrix - Mass matrix including structure and damper masses (or BandedMatrix).
+        :param damping: np.matrix - Damping matrix including structure and damper damping coefficients (or
+        BandedMatrix).
+        :param stiffness: np.matrix - Stiffness matrix including structure and damper stiffness coefficients (or
+        BandedMatrix).
+        :param force: np.matrix - Force vector representing force over time in each DOF, or a ForceProvider
+        (e.g. ExcitationForce) read block by block instead of being held whole.
         :param configurations: object - Object containing boundary conditions and other configurations.
 
                 configurations.method: str - Name of the method to be used in the solver. Possible names:
-                    'Finite Differences', 'Average Acceleration', 'Linear Acceleration', 'RK4'
+                    'Finite Differences', 'Average Acceleration', 'Linear Acceleration', 'RK4',
+                    'Adaptive Runge-Kutta', 'Modal Superposition', 'Frequency Domain'
 
                 configurations.timeStep: float - Time step between iterations.
                 configurations.initialDisplacement: float - Initial displacement of the base.
                 configurations.initialVelocity: float - Initial velocity of the base
 
+        :param tlcd: object - Data of the building tlcd.
+        :param sinks: list - ResponseSink objects the response is streamed to in blocks of
+        configurations.outputBlockSize time steps (see DpResponseSinks). The run then only keeps a window of the
+        response in memory, so displacementArray, velocityArray and accelerationArray (and x, v and a) do not hold
+        the whole history. Not available for the 'Frequency Domain Method'.
         :return: None
         """
         self.mass = mass
@@ -30,6 +57,7 @@ class ODESolver(object):
         self.force = force
         self.configurations = configurations
         self.tlcd = tlcd
+        self.sinks = sinks
 
         if configurations.method == 'Finite Differences Method':
             if configurations.nonLinearAnalysis and (self.tlcd is not None):
@@ -51,157 +79,755 @@ class ODESolver(object):
                 self.rk4_solver(nonlinear=True)
             else:
                 self.rk4_solver(nonlinear=False)
+        elif configurations.method == 'Adaptive Runge-Kutta Method':
+            if configurations.nonLinearAnalysis and (self.tlcd is not None):
+                self.dormand_prince_solver(nonlinear=True)
+            else:
+                self.dormand_prince_solver(nonlinear=False)
+        elif configurations.method == 'Modal Superposition Method':
+            if configurations.nonLinearAnalysis and (self.tlcd is not None):
+                raise ValueError('Modal superposition is only available for linear analysis.')
+            else:
+                self.modal_superposition_solver()
+        elif configurations.method == 'Frequency Domain Method':
+            if configurations.nonLinearAnalysis and (self.tlcd is not None):
+                raise ValueError('The frequency domain solver is only available for linear analysis.')
+            elif self.sinks is not None:
+                raise ValueError('The frequency domain solver does not stream its response.')
+            else:
+                self.frequency_domain_solver()
 
     def unpack(self):
-        self.M = self.mass
-        self.C = self.damping
-        self.K = self.stiffness
+        """ Unpacks the system matrices and allocates the response storage.
+
+        The response is stored time-major in contiguous float64 arrays of shape (time steps, DOFs), so each step
+        reads and writes a contiguous row: displacementArray, velocityArray and accelerationArray. The force is read
+        through forceProvider in the same layout (a dense force matrix is wrapped in a MatrixForce). The x, v and a
+        attributes are np.matrix views of these arrays in the (DOFs, time steps) layout used by the rest of the
+        package.
+
+        When the response is streamed to sinks the arrays are ring buffers of outputBlockSize + 4 rows instead, time
+        step i being stored at row(i), and the solvers hand each block over with stream() once it is final.
+
+        :return: None
+        """
+        # Matrices assembled in band storage are expanded, the solvers take the bands again if matrixStructure is
+        # 'Banded'
+        self.M, self.C, self.K = [np.mat(A.todense()) if isinstance(A, BandedMatrix) else A
+                                  for A in (self.mass, self.damping, self.stiffness)]
         self.F = self.force
         self.dt = self.configurations.timeStep
         self.x0 = self.configurations.initialDisplacement
         self.v0 = self.configurations.initialVelocity
 
-        self.x = 0. * self.F
-        self.v = 0. * self.F
-        self.a = 0. * self.F
-        self.t = [i * self.dt for i in range(self.F.shape[1])]
+        if isinstance(self.F, ForceProvider):
+            self.forceProvider = self.F
+        else:
+            self.forceProvider = MatrixForce(self.F)
+        n, nt = self.forceProvider.shape
+        self.t = np.arange(nt) * self.dt
+        if self.sinks is None:
+            self.capacity = nt
+        else:
+            # The rows before and after a block used to finalize it (see fdm_solver) must still be stored
+            self.capacity = min(self.configurations.outputBlockSize + 4, nt)
+        self.streamed = 0
+        self.displacementArray = np.zeros((self.capacity, n))
+        self.velocityArray = np.zeros((self.capacity, n))
+        self.accelerationArray = np.zeros((self.capacity, n))
 
         # TODO make initialDisplacement and initialVelocity vectors that represent both parameters at each DOF
-        self.x[:, 0] = self.x0
-        self.v[:, 0] = self.v0
+        self.displacementArray[0] = self.x0
+        self.velocityArray[0] = self.v0
+
+        M = np.asarray(self.M)
+        C = np.asarray(self.C)
+        K = np.asarray(self.K)
+        F0 = self.forceProvider.block(0, 1)[0]
+        self.accelerationArray[0] = np.linalg.solve(M, F0 - C.dot(self.velocityArray[0]) -
+                                                    K.dot(self.displacementArray[0]))
 
-        self.a0 = self.M.I * (self.F[:, 0] - self.C * self.v[:, 0] - self.K * self.x[:, 0])
-        self.a[:, 0] = self.a0
+    def row(self, i):
+        """ Row of the response arrays where time step i is stored.
+
+        :param i: int - Time step (or np.ndarray of time steps).
+        :return: int - Row (or np.ndarray of rows).
+        """
+        return i % self.capacity
+
+    def stream(self, ready, finalize=None):
+        """ Hands the blocks of time steps before ready, which are final, over to the sinks. Without sinks the run
+        keeps the whole response and it is only finalized once all time steps are ready.
+
+        :param ready: int - Time step up to which (exclusive) the response is final.
+        :param finalize: function - Optional function(start, stop) that completes the response of time steps start
+        to stop - 1 before they are handed over (e.g. velocities and accelerations from the displacements).
+        :return: None
+        """
+        nt = len(self.t)
+        if self.sinks is None:
+            if ready == nt and finalize is not None:
+                finalize(0, nt)
+            return
+
+        size = self.configurations.outputBlockSize
+        while self.streamed < nt and (self.streamed + size <= ready or ready == nt):
+            start = self.streamed
+            stop = min(start + size, nt)
+            if finalize is not None:
+                finalize(start, stop)
+            rows = self.row(np.arange(start, stop))
+            for sink in self.sinks:
+                sink.write(self.t[start:stop], self.displacementArray[rows], self.velocityArray[rows],
+                           self.accelerationArray[rows])
+            self.streamed = stop
+
+        if ready == nt:
+            for sink in self.sinks:
+                sink.close()
+
+    @property
+    def x(self):
+        return np.asmatrix(self.displacementArray.T)
+
+    @property
+    def v(self):
+        return np.asmatrix(self.velocityArray.T)
+
+    @property
+    def a(self):
+        return np.asmatrix(self.accelerationArray.T)
 
     def fdm_solver(self, nonlinear=False):
         self.unpack()
 
+        dt = self.dt
+        M = self.M.A
+        K = self.K.A
+        x = self.displacementArray
+
         if nonlinear:
-            self.damping_update_fdm(0)
+            c = self.damping_update_fdm(0)
+
+            # As in newmark_solver, the TLCD damping is kept out of the reference operators and applied at each
+            # step as a rank-(tlcd.amount) correction of the single factorization of gamma.
+            dofs = self.tlcd_dofs()
+            C = self.C.A.copy()
+            C[dofs, dofs] = 0.
+        else:
+            C = self.C.A
 
-        self.alpha = (self.M / (self.dt ** 2) - self.C / (2 * self.dt))
-        self.beta = (self.K - 2 * self.M / (self.dt ** 2))
-        self.gamma = (self.M / (self.dt ** 2) + self.C / (2 * self.dt))
+        alpha = M / (dt ** 2) - C / (2 * dt)
+        beta = K - 2 * M / (dt ** 2)
+        gamma = M / (dt ** 2) + C / (2 * dt)
 
-        self.xm1 = self.x[:, 0] - self.v[:, 0] * self.dt + (self.a[:, 0] * self.dt ** 2) / 2
-        self.x[:, 1] = self.gamma.I * (self.F[:, 0] - self.beta * self.x[:, 0] - self.alpha * self.xm1)
+        if self.banded():
+            # x[i+1] = gamma^-1*(F[i] - beta*x[i] - alpha*x[i-1]) with the band factorization of gamma
+            gammaI = BandedMatrix.from_dense(gamma).inverse()
+            alpha = BandedMatrix.from_dense(alpha)
+            beta = BandedMatrix.from_dense(beta)
+            F = self.forceProvider.rows()
 
-        for i in list(range(1, len(self.t[1:]))):
+            def predictor(i, xi, xm1):
+                return gammaI.dot(F[i] - beta.dot(xi) - alpha.dot(xm1))
+        else:
+            gammaI = np.linalg.inv(gamma)
+
+            # x[i+1] = gammaI*F[i] - (gammaI*beta)*x[i] - (gammaI*alpha)*x[i-1]
+            gammaIF = self.forceProvider.rows(gammaI)
+            gammaIBeta = gammaI.dot(beta)
+            gammaIAlpha = gammaI.dot(alpha)
+
+            def predictor(i, xi, xm1):
+                return gammaIF[i] - gammaIBeta.dot(xi) - gammaIAlpha.dot(xm1)
+
+        if nonlinear:
+            Z = self.inverse_columns(gammaI, dofs)
+            G = Z[dofs]
+            I = np.identity(len(dofs))
+
+        row = self.row
+
+        def step(i, xm1):
+            xi1 = predictor(i, x[row(i)], xm1)
             if nonlinear:
-                if i >= 2:
-                    self.damping_update_fdm(i)
+                # Sherman-Morrison-Woodbury update of gammaI for gamma + s*P*P.T (alpha changes by -s*P*P.T)
+                s = c / (2 * dt)
+                xi1 += s * Z.dot(xm1[dofs])
+                xi1 -= s * Z.dot(np.linalg.solve(I + s * G, xi1[dofs]))
+            return xi1
+
+        def finalize(start, stop):
+            # Central differences of the displacements, with x[-1] = xm1 and x[nt] = xM1
+            rows = row(np.arange(start, stop))
+            xPrevious = x[row(np.arange(start - 1, stop - 1))]
+            xNext = x[row(np.arange(start + 1, stop + 1))]
+            if start == 0:
+                xPrevious[0] = self.xm1
+            if stop == len(self.t):
+                xNext[-1] = self.xM1
+            self.velocityArray[rows] = (xNext - xPrevious) / (2 * dt)
+            self.accelerationArray[rows] = (xNext - 2 * x[rows] + xPrevious) / (dt ** 2)
+
+        self.xm1 = x[0] - self.velocityArray[0] * dt + (self.accelerationArray[0] * dt ** 2) / 2
+        if kernels_available(self.configurations) and self.sinks is None and not self.banded():
+            Zk, Gk, dofsk, constants = self.kernel_arguments(gammaI, nonlinear)
+            dampingVelocity = self.dampingVelocityArray if nonlinear else np.empty(0)
+            self.xM1, c = fdm_kernel(x, self.xm1, gammaIF.array(), gammaIBeta, gammaIAlpha, Zk, Gk, dofsk, dt,
+                                     c if nonlinear else 0., constants, nonlinear, dampingVelocity)
+            if nonlinear:
+                self.C[dofs, dofs] = c
+        else:
+            x[row(1)] = step(0, self.xm1)
 
-                    self.alpha = (self.M / (self.dt ** 2) - self.C / (2 * self.dt))
-                    self.beta = (self.K - 2 * self.M / (self.dt ** 2))
-                    self.gamma = (self.M / (self.dt ** 2) + self.C / (2 * self.dt))
+            for i in list(range(1, len(self.t[1:]))):
+                if nonlinear:
+                    if i >= 2:
+                        c = self.damping_update_fdm(i)
 
-            self.x[:, i + 1] = self.gamma.I * (self.F[:, i] - self.beta * self.x[:, i] - self.alpha * self.x[:, i - 1])
+                x[row(i + 1)] = step(i, x[row(i - 1)])
+                self.stream(i + 1, finalize)
 
-        i = len(self.t[1:])
-        self.xM1 = self.gamma.I * (self.F[:, i] - self.beta * self.x[:, i] - self.alpha * self.x[:, i - 1])
-        self.xMais1 = np.concatenate((self.x[:, 1:], self.xM1), axis=1)
-        self.xMenos1 = np.concatenate((self.xm1, self.x[:, 0:-1]), axis=1)
+            i = len(self.t[1:])
+            self.xM1 = step(i, x[row(i - 1)])
 
-        self.v = (self.xMais1 - self.xMenos1) / (2 * self.dt)
-        self.a = (self.xMais1 - 2 * self.x + self.xMenos1) / (self.dt ** 2)
+        self.stream(len(self.t), finalize)
 
     def damping_update_fdm(self, i):
         correctionStart = self.C.shape[1] - 1
         correctionStop = correctionStart - self.tlcd.amount
 
+        # The liquid velocities are stored like the response, time step i at row(i) (a ring buffer with sinks)
         if i >= 1:
-            self.dampingVelocityArray[0, i + 1] = (self.x[-1, i-2] - self.x[-1, i]) / (2 * self.dt)
-            velocity = abs(self.dampingVelocityArray[0, i + 1])
+            self.dampingVelocityArray[self.row(i + 1)] = (self.displacementArray[self.row(i - 2), -1] -
+                                                          self.displacementArray[self.row(i), -1]) / (2 * self.dt)
+            velocity = abs(self.dampingVelocityArray[self.row(i + 1)])
         else:
-            self.dampingVelocityArray = copy(self.v[-1, :])
-            velocity = self.dampingVelocityArray[0, 0]
+            self.dampingVelocityArray = np.zeros(self.capacity)
+            self.dampingVelocityArray[0] = self.velocityArray[0, -1]
+            velocity = self.dampingVelocityArray[0]
 
-        correctionFactor = self.tlcd.calculate_damping_correction_factor(velocity)
-        contractionDampingCoefficient = self.tlcd.calculate_contraction_damping(velocity)
+        dampingCoefficient = self.tlcd.calculate_damping_coefficient(velocity)
 
         for j in range(correctionStart, correctionStop, -1):
-            self.C[j, j] = self.tlcd.dampingCoefficientConstant * correctionFactor
-            self.C[j, j] += contractionDampingCoefficient
+            self.C[j, j] = dampingCoefficient
+
+        return dampingCoefficient
 
-    
     def newmark_solver(self, gamma=1/2, beta=1/4, nonlinear=False):
         self.unpack()
-        
-        for i in list(range(0, len(self.t[1:]) - 1)):
+
+        dt = self.dt
+        M = self.M.A
+        K = self.K.A
+        F = self.forceProvider.rows()
+        x = self.displacementArray
+        v = self.velocityArray
+        acc = self.accelerationArray
+
+        if nonlinear:
+            # The TLCD damping is taken out of the reference operators and added back at each step as a
+            # rank-(tlcd.amount) correction, so k_eff is only factorized once per run.
+            dofs = self.tlcd_dofs()
+            self.C[dofs, dofs] = 0.
+        C = self.C.A
+
+        k_eff = K + gamma/(beta*dt) * C + 1/(beta*dt**2) * M
+        a = 1/(beta*dt) * M + gamma/beta * C
+        b = 1/(2*beta) * M + dt * ((gamma/(2*beta)) - 1) * C
+        if self.banded():
+            k_effI = BandedMatrix.from_dense(k_eff).inverse()
+            a = BandedMatrix.from_dense(a)
+            b = BandedMatrix.from_dense(b)
+        else:
+            k_effI = np.linalg.inv(k_eff)
+
+        if nonlinear:
+            Z = self.inverse_columns(k_effI, dofs)
+            G = Z[dofs]
+            I = np.identity(len(dofs))
+
+        if kernels_available(self.configurations) and self.sinks is None and not self.banded():
+            Zk, Gk, dofsk, constants = self.kernel_arguments(k_effI, nonlinear)
+            c = newmark_kernel(x, v, acc, F.array(), k_effI, a, b, Zk, Gk, dofsk, dt, gamma, beta, constants, nonlinear)
+            if nonlinear and len(self.t) > 2:
+                self.C[dofs, dofs] = c
+            return
+
+        nt = len(self.t)
+        for step in list(range(0, len(self.t[1:]) - 1)):
+            i, j = self.row(step), self.row(step + 1)
+            dp_eff = (F[step+1] - F[step]) + a.dot(v[i]) + b.dot(acc[i])
+
             if nonlinear:
-                self.damping_update_nm(i)
-
-            k_eff = self.K + gamma/(beta*self.dt) * self.C + 1/(beta*self.dt**2) * self.M
-            a = 1/(beta*self.dt) * self.M + gamma/beta * self.C
-            b = 1/(2*beta) * self.M + self.dt * ((gamma/(2*beta)) - 1) * self.C
-
-            dp_eff = (self.F[:, i+1] - self.F[:, i]) + (a * self.v[:, i]) + (b * self.a[:, i])
-            dx = k_eff.I * dp_eff
-            dv = gamma/(beta * self.dt)*dx - gamma/beta*self.v[:, i] + self.dt * (1 - (gamma/(2*beta))) * self.a[:, i]
-            da = 1/(beta*self.dt**2)*dx - 1/(beta*self.dt)*self.v[:, i] - 1/(2*beta)*self.a[:, i]
-            
-            self.x[:, i+1] = self.x[:, i] + dx
-            self.v[:, i+1] = self.v[:, i] + dv
-            self.a[:, i+1] = self.a[:, i] + da
-
-    
+                c = self.damping_update_nm(step)
+                dp_eff[dofs] += c * (gamma/beta * v[i, dofs] + dt * ((gamma/(2*beta)) - 1) * acc[i, dofs])
+
+                # Sherman-Morrison-Woodbury: (k_eff + s*P*P.T)^-1 = k_effI - s*Z*(I + s*G)^-1*P.T*k_effI
+                s = gamma/(beta*dt) * c
+                dx = k_effI.dot(dp_eff)
+                dx -= s * Z.dot(np.linalg.solve(I + s * G, dx[dofs]))
+            else:
+                dx = k_effI.dot(dp_eff)
+
+            dv = gamma/(beta * dt)*dx - gamma/beta*v[i] + dt * (1 - (gamma/(2*beta))) * acc[i]
+            da = 1/(beta*dt**2)*dx - 1/(beta*dt)*v[i] - 1/(2*beta)*acc[i]
+
+            x[j] = x[i] + dx
+            v[j] = v[i] + dv
+            acc[j] = acc[i] + da
+            self.stream(step + 2)
+
+        if self.sinks is not None and nt > 1:
+            # The last time step is not integrated (zero response), as in the in-memory run
+            j = self.row(nt - 1)
+            x[j], v[j], acc[j] = 0., 0., 0.
+        self.stream(nt)
+
     def damping_update_nm(self, i):
         correctionStart = self.C.shape[1] - 1
         correctionStop = correctionStart - self.tlcd.amount
 
         if i >= 1:
-            velocity = abs(self.v[-1, i])
+            velocity = abs(self.velocityArray[self.row(i), -1])
         else:
-            velocity = abs(self.v[-1, 0])
+            velocity = abs(self.velocityArray[0, -1])
 
-        correctionFactor = self.tlcd.calculate_damping_correction_factor(velocity)
-        contractionDampingCoefficient = self.tlcd.calculate_contraction_damping(velocity)
+        dampingCoefficient = self.tlcd.calculate_damping_coefficient(velocity)
 
         for j in range(correctionStart, correctionStop, -1):
-            self.C[j, j] = self.tlcd.dampingCoefficientConstant * correctionFactor
-            self.C[j, j] += contractionDampingCoefficient
-            # print(velocity)
-            # print(self.tlcd.dampingCoefficientConstant, correctionFactor, contractionDampingCoefficient)
-            # print(self.C[j, j])
+            self.C[j, j] = dampingCoefficient
+
+        return dampingCoefficient
+
+    def kernel_arguments(self, operator, nonlinear):
+        """ TLCD terms of a step operator in the form taken by the compiled step loops (see DpKernels).
+
+        :param operator: np.ndarray - Inverse step operator (gammaI, k_effI or M^-1).
+        :param nonlinear: bool - True if the TLCD damping is updated at each step.
+        :return: tuple - operator[:, dofs], operator[dofs, dofs], dofs as np.ndarray and the TLCD constants (empty
+        arrays in linear analysis).
+        """
+        n = operator.shape[0]
+        if not nonlinear:
+            return np.empty((n, 0)), np.empty((0, 0)), np.empty(0, dtype=np.int64), np.zeros(5)
+        dofs = np.array(self.tlcd_dofs(), dtype=np.int64)
+        return (np.ascontiguousarray(operator[:, dofs]), np.ascontiguousarray(operator[np.ix_(dofs, dofs)]), dofs,
+                tlcd_constants(self.tlcd))
+
+    def banded(self):
+        """ Tells if the step operators are factorized in band storage (configurations.matrixStructure is 'Banded'
+        and numba is installed, see banded_available) instead of inverted as dense matrices.
+
+        :return: bool - True for band storage.
+        """
+        return self.configurations.matrixStructure == 'Banded' and banded_available()
+
+    def inverse_columns(self, inverse, dofs):
+        """ Columns of the inverse of a step operator, used by the low-rank TLCD damping corrections.
+
+        :param inverse: np.ndarray - Dense inverse, or BandedInverse factorization.
+        :param dofs: list - Column indexes.
+        :return: np.ndarray - Columns of shape (n, len(dofs)).
+        """
+        if isinstance(inverse, BandedInverse):
+            return inverse.columns(dofs)
+        return inverse[:, dofs]
+
+    def tlcd_dofs(self):
+        """ Indexes of the TLCD degrees of freedom, which are always the last tlcd.amount rows of the system.
+
+        :return: list - DOF indexes of the TLCDs.
+        """
+        n = self.M.shape[0]
+        return list(range(n - self.tlcd.amount, n))
 
     def rk4_solver(self, nonlinear=False):
+        """ Classic fourth order Runge-Kutta on the first order state-space form of the equation of motion:
+
+            y = [x, v],   y' = [v, M^-1*F(t) - M^-1*C*v - M^-1*K*x]
+
+        M^-1*K and M^-1*C are computed once per run and M^-1*F block by block as the force is read (with the 'Banded'
+        matrixStructure M is factorized instead and M^-1*(F - C*v - K*x) solved at each stage). The force at t + dt/2
+        is interpolated with a cubic through the neighbouring samples (see interpolate_midpoints), which keeps the
+        fourth order convergence of the method. In nonlinear analysis the TLCD damping is updated at the beginning of
+        each step and held constant over its four stages.
+
+        :param nonlinear: bool - True to update the TLCD damping with the liquid velocity at each step.
+        :return: None
+        """
         self.unpack()
 
-        for i in list(range(0, len(self.t[1:]) - 1)):
+        dt = self.dt
+        X = self.displacementArray
+        V = self.velocityArray
+        A = self.accelerationArray
+        n = X.shape[1]
+
+        if self.banded():
+            MI = BandedMatrix.from_dense(self.M).inverse()
+        else:
+            MI = np.linalg.inv(self.M.A)
+        if nonlinear:
+            dofs = self.tlcd_dofs()
+            self.C[dofs, dofs] = 0.
+            MIP = self.inverse_columns(MI, dofs)
+            c = 0.
+        if self.banded():
+            # M^-1*(F - K*x - C*v) with one band solve per stage
+            K = BandedMatrix.from_dense(self.K)
+            C = BandedMatrix.from_dense(self.C)
+            MIF = self.forceProvider.rows()
+        else:
+            MIK = MI.dot(self.K.A)
+            MIC = MI.dot(self.C.A)
+            MIF = self.forceProvider.rows(MI)
+
+        # Stage buffers, reused over the whole run
+        k = np.empty((4, 2, n))
+        y = np.empty((2, n))
+        tmp = np.empty(n)
+
+        def derivative(y, f, out):
+            out[0] = y[1]
+            if self.banded():
+                out[1] = MI.dot(f - K.dot(y[0]) - C.dot(y[1]))
+                if nonlinear:
+                    out[1] -= c * MIP.dot(y[1, dofs])
+                return
+            np.dot(MIK, y[0], out=out[1])
+            np.dot(MIC, y[1], out=tmp)
+            out[1] += tmp
+            if nonlinear:
+                out[1] += c * MIP.dot(y[1, dofs])
+            np.subtract(f, out[1], out=out[1])
+
+        def stage(i, h, kPrevious):
+            np.multiply(kPrevious, h, out=y)
+            y[0] += X[i]
+            y[1] += V[i]
+
+        if kernels_available(self.configurations) and self.sinks is None and not self.banded():
+            MIPk, Gk, dofsk, constants = self.kernel_arguments(MI, nonlinear)
+            MIFa = MIF.array()
+            c = rk4_kernel(X, V, A, MIFa, interpolate_midpoints(MIFa), MIK, MIC, MIPk, dofsk, dt, constants, nonlinear)
+            if nonlinear:
+                self.C[dofs, dofs] = c
+            return
+
+        for step in range(len(self.t) - 1):
+            i, j = self.row(step), self.row(step + 1)
             if nonlinear:
-                self.damping_update_nm(i)
-
-            # First point
-            t = self.t[i]
-            x = self.x[:, i]
-            y1 = self.v[:, i]
-            y1_ = self.M.I * (self.F[:, i] - self.C * y1 - self.K * x)
-
-            # Second point
-            t = self.t[i] + self.dt/2
-            x = self.x[:, i] + self.dt/2 * y1
-            y2 = self.v[:, i] + self.dt/2 * y1_
-            y2_ = self.M.I * (self.F[:, i] - self.C * y2 - self.K * x)
-
-            # Third point
-            t = self.t[i] + self.dt/2
-            x = self.x[:, i] + self.dt/2 * y2
-            y3 = self.v[:, i] + self.dt/2 * y2_
-            y3_ = self.M.I * (self.F[:, i] - self.C * y3 - self.K * x)
-
-            # Fourth point
-            t = self.t[i] + self.dt
-            x = self.x[:, i] + self.dt * y3
-            y4 = self.v[:, i] + self.dt * y3_
-            y4_ = self.M.I * (self.F[:, i] - self.C * y4 - self.K * x)
+                c = self.damping_update_nm(step)
+
+            y[0] = X[i]
+            y[1] = V[i]
+            derivative(y, MIF[step], k[0])
+            A[i] = k[0, 1]
+
+            MIFm = MIF.midpoint(step)
+            stage(i, dt/2, k[0])
+            derivative(y, MIFm, k[1])
+            stage(i, dt/2, k[1])
+            derivative(y, MIFm, k[2])
+            stage(i, dt, k[2])
+            derivative(y, MIF[step + 1], k[3])
 
             # Update
-            self.x[:, i+1] = self.x[:, i] + self.dt/6 * (y1 + 2*y2 + 2*y3 + y4)
-            self.v[:, i+1] = self.v[:, i] + self.dt/6 * (y1_ + 2*y2_ + 2*y3_ + y4_)
+            X[j] = X[i] + dt/6 * (k[0, 0] + 2*k[1, 0] + 2*k[2, 0] + k[3, 0])
+            V[j] = V[i] + dt/6 * (k[0, 1] + 2*k[1, 1] + 2*k[2, 1] + k[3, 1])
+            self.stream(step + 1)
+
+        step = len(self.t) - 1
+        i = self.row(step)
+        if nonlinear:
+            c = self.damping_update_nm(step)
+        y[0] = X[i]
+        y[1] = V[i]
+        derivative(y, MIF[step], k[0])
+        A[i] = k[0, 1]
+        self.stream(len(self.t))
+
+    def dormand_prince_solver(self, nonlinear=False):
+        """ Adaptive Dormand-Prince 5(4) embedded Runge-Kutta on the state-space form y = [x, v].
+
+        The step size is chosen from the local error estimate with configurations.absoluteTolerance and
+        configurations.relativeTolerance, and the response is written on the usual output grid (spacing
+        configurations.timeStep) with the 4th order dense output of the method. Between samples the force is
+        interpolated with the cubic through the four nearest samples, as the midpoints of rk4_solver, so the response
+        converges with O(dt**4) in the force sample spacing once the tolerances are below that error (linear
+        interpolation of the force would limit it to O(dt**2) whatever the tolerances). While the excitation is
+        active the step never exceeds the force sample spacing, so no force sample is skipped by the stages; in
+        stretches where the force is null (e.g. after exctDuration) the step grows freely up to the next force sample.
+        In nonlinear analysis the TLCD damping is evaluated at every stage from the liquid velocity.
+
+        :param nonlinear: bool - True to evaluate the TLCD damping with the liquid velocity at each stage.
+        :return: None
+        """
+        self.unpack()
 
+        dt = self.dt
+        X = self.displacementArray
+        V = self.velocityArray
+        A = self.accelerationArray
+        nt, n = len(self.t), X.shape[1]
+        tEnd = self.t[-1]
+        atol = self.configurations.absoluteTolerance
+        rtol = self.configurations.relativeTolerance
+
+        MI = np.linalg.inv(self.M.A)
+        if nonlinear:
+            dofs = self.tlcd_dofs()
+            self.C[dofs, dofs] = 0.
+            MIP = MI[:, dofs]
+        MIK = MI.dot(self.K.A)
+        MIC = MI.dot(self.C.A)
+        MIF = self.forceProvider.rows(MI)
+
+        # nextForced[j]: first force sample at or after j that is not null (nt if there is none)
+        forced = self.forceProvider.nonzero_steps()
+        nextForced = np.minimum.accumulate(np.where(forced, np.arange(nt), nt)[::-1])[::-1]
+
+        def force(t):
+            if nt < 4:
+                j = min(int(t / dt), nt - 2)
+                w = t / dt - j
+                return (1 - w) * MIF[j] + w * MIF[j + 1]
+
+            # Cubic through the samples j - 1 to j + 2 around t (shifted at the ends of the run)
+            j = min(max(int(t / dt) - 1, 0), nt - 4)
+            s = t / dt - j
+            return (-(s - 1) * (s - 2) * (s - 3) / 6 * MIF[j] + s * (s - 2) * (s - 3) / 2 * MIF[j + 1] -
+                    s * (s - 1) * (s - 3) / 2 * MIF[j + 2] + s * (s - 1) * (s - 2) / 6 * MIF[j + 3])
+
+        def derivative(t, y):
+            dy = np.empty(2 * n)
+            dy[:n] = y[n:]
+            dy[n:] = force(t) - MIK.dot(y[:n]) - MIC.dot(y[n:])
+            if nonlinear:
+                dy[n:] -= self.tlcd.calculate_damping_coefficient(abs(y[-1])) * MIP.dot(y[n:][dofs])
+            return dy
+
+        def finalize(start, stop):
+            # Accelerations from the equation of motion
+            rows = self.row(np.arange(start, stop))
+            A[rows] = MIF.block(start, stop) - X[rows].dot(MIK.T) - V[rows].dot(MIC.T)
+            if nonlinear:
+                c = np.array([self.tlcd.calculate_damping_coefficient(abs(velocity)) for velocity in V[rows, -1]])
+                A[rows] -= c[:, None] * V[np.ix_(rows, dofs)].dot(MIP.T)
+                self.C[dofs, dofs] = c[-1]
+
+        t = 0.
+        h = dt
+        y = np.concatenate((X[0], V[0]))
+        k = np.empty((7, 2 * n))
+        blockSize = self.configurations.outputBlockSize
+        k[0] = derivative(t, y)
+        j = 1
+        self.acceptedSteps = 0
+        self.rejectedSteps = 0
+
+        while j < nt:
+            i = min(int(t / dt + 1e-9), nt - 1)
+            if forced[i] or forced[min(i + 1, nt - 1)]:
+                hMax = dt
+            elif nextForced[i] < nt:
+                hMax = self.t[nextForced[i]] - t
+            else:
+                hMax = tEnd - t
+            h = min(h, hMax, tEnd - t)
+
+            while True:
+                for s in range(1, 6):
+                    k[s] = derivative(t + DP_C[s] * h, y + h * DP_A[s, :s].dot(k[:s]))
+                yNew = y + h * DP_B.dot(k[:6])
+                k[6] = derivative(t + h, yNew)
+
+                scale = atol + rtol * np.maximum(np.abs(y), np.abs(yNew))
+                errorNorm = np.sqrt(np.mean((h * DP_E.dot(k) / scale) ** 2))
+                if errorNorm <= 1:
+                    break
+
+                self.rejectedSteps += 1
+                h *= max(0.2, 0.9 * errorNorm ** -0.2)
+                if h < 1e-12 * dt:
+                    raise RuntimeError('Adaptive Runge-Kutta step size underflow at t = {} s.'.format(t))
+
+            # Dense output on the samples of the output grid covered by this step
+            jEnd = np.searchsorted(self.t, t + h + 1e-9 * dt, side='right')
+            if jEnd > j:
+                theta = (self.t[j:jEnd] - t) / h
+                Q = k.T.dot(DP_P)
+                Y = y + h * (theta[:, None] ** np.arange(1, 5)).dot(Q.T)
+                jStart = j
+                while j < jEnd:
+                    # When streaming, the samples are written up to the end of the block being filled
+                    jStop = jEnd if self.sinks is None else min(jEnd, self.streamed + blockSize)
+                    rows = self.row(np.arange(j, jStop))
+                    X[rows] = Y[j - jStart:jStop - jStart, :n]
+                    V[rows] = Y[j - jStart:jStop - jStart, n:]
+                    j = jStop
+                    if j < nt:
+                        self.stream(j, finalize)
+
+            t += h
+            y = yNew
+            k[0] = k[6]
+            self.acceptedSteps += 1
+            h *= 10 if errorNorm == 0 else min(10, 0.9 * errorNorm ** -0.2)
+
+        self.stream(nt, finalize)
 
     def modal_superposition_solver(self):
-        pass
+        """ Linear modal superposition.
+
+        The system is projected onto the first mass-normalized undamped modes of (K, M). The number of modes is
+        configurations.numberOfModes or, when it is None, the least number of modes whose effective mass reaches
+        configurations.modalMassParticipation of the story mass. Each mode is treated as an SDOF system with damping
+        ratio taken from the diagonal of phi.T*C*phi (off-diagonal modal damping, which TLCDs and story damping
+        introduce, is neglected) and integrated with the exact recurrence for a force that varies linearly between
+        samples (Chopra, Dynamics of Structures, sec. 5.2). The modal response is kept in modalDisplacementArray,
+        modalVelocityArray and modalAccelerationArray (only its last block when streaming to sinks) and only the DOFs
+        in configurations.responseDofs (all of them when None) are projected back; the other columns of the response
+        arrays are left at zero.
+
+        :return: None
+        """
+        self.unpack()
+
+        dt = self.dt
+        M = self.M.A
+        C = self.C.A
+        K = self.K.A
+        n = M.shape[0]
+
+        omega, phi = generalized_eigen(M, K)
+
+        numberOfModes = self.configurations.numberOfModes
+        if numberOfModes is None:
+            influence = np.ones(n)
+            if self.tlcd is not None:
+                influence[self.tlcd_dofs()] = 0.
+            effectiveMass = phi.T.dot(M.dot(influence)) ** 2
+            participation = np.cumsum(effectiveMass) / influence.dot(M.dot(influence))
+            numberOfModes = int(np.searchsorted(participation, self.configurations.modalMassParticipation - 1e-12)) + 1
+        numberOfModes = min(numberOfModes, n)
+        omega = omega[:numberOfModes]
+        phi = phi[:, :numberOfModes]
+        ksi = np.diag(phi.T.dot(C).dot(phi)) / (2 * omega)
+        if np.any(ksi >= 1):
+            raise ValueError('Modal superposition requires underdamped modes.')
+
+        self.modalFrequencies = omega
+        self.modalShapes = phi
+        self.modalDampingRatios = ksi
+
+        # Recurrence coefficients for unit modal mass (k = omega**2)
+        k = omega ** 2
+        omegaD = omega * np.sqrt(1 - ksi ** 2)
+        e = np.exp(-ksi * omega * dt)
+        sin = np.sin(omegaD * dt)
+        cos = np.cos(omegaD * dt)
+        r = ksi / np.sqrt(1 - ksi ** 2)
+
+        cA = e * (r * sin + cos)
+        cB = e * sin / omegaD
+        cC = (2 * ksi / (omega * dt) + e * (((1 - 2 * ksi ** 2) / (omegaD * dt) - r) * sin -
+                                            (1 + 2 * ksi / (omega * dt)) * cos)) / k
+        cD = (1 - 2 * ksi / (omega * dt) + e * ((2 * ksi ** 2 - 1) / (omegaD * dt) * sin +
+                                                2 * ksi / (omega * dt) * cos)) / k
+        cA_ = -e * omega / np.sqrt(1 - ksi ** 2) * sin
+        cB_ = e * (cos - r * sin)
+        cC_ = (-1 / dt + e * ((omega / np.sqrt(1 - ksi ** 2) + r / dt) * sin + cos / dt)) / k
+        cD_ = (1 - e * (r * sin + cos)) / (k * dt)
+
+        dofs = self.configurations.responseDofs
+        if dofs is None:
+            dofs = list(range(n))
+
+        # The modal force is read and the modal response integrated a block at a time, the whole run at once when
+        # the response is kept in memory and outputBlockSize time steps when it is streamed to sinks
+        nt = len(self.t)
+        size = nt if self.sinks is None else self.configurations.outputBlockSize
+        modalForce = self.forceProvider.rows(phi.T)
+        qStart = phi.T.dot(M.dot(self.displacementArray[0]))
+        qdStart = phi.T.dot(M.dot(self.velocityArray[0]))
+        for start in range(0, nt, size):
+            stop = min(start + size, nt)
+            # The force at stop gives the response at stop, where the next block starts
+            P = modalForce.block(start, min(stop + 1, nt))
+            q = np.empty_like(P)
+            qd = np.empty_like(P)
+            q[0] = qStart
+            qd[0] = qdStart
+
+            for i in range(len(P) - 1):
+                q[i + 1] = cA * q[i] + cB * qd[i] + cC * P[i] + cD * P[i + 1]
+                qd[i + 1] = cA_ * q[i] + cB_ * qd[i] + cC_ * P[i] + cD_ * P[i + 1]
+            qStart, qdStart = q[-1], qd[-1]
+
+            q, qd, P = q[:stop - start], qd[:stop - start], P[:stop - start]
+            qdd = P - 2 * ksi * omega * qd - k * q
+
+            rows = np.ix_(self.row(np.arange(start, stop)), dofs)
+            self.displacementArray[rows] = q.dot(phi[dofs].T)
+            self.velocityArray[rows] = qd.dot(phi[dofs].T)
+            self.accelerationArray[rows] = qdd.dot(phi[dofs].T)
+            self.stream(stop)
+
+        self.modalDisplacementArray = q
+        self.modalVelocityArray = qd
+        self.modalAccelerationArray = qdd
+
+    def frequency_domain_solver(self):
+        """ Linear frequency domain solver.
+
+        The force is transformed with a zero padded FFT of at least twice the analysis length, the displacement
+        spectrum X = (K + s*C + s**2*M)^-1 * F is obtained with batched solves and x and v = s*X are transformed
+        back in a single inverse FFT. An exponential window exp(-sigma*t) (s = sigma + i*omega) damps the
+        wrap-around of lightly damped modes, which the padding alone cannot remove, and is undone after the inverse
+        transform. Initial conditions are added as the exact free vibration of the state-space system and the
+        acceleration is taken from the equation of motion.
+
+        :return: None
+        """
+        self.unpack()
+
+        dt = self.dt
+        M = self.M.A
+        C = self.C.A
+        K = self.K.A
+        X = self.displacementArray
+        V = self.velocityArray
+        nt, n = X.shape
+
+        N = 2 ** int(np.ceil(np.log2(2 * nt)))
+        # Balances the wrap-around, damped by exp(-sigma*N*dt), against the round-off amplification exp(sigma*T)
+        sigma = np.log(1e16) / (3 * nt * dt)
+        window = np.exp(-sigma * self.t)
+
+        # The transform needs the whole force history
+        force = self.forceProvider.block(0, nt)
+        F = np.fft.rfft(force * window[:, None], n=N, axis=0)
+        s = sigma + 2j * np.pi * np.fft.rfftfreq(N, dt)
+        XV = np.empty((s.size, 2 * n), dtype=complex)
+        XV[:, :n] = solve_frequency_response(M, C, K, s, F)
+        XV[:, n:] = s[:, None] * XV[:, :n]
+
+        xv = np.fft.irfft(XV, n=N, axis=0)[:nt] / window[:, None]
+        X[:] = xv[:, :n]
+        V[:] = xv[:, n:]
+
+        y0 = np.concatenate((np.full(n, float(self.x0)), np.full(n, float(self.v0))))
+        if np.any(y0 != 0):
+            MI = np.linalg.inv(M)
+            A = np.block([[np.zeros((n, n)), np.identity(n)], [-MI.dot(K), -MI.dot(C)]])
+            lambdas, psi = np.linalg.eig(A)
+            y = (np.exp(np.outer(self.t, lambdas)) * np.linalg.solve(psi, y0)).dot(psi.T).real
+            X += y[:, :n]
+            V += y[:, n:]
+
+        self.accelerationArray[:] = np.linalg.solve(M, (force - V.dot(C.T) - X.dot(K.T)).T).T
 
     def plot_displacement(self):
         plt.plot(self.t, self.x[0].A1, 'r-')
@@ -237,109 +863,733 @@ class ODESolver(object):
         plt.show()
 
 
-def assemble_mass_matrix(stories, tlcd):
-    """ Function that takes a dictionary of building story objects and a tlcd object to return its mass matrix.
+class SweepSolver(object):
+    methods = ['Finite Differences Method', 'Average Acceleration Method', 'Linear Acceleration Method',
+               'Runge-Kutta Method']
 
-    :param stories: dict - Dictionary of objects containing data of each story of the building.
-    :param tlcd: object - Data of the building tlcd.
-    :return: np.matrix - Mass matrix of the building equipped with tlcd.
+    def __init__(self, mass, damping, stiffness, excitation, frequencies, configurations=Configurations(), tlcd=None,
+                 progress=None):
+        """ Batched ODE solver for 'Sine Wave' frequency sweeps (DMF analysis).
+
+        All sweep frequencies are integrated at once: the state is a (frequencies, DOFs) block, so every step is a
+        matrix-matrix product with operators factorized once and shared by the whole sweep, and the interpreter
+        overhead is paid once per time step instead of once per frequency per time step. In nonlinear analysis
+        each frequency keeps its own TLCD damping, applied with the same low-rank corrections as ODESolver and read
+        for all frequencies at once from the damping table of the TLCD. Results are the same as running ODESolver
+        and OutputData.calc_dmf for each frequency (up to the error of the damping table in nonlinear analysis);
+        only the running peaks are kept, not the time histories.
+
+        :param mass: np.matrix - Mass matrix including structure and damper masses.
+        :param damping: np.matrix - Damping matrix including structure and damper damping coefficients.
+        :param stiffness: np.matrix - Stiffness matrix including structure and damper stiffness coefficients.
+        :param excitation: object - 'Sine Wave' excitation with amplitude, exctDuration and anlyDuration.
+        :param frequencies: np.ndarray - Absolute excitation frequencies of the sweep (rad/s).
+        :param configurations: object - Configurations with a method in SweepSolver.methods.
+        :param tlcd: object - Data of the building tlcd.
+        :param progress: function - Optional callback, called with the fraction of the run done (0 to 1).
+        :return: None
+        """
+        self.mass = mass
+        self.damping = damping
+        self.stiffness = stiffness
+        self.excitation = excitation
+        self.frequencies = np.asarray(frequencies, dtype=np.float64)
+        self.configurations = configurations
+        self.tlcd = tlcd
+        self.progress = progress
+
+        nonlinear = configurations.nonLinearAnalysis and (self.tlcd is not None)
+        if configurations.method == 'Finite Differences Method':
+            self.fdm_solver(nonlinear)
+        elif configurations.method == 'Average Acceleration Method':
+            self.newmark_solver(gamma=1/2, beta=1/4, nonlinear=nonlinear)
+        elif configurations.method == 'Linear Acceleration Method':
+            self.newmark_solver(gamma=1/2, beta=1/6, nonlinear=nonlinear)
+        elif configurations.method == 'Runge-Kutta Method':
+            self.rk4_solver(nonlinear)
+        else:
+            raise ValueError('{} is not available for frequency sweeps.'.format(configurations.method))
+
+        self.calc_dmf()
+
+    def unpack(self):
+        self.M = dense_matrix(self.mass)
+        self.C = dense_matrix(self.damping).copy()
+        self.K = dense_matrix(self.stiffness)
+        self.dt = self.configurations.timeStep
+        self.x0 = self.configurations.initialDisplacement
+        self.v0 = self.configurations.initialVelocity
+
+        # Same time grid and force amplitudes as assemble_force_matrix
+        step = self.dt
+        n = self.M.shape[0]
+        self.t = np.arange(0, self.excitation.anlyDuration + step, step)
+        self.excitationSteps = np.arange(0, self.excitation.exctDuration + step, step).size
+        self.forceAmplitude = self.excitation.amplitude * np.diag(self.M).copy()
+        if self.excitation.tlcd is not None:
+            self.forceAmplitude[n - self.excitation.tlcd.amount:] = 0.
+        if self.tlcd is not None:
+            self.dofs = list(range(n - self.tlcd.amount, n))
+
+        nf = self.frequencies.size
+        self.maxDisplacementArray = np.zeros((nf, n))
+        self.maxSine = np.zeros(nf)
+
+        x = np.full((nf, n), float(self.x0))
+        v = np.full((nf, n), float(self.v0))
+        a = np.linalg.solve(self.M, (-v.dot(self.C.T) - x.dot(self.K.T)).T).T
+        return x, v, a
+
+    def sine(self, i):
+        """ Normalized force of every sweep frequency at time step i (zero after the excitation).
+
+        :param i: int - Time step.
+        :return: np.ndarray - sin(frequency * t[i]) for each frequency.
+        """
+        if i >= self.excitationSteps:
+            return np.zeros(self.frequencies.size)
+        return np.sin(self.frequencies * self.t[i])
+
+    def record(self, i, x, S):
+        np.maximum(self.maxDisplacementArray, np.absolute(x), out=self.maxDisplacementArray)
+        np.maximum(self.maxSine, np.absolute(S), out=self.maxSine)
+        if self.progress is not None and i % max(len(self.t) // 100, 1) == 0:
+            self.progress(i / (len(self.t) - 1))
+
+    def damping_coefficients(self, velocities):
+        return self.tlcd.interpolate_damping_coefficient(velocities)
+
+    def low_rank_solver(self, AI):
+        """ Returns a function that applies (A + s*P*P.T)^-1, P selecting the TLCD DOFs, to the rows of a block
+        already multiplied by AI = A^-1, with one s per row (Sherman-Morrison-Woodbury).
+        """
+        Z = AI[:, self.dofs]
+        G = AI[np.ix_(self.dofs, self.dofs)]
+        I = np.identity(len(self.dofs))
+
+        def solve(y, s):
+            w = np.linalg.solve(I + s[:, None, None] * G, y[:, self.dofs, None])[:, :, 0]
+            y -= s[:, None] * w.dot(Z.T)
+            return y
+
+        return solve
+
+    def fdm_solver(self, nonlinear=False):
+        x, v, a = self.unpack()
+        dt = self.dt
+        M, K = self.M, self.K
+
+        C = self.C
+        if nonlinear:
+            velocity = v[:, -1].copy()
+            c = self.damping_coefficients(velocity)
+            C[self.dofs, self.dofs] = 0.
+
+        alpha = M / (dt ** 2) - C / (2 * dt)
+        beta = K - 2 * M / (dt ** 2)
+        gamma = M / (dt ** 2) + C / (2 * dt)
+        gammaI = np.linalg.inv(gamma)
+        gammaIP = gammaI.dot(self.forceAmplitude)
+        gammaIBetaT = gammaI.dot(beta).T
+        gammaIAlphaT = gammaI.dot(alpha).T
+        if nonlinear:
+            ZT = gammaI[:, self.dofs].T
+            solve = self.low_rank_solver(gammaI)
+
+        def step(i, x, xm1):
+            xi1 = np.outer(self.sine(i), gammaIP) - x.dot(gammaIBetaT) - xm1.dot(gammaIAlphaT)
+            if nonlinear:
+                sc = c / (2 * dt)
+                xi1 += sc[:, None] * xm1[:, self.dofs].dot(ZT)
+                solve(xi1, sc)
+            return xi1
+
+        self.record(0, x, self.sine(0))
+        xm2 = None
+        xm1 = x - v * dt + (a * dt ** 2) / 2
+        x, xm1 = step(0, x, xm1), x
+        for i in range(1, len(self.t) - 1):
+            self.record(i, x, self.sine(i))
+            if nonlinear and i >= 2:
+                velocity = (xm2[:, -1] - x[:, -1]) / (2 * dt)
+                c = self.damping_coefficients(np.absolute(velocity))
+            x, xm1, xm2 = step(i, x, xm1), x, xm1
+        self.record(len(self.t) - 1, x, self.sine(len(self.t) - 1))
+
+    def newmark_solver(self, gamma=1/2, beta=1/4, nonlinear=False):
+        x, v, acc = self.unpack()
+        dt = self.dt
+        M, K = self.M, self.K
+
+        C = self.C
+        if nonlinear:
+            C[self.dofs, self.dofs] = 0.
+
+        k_eff = K + gamma/(beta*dt) * C + 1/(beta*dt**2) * M
+        aT = (1/(beta*dt) * M + gamma/beta * C).T
+        bT = (1/(2*beta) * M + dt * ((gamma/(2*beta)) - 1) * C).T
+        k_effI = np.linalg.inv(k_eff)
+        k_effIP = k_effI.dot(self.forceAmplitude)
+        k_effIT = k_effI.T
+        if nonlinear:
+            solve = self.low_rank_solver(k_effI)
+
+        S = self.sine(0)
+        for i in range(0, len(self.t) - 2):
+            self.record(i, x, S)
+            S1 = self.sine(i + 1)
+
+            dp_eff = v.dot(aT) + acc.dot(bT)
+            if nonlinear:
+                c = self.damping_coefficients(np.absolute(v[:, -1]))
+                dp_eff[:, self.dofs] += c[:, None] * (gamma/beta * v[:, self.dofs] +
+                                                      dt * ((gamma/(2*beta)) - 1) * acc[:, self.dofs])
+            dx = dp_eff.dot(k_effIT) + np.outer(S1 - S, k_effIP)
+            if nonlinear:
+                solve(dx, gamma/(beta*dt) * c)
+
+            dv = gamma/(beta * dt)*dx - gamma/beta*v + dt * (1 - (gamma/(2*beta))) * acc
+            da = 1/(beta*dt**2)*dx - 1/(beta*dt)*v - 1/(2*beta)*acc
+            x = x + dx
+            v = v + dv
+            acc = acc + da
+            S = S1
+        self.record(len(self.t) - 2, x, S)
+        self.record(len(self.t) - 1, 0. * x, self.sine(len(self.t) - 1))
+
+    def rk4_solver(self, nonlinear=False):
+        x, v, a = self.unpack()
+        dt = self.dt
+        nt = len(self.t)
+
+        MI = np.linalg.inv(self.M)
+        if nonlinear:
+            self.C[self.dofs, self.dofs] = 0.
+            MIPT = MI[:, self.dofs].T
+        MIKT = MI.dot(self.K).T
+        MICT = MI.dot(self.C).T
+        MIp = MI.dot(self.forceAmplitude)
+
+        def derivative(x, v, S):
+            acc = np.outer(S, MIp) - x.dot(MIKT) - v.dot(MICT)
+            if nonlinear:
+                acc -= c[:, None] * v[:, self.dofs].dot(MIPT)
+            return v, acc
+
+        def midpoint(i):
+            # Same cubic midpoint interpolation as interpolate_midpoints
+            if nt < 4:
+                return (self.sine(i) + self.sine(i + 1)) / 2
+            if i == 0:
+                return (5 * self.sine(0) + 15 * self.sine(1) - 5 * self.sine(2) + self.sine(3)) / 16
+            if i == nt - 2:
+                return (self.sine(i - 2) - 5 * self.sine(i - 1) + 15 * self.sine(i) + 5 * self.sine(i + 1)) / 16
+            return (-self.sine(i - 1) + 9 * self.sine(i) + 9 * self.sine(i + 1) - self.sine(i + 2)) / 16
+
+        for i in range(nt - 1):
+            S = self.sine(i)
+            self.record(i, x, S)
+            if nonlinear:
+                c = self.damping_coefficients(np.absolute(v[:, -1]))
+
+            Sm = midpoint(i)
+            k1x, k1v = derivative(x, v, S)
+            k2x, k2v = derivative(x + dt/2 * k1x, v + dt/2 * k1v, Sm)
+            k3x, k3v = derivative(x + dt/2 * k2x, v + dt/2 * k2v, Sm)
+            k4x, k4v = derivative(x + dt * k3x, v + dt * k3v, self.sine(i + 1))
+
+            x = x + dt/6 * (k1x + 2*k2x + 2*k3x + k4x)
+            v = v + dt/6 * (k1v + 2*k2v + 2*k3v + k4v)
+        self.record(nt - 1, x, self.sine(nt - 1))
+
+    def calc_dmf(self):
+        """ Peak displacement and DMF of each loaded DOF at each frequency, as in OutputData.calc_dmf.
+
+        :return: None
+        """
+        dofs = np.nonzero(self.forceAmplitude)[0]
+        x_stat = np.absolute(self.forceAmplitude[dofs])[None, :] * self.maxSine[:, None] / np.diag(self.K)[dofs]
+        self.maxDisplacement = self.maxDisplacementArray[:, dofs]
+        self.DMF = self.maxDisplacement / x_stat
+
+
+class ForceProvider(object):
+    blockSize = 4096
+
+    def __init__(self, shape):
+        """ Base class of the forces taken by ODESolver. The force is read in time-major blocks of consecutive time
+        steps, so a run only holds the blocks it is using instead of the whole (DOFs, time steps) force matrix.
+
+        :param shape: tuple - (DOFs, time steps), the shape of the equivalent force matrix.
+        :return: None
+        """
+        self.shape = shape
+
+    def block(self, start, stop):
+        """ Force at time steps start to stop - 1.
+
+        :param start: int - First time step.
+        :param stop: int - Time step after the last one.
+        :return: np.ndarray - Force of shape (stop - start, DOFs).
+        """
+        raise NotImplementedError
+
+    def blocks(self):
+        for start in range(0, self.shape[1], self.blockSize):
+            stop = min(start + self.blockSize, self.shape[1])
+            yield start, stop, self.block(start, stop)
+
+    def matrix(self):
+        """ Dense force matrix, as returned by assemble_force_matrix.
+
+        :return: np.matrix - Force of shape (DOFs, time steps).
+        """
+        return np.mat(self.block(0, self.shape[1]).T)
+
+    def peak(self):
+        """ Maximum absolute force of each DOF over time.
+
+        :return: np.ndarray - Peak force of each DOF.
+        """
+        peak = np.zeros(self.shape[0])
+        for start, stop, F in self.blocks():
+            np.maximum(peak, np.absolute(F).max(axis=0), out=peak)
+        return peak
+
+    def nonzero_steps(self):
+        """ Time steps with any non-null force.
+
+        :return: np.ndarray - Boolean of each time step.
+        """
+        forced = np.zeros(self.shape[1], dtype=bool)
+        for start, stop, F in self.blocks():
+            forced[start:stop] = np.any(F != 0, axis=1)
+        return forced
+
+    def rows(self, operator=None):
+        """ Force rows transformed by operator (operator*F[i] at time step i), computed block by block on access.
+
+        :param operator: np.ndarray - Matrix applied to the force at each time step (None for the force itself).
+        :return: object - ForceRows indexed by time step.
+        """
+        return ForceRows(self, operator)
+
+
+class ExcitationForce(ForceProvider):
+    def __init__(self, excitation, mass, configurations):
+        """ Force of a base excitation, story mass times ground acceleration, computed on demand. Only the force
+        amplitude of each DOF and, for a 'General Excitation', the input record are stored.
+
+        :param excitation: object - Object containing type of excitation and its parameters (measured by
+        acceleration).
+        :param mass: np.matrix - Mass matrix of any system.
+        :param configurations: object - Object containing time step of iterations.
+        :return: None
+        """
+        tlcd = excitation.tlcd
+        step = configurations.timeStep
+        self.excitation = excitation
+        self.t = np.arange(0, excitation.anlyDuration + step, step)
+        super(ExcitationForce, self).__init__((mass.shape[0], self.t.size))
+
+        # Story masses, no force on the TLCDs
+        self.forceAmplitude = matrix_diagonal(mass)
+        if tlcd is not None:
+            self.forceAmplitude[mass.shape[0] - tlcd.amount:] = 0.
+
+        if excitation.type == 'Sine Wave':
+            self.forceAmplitude *= excitation.amplitude
+            self.excitationSteps = np.arange(0, excitation.exctDuration + step, step).size
+        elif excitation.type == 'General Excitation':
+            self.t_input = np.asarray(excitation.t_input, dtype=np.float64)
+            self.a_input = np.asarray(excitation.a_input, dtype=np.float64)
+            self.interpolation = configurations.excitationInterpolation
+        else:
+            raise ValueError('{} is not an available excitation type.'.format(excitation.type))
+
+    def history(self, start, stop):
+        """ Time function of the force at time steps start to stop - 1 (the force is forceAmplitude times it).
+
+        :param start: int - First time step.
+        :param stop: int - Time step after the last one.
+        :return: np.ndarray - sin(frequency*t) for a 'Sine Wave' or the ground acceleration of a 'General
+        Excitation'.
+        """
+        if self.excitation.type == 'Sine Wave':
+            g = np.sin(self.excitation.frequency * self.t[start:stop])
+            g[max(self.excitationSteps - start, 0):] = 0.
+            return g
+        return resample_excitation(self.t_input, self.a_input, self.t[start:stop], self.interpolation)
+
+    def block(self, start, stop):
+        return np.outer(self.history(start, stop), self.forceAmplitude)
+
+    def peak(self):
+        peak = 0.
+        for start in range(0, self.shape[1], self.blockSize):
+            peak = max(peak, np.absolute(self.history(start, start + self.blockSize)).max(initial=0.))
+        return np.absolute(self.forceAmplitude) * peak
+
+
+class MatrixForce(ForceProvider):
+    def __init__(self, force):
+        """ Force provider of a dense force matrix.
+
+        :param force: np.matrix - Force vector representing force over time in each DOF, (DOFs, time steps).
+        :return: None
+        """
+        self.force = force
+        self.forceArray = np.ascontiguousarray(np.asarray(force, dtype=np.float64).T)
+        super(MatrixForce, self).__init__(np.shape(force))
+
+    def block(self, start, stop):
+        return self.forceArray[start:stop]
+
+    def matrix(self):
+        return self.force
+
+
+class ForceRows(object):
+    def __init__(self, provider, operator=None):
+        """ Rows operator*F[i] of a force provider, indexed by time step. They are computed a block at a time and
+        the two blocks last used are kept, so sequential access (also F[i] and F[i + 1] across a block boundary)
+        computes each block once.
+
+        :param provider: object - ForceProvider of the run.
+        :param operator: np.ndarray - Matrix applied to the force at each time step (None for the force itself).
+        :return: None
+        """
+        self.provider = provider
+        self.operatorT = None if operator is None else np.asarray(operator, dtype=np.float64).T
+        self.size = provider.blockSize
+        self.cache = {}
+        self.midpointCache = {}
+
+    def __len__(self):
+        return self.provider.shape[1]
+
+    def transform(self, F):
+        return F if self.operatorT is None else F.dot(self.operatorT)
+
+    def cached(self, cache, b, compute):
+        if b not in cache:
+            if len(cache) == 2:
+                del cache[next(iter(cache))]
+            cache[b] = compute(b * self.size)
+        return cache[b]
+
+    def __getitem__(self, i):
+        def compute(start):
+            return self.transform(self.provider.block(start, min(start + self.size, len(self))))
+        return self.cached(self.cache, i // self.size, compute)[i % self.size]
+
+    def midpoint(self, i):
+        """ Row at the middle of time steps i and i + 1, the same as interpolate_midpoints of all rows.
+
+        :param i: int - Time step.
+        :return: np.ndarray - Interpolated row.
+        """
+        def compute(start):
+            # The rows around the block give the interior formula at its ends
+            stop = min(start + self.size, len(self) - 1)
+            high = min(max(stop + 2, 4), len(self))
+            low = max(min(start - 1, high - 4), 0)
+            midpoints = interpolate_midpoints(self.transform(self.provider.block(low, high)))
+            return midpoints[start - low:stop - low]
+        return self.cached(self.midpointCache, i // self.size, compute)[i % self.size]
+
+    def block(self, start, stop):
+        """ Rows of time steps start to stop - 1.
+
+        :param start: int - First time step.
+        :param stop: int - Time step after the last one.
+        :return: np.ndarray - Rows of shape (stop - start, ...).
+        """
+        return self.transform(self.provider.block(start, stop))
+
+    def array(self):
+        """ All rows, assembled block by block.
+
+        :return: np.ndarray - Rows of shape (time steps, ...).
+        """
+        return np.concatenate([self.transform(F) for start, stop, F in self.provider.blocks()])
+
+
+def interpolate_midpoints(samples):
+    """ Function that interpolates equally spaced samples at the midpoint of every interval with a cubic through the
+    four nearest samples. The error is O(dt**4), against O(dt**2) of the mean of the two interval ends.
+
+    :param samples: np.ndarray - Time-major array of samples, shape (time steps, ...).
+    :return: np.ndarray - Values at the interval midpoints, shape (time steps - 1, ...).
     """
-    if tlcd is None:
-        n = len(stories)
+    f = np.asarray(samples, dtype=np.float64)
+    if f.shape[0] < 4:
+        return (f[:-1] + f[1:]) / 2
+
+    fm = np.empty((f.shape[0] - 1,) + f.shape[1:])
+    fm[1:-1] = (-f[:-3] + 9 * f[1:-2] + 9 * f[2:-1] - f[3:]) / 16
+    fm[0] = (5 * f[0] + 15 * f[1] - 5 * f[2] + f[3]) / 16
+    fm[-1] = (f[-4] - 5 * f[-3] + 15 * f[-2] + 5 * f[-1]) / 16
+    return fm
+
+
+class BandedMatrix(object):
+    def __init__(self, bands, lower, upper):
+        """ Square band matrix in LAPACK band storage: A[i, j] is bands[upper + i - j, j]. The shear building
+        matrices are tridiagonal and the TLCD DOFs, which follow the last story, only couple with it, so the
+        operators of the step loops have lower = upper = max(1, tlcd.amount) and products and solves with them cost
+        O(n) instead of the O(n**2) of a dense inverse.
+
+        :param bands: np.ndarray - Bands of shape (lower + upper + 1, n).
+        :param lower: int - Number of subdiagonals.
+        :param upper: int - Number of superdiagonals.
+        :return: None
+        """
+        self.bands = np.asarray(bands, dtype=np.float64)
+        self.lower = lower
+        self.upper = upper
+        self.shape = (self.bands.shape[1], self.bands.shape[1])
 
-        M = np.mat(np.zeros((n, n)))
+    @classmethod
+    def from_dense(cls, matrix):
+        """ Band matrix with the nonzero diagonals of a dense matrix.
 
-        for i in range(n):
-            M[i, i] = stories[i + 1].mass
-    else:
-        lastStory = len(stories) - 1
-        n = len(stories) + tlcd.amount
+        :param matrix: np.ndarray - Square matrix (np.matrix is accepted).
+        :return: BandedMatrix - Band storage of matrix.
+        """
+        A = np.asarray(matrix, dtype=np.float64)
+        n = A.shape[0]
+        i, j = np.nonzero(A)
+        lower = int(max((i - j).max(initial=0), 0))
+        upper = int(max((j - i).max(initial=0), 0))
+        bands = np.zeros((lower + upper + 1, n))
+        bands[upper + i - j, j] = A[i, j]
+        return cls(bands, lower, upper)
+
+    def __getitem__(self, index):
+        """ Element A[i, j] of the matrix (zero outside the bands).
+
+        :param index: tuple - Row and column (i, j).
+        :return: float - Element.
+        """
+        i, j = index
+        d = i - j
+        if -self.upper <= d <= self.lower:
+            return self.bands[self.upper + d, j]
+        return 0.
 
-        M = np.mat(np.zeros((n, n)))
+    def copy(self):
+        return BandedMatrix(self.bands.copy(), self.lower, self.upper)
 
-        for i in range(lastStory + 1):
-            M[i, i] = stories[i + 1].mass
+    def diagonal(self):
+        """ Main diagonal of the matrix.
 
-        M[lastStory, lastStory] += tlcd.mass * tlcd.amount
-        for i in range(lastStory + 1, n):
-            M[i, i] = tlcd.mass
-            M[i, lastStory] = (tlcd.width / tlcd.length) * tlcd.mass
-            M[lastStory, i] = (tlcd.width / tlcd.length) * tlcd.mass
+        :return: np.ndarray - Diagonal of shape (n,).
+        """
+        return self.bands[self.upper].copy()
 
-        # M[n - 1, n - 1] += tlcd.mass
-        # M[n, n] = tlcd.mass
-        # M[n, n - 1] = (tlcd.width / tlcd.length) * tlcd.mass
-        # M[n - 1, n] = (tlcd.width / tlcd.length) * tlcd.mass
+    def todense(self):
+        """ Dense copy of the matrix.
 
-    return M
+        :return: np.ndarray - Matrix of shape (n, n).
+        """
+        n = self.shape[0]
+        A = np.zeros(self.shape)
+        for k in range(self.lower + self.upper + 1):
+            d = k - self.upper
+            j = np.arange(max(0, -d), min(n, n - d))
+            A[j + d, j] = self.bands[k, j]
+        return A
+
+    def dot(self, x):
+        """ Product with a vector or with the columns of a matrix, O(n) per column.
+
+        :param x: np.ndarray - Vector of shape (n,) or matrix of shape (n, m).
+        :return: np.ndarray - Product, same shape as x.
+        """
+        n = self.shape[0]
+        y = np.zeros(x.shape)
+        for k in range(self.lower + self.upper + 1):
+            d = k - self.upper
+            band = self.bands[k] if x.ndim == 1 else self.bands[k][:, None]
+            if d >= 0:
+                y[d:] += band[:n - d] * x[:n - d]
+            else:
+                y[:n + d] += band[-d:] * x[-d:]
+        return y
 
+    def inverse(self):
+        """ Inverse of the matrix as its LU factorization, without pivoting, which is stable for the symmetric
+        positive definite operators of the step loops and keeps the factors within the bands.
 
-def assemble_damping_matrix(stories, tlcd):
-    """ Function that takes a dictionary of building story objects and a tlcd object to return its damping matrix.
+        :return: BandedInverse - Object whose dot method solves A*y = b.
+        """
+        return BandedInverse(self)
 
-    :param stories: dict - Dictionary of objects containing data of each story of the building.
-    :param tlcd: object - Data of the building tlcd.
-    :return: np.matrix - Damping matrix of the building equiped with tlcd.
+
+class BandedInverse(object):
+    def __init__(self, matrix):
+        """ LU factorization of a BandedMatrix, used in place of the dense inverse of a step operator: dot(b) solves
+        A*y = b in O(n*(lower + upper)), compiled when numba is installed (see DpKernels). Without numba the solve
+        runs as interpreted loops and is slower than the dense product it replaces, so ODESolver does not use it.
+
+        :param matrix: BandedMatrix - Matrix to be factorized.
+        :return: None
+        """
+        self.lower = matrix.lower
+        self.upper = matrix.upper
+        self.shape = matrix.shape
+        self.factors = matrix.bands.copy()
+        banded_factor(self.factors, self.lower, self.upper)
+        if not np.all(self.factors[self.upper]):
+            raise np.linalg.LinAlgError('Singular matrix')
+
+    def dot(self, b):
+        """ Solution of A*y = b.
+
+        :param b: np.ndarray - Vector of shape (n,) or matrix of shape (n, m).
+        :return: np.ndarray - Solution, same shape as b.
+        """
+        b = np.asarray(b, dtype=np.float64)
+        y = np.empty(b.shape)
+        if b.ndim == 1:
+            banded_solve(self.factors, self.lower, self.upper, b, y)
+        else:
+            for j in range(b.shape[1]):
+                banded_solve(self.factors, self.lower, self.upper, np.ascontiguousarray(b[:, j]), y[:, j])
+        return y
+
+    def columns(self, dofs):
+        """ Columns of the inverse, the same as inverse[:, dofs] of a dense inverse.
+
+        :param dofs: list - Column indexes.
+        :return: np.ndarray - Columns of shape (n, len(dofs)).
+        """
+        E = np.zeros((self.shape[0], len(dofs)))
+        E[dofs, np.arange(len(dofs))] = 1.
+        return self.dot(E)
+
+
+def dense_matrix(matrix):
+    """ Function that takes a system matrix as a dense float64 np.ndarray.
+
+    :param matrix: np.matrix - Matrix, or BandedMatrix.
+    :return: np.ndarray - Dense matrix.
     """
-    if tlcd is None:
-        n = len(stories)
+    if isinstance(matrix, BandedMatrix):
+        return matrix.todense()
+    return np.asarray(matrix, dtype=np.float64)
 
-        C = np.mat(np.zeros((n, n)))
 
-        for i in range(n):
-            C[i, i] = stories[i + 1].dampingCoefficient
-    else:
-        lastStory = len(stories) - 1
-        n = len(stories) + tlcd.amount
+def matrix_diagonal(matrix):
+    """ Function that takes the main diagonal of a system matrix.
 
-        C = np.mat(np.zeros((n, n)))
+    :param matrix: np.matrix - Matrix, or BandedMatrix.
+    :return: np.ndarray - Diagonal of shape (n,), a copy.
+    """
+    if isinstance(matrix, BandedMatrix):
+        return matrix.diagonal()
+    return np.diag(np.asarray(matrix, dtype=np.float64)).copy()
 
-        for i in range(lastStory + 1):
-            C[i, i] = stories[i + 1].dampingCoefficient
 
-        for i in range(lastStory + 1, n):
-            C[i, i] = tlcd.dampingCoefficient
+def story_column(stories, attribute):
+    """ Function that takes one parameter of every story of a building as an array.
 
-    return C
+    :param stories: dict - Dictionary of objects containing data of each story of the building, or a StoryTable.
+    :param attribute: str - Name of the parameter (e.g. 'mass', 'stiffness' or 'dampingCoefficient').
+    :return: np.ndarray - Parameter of each story, first story first.
+    """
+    if isinstance(stories, StoryTable):
+        return getattr(stories, attribute)
+    return np.array([getattr(stories[i + 1], attribute, np.nan) for i in range(len(stories))], dtype=np.float64)
 
 
-def assemble_stiffness_matrix(stories, tlcd):
-    """ Function that takes a dictionary of building story objects and a tlcd object to return its stiffness matrix.
+def assemble_symmetric_matrix(diagonal, offDiagonal, coupling, banded):
+    """ Function that assembles the symmetric matrices of a shear building equipped with tlcd: a tridiagonal story
+    block, followed by the tlcd DOFs, which are only coupled to the last story.
+
+    :param diagonal: np.ndarray - Diagonal, stories first.
+    :param offDiagonal: np.ndarray - Coupling of each story with the next one (one less than the number of stories).
+    :param coupling: np.ndarray - Coupling of the last story with each tlcd DOF.
+    :param banded: bool - True to return a BandedMatrix instead of a np.matrix.
+    :return: np.matrix - Assembled matrix (or BandedMatrix).
+    """
+    n = diagonal.size
+    lastStory = n - coupling.size - 1
+    stories = np.arange(lastStory)
+    dofs = np.arange(lastStory + 1, n)
+
+    if banded:
+        p = max(1, coupling.size)
+        bands = np.zeros((2 * p + 1, n))
+        bands[p] = diagonal
+        bands[p + 1, stories] = offDiagonal
+        bands[p - 1, stories + 1] = offDiagonal
+        bands[p + dofs - lastStory, lastStory] = coupling
+        bands[p - dofs + lastStory, dofs] = coupling
+        return BandedMatrix(bands, p, p)
+
+    A = np.zeros((n, n))
+    A[np.arange(n), np.arange(n)] = diagonal
+    A[stories + 1, stories] = offDiagonal
+    A[stories, stories + 1] = offDiagonal
+    A[dofs, lastStory] = coupling
+    A[lastStory, dofs] = coupling
+    return np.mat(A)
+
+
+def assemble_mass_matrix(stories, tlcd, banded=False):
+    """ Function that takes a dictionary of building story objects and a tlcd object to return its mass matrix.
 
-    :param stories: dict - Dictionary of objects containing data of each story of the building.
+    :param stories: dict - Dictionary of objects containing data of each story of the building (or a StoryTable).
     :param tlcd: object - Data of the building tlcd.
-    :return: np.matrix - Stiffness matrix of the building equiped with tlcd.
+    :param banded: bool - True to return a BandedMatrix.
+    :return: np.matrix - Mass matrix of the building equipped with tlcd.
     """
+    mass = story_column(stories, 'mass')
     if tlcd is None:
-        n = len(stories)
+        return assemble_symmetric_matrix(mass.copy(), np.zeros(mass.size - 1), np.zeros(0), banded)
 
-        K = np.mat(np.zeros((n, n)))
+    diagonal = np.concatenate((mass, np.full(tlcd.amount, float(tlcd.mass))))
+    diagonal[mass.size - 1] += tlcd.mass * tlcd.amount
+    coupling = np.full(tlcd.amount, (tlcd.width / tlcd.length) * tlcd.mass)
+    return assemble_symmetric_matrix(diagonal, np.zeros(mass.size - 1), coupling, banded)
 
-        for i in range(n):
-            K[i, i] = stories[i + 1].stiffness
 
-        for i in range(n, 1, -1):
-            K[i - 1, i - 2] = -stories[i].stiffness
-            K[i - 2, i - 1] = -stories[i].stiffness
-            K[i - 2, i - 2] += stories[i].stiffness
-    else:
-        lastStory = len(stories) - 1
-        n = len(stories) + tlcd.amount
+def assemble_damping_matrix(stories, tlcd, banded=False):
+    """ Function that takes a dictionary of building story objects and a tlcd object to return its damping matrix.
+
+    :param stories: dict - Dictionary of objects containing data of each story of the building (or a StoryTable).
+    :param tlcd: object - Data of the building tlcd.
+    :param banded: bool - True to return a BandedMatrix.
+    :return: np.matrix - Damping matrix of the building equiped with tlcd.
+    """
+    damping = story_column(stories, 'dampingCoefficient')
+    if np.isnan(damping).any():
+        raise ValueError('Story damping coefficients are not calculated (see calc_damping_coefficient).')
+    if tlcd is None:
+        return assemble_symmetric_matrix(damping.copy(), np.zeros(damping.size - 1), np.zeros(0), banded)
 
-        K = np.mat(np.zeros((n, n)))
+    diagonal = np.concatenate((damping, np.full(tlcd.amount, float(tlcd.dampingCoefficient))))
+    return assemble_symmetric_matrix(diagonal, np.zeros(damping.size - 1), np.zeros(tlcd.amount), banded)
 
-        for i in range(lastStory + 1):
-            K[i, i] = stories[i + 1].stiffness
 
-        for i in range(lastStory + 1, 1, -1):
-            K[i - 1, i - 2] = -stories[i].stiffness
-            K[i - 2, i - 1] = -stories[i].stiffness
-            K[i - 2, i - 2] += stories[i].stiffness
+def assemble_stiffness_matrix(stories, tlcd, banded=False):
+    """ Function that takes a dictionary of building story objects and a tlcd object to return its stiffness matrix.
 
-        for i in range(lastStory + 1, n):
-            K[i, i] = tlcd.stiffness
+    :param stories: dict - Dictionary of objects containing data of each story of the building (or a StoryTable).
+    :param tlcd: object - Data of the building tlcd.
+    :param banded: bool - True to return a BandedMatrix.
+    :return: np.matrix - Stiffness matrix of the building equiped with tlcd.
+    """
+    k = story_column(stories, 'stiffness')
+    diagonal = k.copy()
+    diagonal[:-1] += k[1:]
+    if tlcd is None:
+        return assemble_symmetric_matrix(diagonal, -k[1:], np.zeros(0), banded)
 
-    return K
+    diagonal = np.concatenate((diagonal, np.full(tlcd.amount, float(tlcd.stiffness))))
+    return assemble_symmetric_matrix(diagonal, -k[1:], np.zeros(tlcd.amount), banded)
 
 
 def assemble_force_matrix(excitation, mass, configurations):
@@ -351,114 +1601,127 @@ def assemble_force_matrix(excitation, mass, configurations):
     :param configurations: object - Object containing time step of iterations.
     :return: np.matrix - Force vector evaluated over time.
     """
-    tlcd = excitation.tlcd
-    step = configurations.timeStep
-    totalTimeArray = np.mat(np.arange(0, excitation.anlyDuration + step, step))
-    excitationTimeArray = np.mat(np.arange(0, excitation.exctDuration + step, step))
-    force = 0. * totalTimeArray
-    if tlcd is None:
-        numberOfStories = mass.shape[0]
-    else:
-        numberOfStories = mass.shape[0] - tlcd.amount
+    return ExcitationForce(excitation, mass, configurations).matrix()
 
-    for i in range(numberOfStories - 1):
-        force = np.concatenate((force, 0. * totalTimeArray), 0)
 
-    if excitation.type == 'Sine Wave':
-        for i in range(force.shape[0]):
-            storyMass = mass[i, i]
-            forceAmplitude = storyMass * excitation.amplitude
-            for j in range(excitationTimeArray.shape[1]):
-                force[i, j] = forceAmplitude * np.sin(excitation.frequency * totalTimeArray[0, j])
+def resample_excitation(t_input, a_input, t, interpolation='Linear'):
+    """ Function that resamples an acceleration record at the analysis times with searchsorted, in O(N*log(M)) for
+    N analysis times and M record samples.
 
-        if tlcd is None:
-            return force
-        else:
-            for i in range(tlcd.amount):
-                force = np.concatenate((force, 0. * force[0, :]), 0)
-            return force
-    elif excitation.type == 'General Excitation':
-        a = []
-        t0 = 0
-        time = [round(t / step, 0) * step for t in list(totalTimeArray.A1)]
-        for t in time:
-            if t in excitation.t_input:
-                t0 = t
-                t0_index = excitation.t_input.index(t)
-                a.append(excitation.a_input[t0_index])
-            else:
-                t1 = excitation.t_input[t0_index + 1]
-                a0 = excitation.a_input[t0_index]
-                a1 = excitation.a_input[t0_index + 1]
-                at = ((a1 - a0) / (t1 - t0)) * (t - t0) + a0
-                a.append(at)
-
-        # print(list(zip(list(totalTimeArray.A1), a)))
-        a = np.array(a)
-        for i in range(force.shape[0]):
-            storyMass = mass[i, i]
-            force[i, :] = storyMass * a
-
-        if tlcd is None:
-            return force
+    The record may be sampled at non-uniform times, which must be increasing. Analysis times within 1e-9 of the
+    record duration of a sample are taken as that sample. The acceleration is zero before the first and after the
+    last sample of the record, so an analysis longer than the record continues as free vibration.
+
+    :param t_input: list - Time of the record samples (s).
+    :param a_input: list - Acceleration of the record samples (m/s**2).
+    :param t: np.ndarray - Analysis times (s).
+    :param interpolation: str - 'Linear', 'Zero-Order Hold' (each sample held until the next one) or 'Cubic' (C1
+    cubic Hermite with the slopes of the parabola through each sample and its neighbours).
+    :return: np.ndarray - Acceleration at the analysis times.
+    """
+    tr = np.asarray(t_input, dtype=np.float64)
+    ar = np.asarray(a_input, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    if tr.size == 1:
+        return np.where(np.isclose(t, tr[0]), ar[0], 0.)
+
+    tolerance = 1.e-9 * (tr[-1] - tr[0])
+    inside = (t >= tr[0] - tolerance) & (t <= tr[-1] + tolerance)
+    i = np.clip(np.searchsorted(tr, t + tolerance, side='right') - 1, 0, tr.size - 2)
+    h = tr[i + 1] - tr[i]
+    s = np.clip((t - tr[i]) / h, 0., 1.)
+
+    if interpolation == 'Linear':
+        a = ar[i] + s * (ar[i + 1] - ar[i])
+    elif interpolation == 'Zero-Order Hold':
+        a = np.where(t + tolerance >= tr[i + 1], ar[i + 1], ar[i])
+    elif interpolation == 'Cubic':
+        hr = np.diff(tr)
+        delta = np.diff(ar) / hr
+        d = np.empty(tr.size)
+        if tr.size == 2:
+            d[:] = delta[0]
         else:
-            for i in range(tlcd.amount):
-                force = np.concatenate((force, 0. * force[0, :]), 0)
-            return force
+            d[1:-1] = (hr[1:] * delta[:-1] + hr[:-1] * delta[1:]) / (hr[:-1] + hr[1:])
+            d[0] = ((2 * hr[0] + hr[1]) * delta[0] - hr[0] * delta[1]) / (hr[0] + hr[1])
+            d[-1] = ((2 * hr[-1] + hr[-2]) * delta[-1] - hr[-1] * delta[-2]) / (hr[-1] + hr[-2])
+        a = (ar[i] * (1 + 2 * s) * (1 - s) ** 2 + h * d[i] * s * (1 - s) ** 2 +
+             ar[i + 1] * s ** 2 * (3 - 2 * s) + h * d[i + 1] * s ** 2 * (s - 1))
+    else:
+        raise ValueError('{} is not an available excitation interpolation.'.format(interpolation))
 
+    return np.where(inside, a, 0.)
 
-def get_natural_frequencies_by_modal(mass, stiffness):
-    return assemble_modes_matrix(mass, stiffness, only_frequencies=True)
 
+def generalized_eigen(mass, stiffness):
+    """ Function that solves the symmetric generalized eigenproblem K*phi = omega**2*M*phi through the Cholesky
+    factor of the mass matrix.
 
-def assemble_modes_matrix(mass, stiffness, return_frequencies=False, only_frequencies=False):
-    M = mass
-    K = stiffness
-    n = len(M[0, :].A1)
+    :param mass: np.matrix - Symmetric positive definite mass matrix.
+    :param stiffness: np.matrix - Symmetric stiffness matrix.
+    :return: tuple - Natural frequencies in ascending order (rad/s) as np.ndarray and the matching mass-normalized
+    modes as columns of a np.ndarray.
+    """
+    L = np.linalg.cholesky(np.asarray(mass, dtype=np.float64))
+    LI = np.linalg.inv(L)
+    A = LI.dot(np.asarray(stiffness, dtype=np.float64)).dot(LI.T)
+    w, y = np.linalg.eigh((A + A.T) / 2)
+    omega = np.sqrt(np.clip(w, 0, None))
+    phi = LI.T.dot(y)
+    return omega, phi
+
+
+def solve_frequency_response(mass, damping, stiffness, s, force, chunk=1024):
+    """ Function that solves (K + s*C + s**2*M)*X = F for many complex frequencies s with batched solves.
 
-    x = sympy.Symbol('x')
+    :param mass: np.matrix - Mass matrix of any system.
+    :param damping: np.matrix - Damping matrix of any system.
+    :param stiffness: np.matrix - Stiffness matrix of any system.
+    :param s: np.ndarray - Complex frequencies (i*omega for the harmonic response).
+    :param force: np.ndarray - Force vector, shape (DOFs,), or one force vector per frequency, shape (len(s), DOFs).
+    :param chunk: int - Number of frequencies solved per batch, which bounds the memory used.
+    :return: np.ndarray - Complex response X, shape (len(s), DOFs).
+    """
+    M = np.asarray(mass, dtype=np.float64)
+    C = np.asarray(damping, dtype=np.float64)
+    K = np.asarray(stiffness, dtype=np.float64)
+    s = np.asarray(s, dtype=complex)
+    F = np.broadcast_to(np.asarray(force), (s.size, M.shape[0]))
+
+    X = np.empty((s.size, M.shape[0]), dtype=complex)
+    for i in range(0, s.size, chunk):
+        sc = s[i:i + chunk, None, None]
+        X[i:i + chunk] = np.linalg.solve(sc ** 2 * M + sc * C + K, F[i:i + chunk, :, None])[:, :, 0]
+    return X
 
-    D = []
-    for i in range(M.shape[0]):
-        linha = []
-        for j in range(M.shape[1]):
-            linha.append(K[i, j] - M[i, j] * x ** 2)
 
-        D.append(linha)
+def get_natural_frequencies_by_modal(mass, stiffness):
+    """ Function that takes the mass and stiffness matrices of a system and returns its natural frequencies.
+
+    :param mass: np.matrix - Mass matrix of any system.
+    :param stiffness: np.matrix - Stiffness matrix of any system.
+    :return: list - Natural frequencies in ascending order (rad/s).
+    """
+    return assemble_modes_matrix(mass, stiffness, only_frequencies=True)
+
 
-    D = sympy.Matrix(D)
+def assemble_modes_matrix(mass, stiffness, return_frequencies=False, only_frequencies=False):
+    """ Function that takes the mass and stiffness matrices of a system and returns its modes matrix.
 
-    Ddet = D.det()
-    eq = sympy.Eq(Ddet, 0)
-    sol = sympy.solveset(eq, x)
-    freqs = [i for i in sol if i > 0]
-    freqs.sort()
+    :param mass: np.matrix - Mass matrix of any system.
+    :param stiffness: np.matrix - Stiffness matrix of any system.
+    :param return_frequencies: bool - True to also return the natural frequencies.
+    :param only_frequencies: bool - True to return only the natural frequencies.
+    :return: np.matrix - Mass-normalized modes as columns, in ascending order of natural frequency, and/or the list
+    of natural frequencies (rad/s).
+    """
+    omega, phi = generalized_eigen(mass, stiffness)
+    freqs = [float(i) for i in omega if i > 0]
 
     if only_frequencies:
         return freqs
 
-    Di = []
-    for i in range(len(freqs)):
-        Dii = D.subs(x, freqs[i])
-        Dij = []
-        l = list(Dii)
-        for j in range(len(freqs)):
-            Dij.append(l[j * n:j * n + n])
-        Dii = np.mat(Dij, dtype='float')
-        Di.append(Dii)
-
-    phi = []
-    for i in range(len(freqs)):
-        b = np.zeros(len(freqs) - 1)
-        b[0] = -Di[i][1, 0]
-
-        A = Di[i][1:, 1:]
-        x = np.linalg.solve(A, b)
-        z = np.ones(1)
-        z = np.concatenate((z, x))
-        phi.append(z)
-
-    phi = np.mat(phi).T
+    phi = np.mat(phi[:, omega > 0])
 
     if return_frequencies:
         return phi, freqs
@@ -467,39 +1730,38 @@ def assemble_modes_matrix(mass, stiffness, return_frequencies=False, only_freque
 
 
 def assemble_modal_mass_vector(modes, mass):
-    phi = modes
-    M = mass
-    n = len(phi[0, :].A1)
+    """ Function that takes a modes matrix and a mass matrix and returns the modal mass of each mode.
 
-    Mi = []
-    for i in range(n):
-        Mi.append(phi[:, i].T * M * phi[:, i])
-
-    return Mi
+    :param modes: np.matrix - Modes as columns.
+    :param mass: np.matrix - Mass matrix of the system.
+    :return: list - 1 by 1 np.matrix with the modal mass of each mode.
+    """
+    phi = np.asarray(modes)
+    Mi = np.einsum('ij,ij->j', phi, np.asarray(mass).dot(phi))
+    return [np.mat(i) for i in Mi]
 
 
 def assemble_modal_stiffness_vector(modes, stiffness):
-    phi = modes
-    K = stiffness
-    n = len(phi[0, :].A1)
+    """ Function that takes a modes matrix and a stiffness matrix and returns the modal stiffness of each mode.
 
-    Ki = []
-    for i in range(n):
-        Ki.append(phi[:, i].T * K * phi[:, i])
-
-    return Ki
+    :param modes: np.matrix - Modes as columns.
+    :param stiffness: np.matrix - Stiffness matrix of the system.
+    :return: list - 1 by 1 np.matrix with the modal stiffness of each mode.
+    """
+    phi = np.asarray(modes)
+    Ki = np.einsum('ij,ij->j', phi, np.asarray(stiffness).dot(phi))
+    return [np.mat(i) for i in Ki]
 
 
 def assemble_modal_force_vector(modes, force_amplitude):
-    phi = modes
-    F = force_amplitude
-    n = len(phi[0, :].A1)
+    """ Function that takes a modes matrix and a force amplitude vector and returns the modal force of each mode.
 
-    Fi = []
-    for i in range(n):
-        Fi.append(phi[:, i].T * F)
-
-    return Fi
+    :param modes: np.matrix - Modes as columns.
+    :param force_amplitude: np.matrix - n by 1 force amplitude vector.
+    :return: list - 1 by 1 np.matrix with the modal force amplitude of each mode.
+    """
+    Fi = np.asarray(modes).T.dot(np.asarray(force_amplitude).reshape(-1))
+    return [np.mat(i) for i in Fi]
 
 
 def solve_sdof_system(m, ksi, k, p0, omega, t_lim, x0=0, v0=0):
@@ -576,7 +1838,7 @@ if __name__ == '__main__':
                                           configurations=config_nonlinear, tlcd=tlcd_nonlinear)
 
     t = dynamicResponse_nonlinear.t
-    vc = -dynamicResponse_nonlinear.dampingVelocityArray[-1, :].A1
+    vc = -dynamicResponse_nonlinear.dampingVelocityArray
     vd = dynamicResponse_nonlinear.v[-1, :].A1
     vl = dynamicResponse_linear.v[-1, :].A1
 
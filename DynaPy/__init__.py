@@ -1,10 +1,14 @@
 from .DpAnimationCanvas import *
 from .DpConfigurations import *
 from .DpExcitation import *
+from .DpExcitationFile import *
 from .DpInputData import *
 from .DpOutputData import *
 from .DpOutputDMF import *
 from .DpPltCanvas import *
+from .DpProjectFile import *
+from .DpResponseSinks import *
+from .DpResultStore import *
 from .DpStory import *
 from .DpStructureCanvas import *
 from .DpTLCD import *
@@ -1,7 +1,7 @@
 import sys
 
 import numpy as np
-from DynaPy import PltCanvas, get_text
+from DynaPy import PltCanvas, get_text, read_excitation_table
 from GUI.excitationGeneratorGUI import Ui_MainWindow
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -93,30 +93,22 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setWindowTitle('Excitation Generator - [{}]'.format(self.fileName))
 
         try:
-            with open(self.fileName, 'r', encoding='utf-8') as file:
-                unit = file.readline()
-                if unit == 'unit: g\n':
-                    self.comboBox.setCurrentIndex(0)
-                elif unit == 'unit: m/s2\n':
-                    self.comboBox.setCurrentIndex(1)
-
-                rows = int(file.readline())
-                self.cells = []
-                for i in range(rows):
-                    cell_row = []
-                    row = file.readline()
-                    row = row.split(', ')
-                    t = row[0]
-                    a = row[1].strip('\n')
-                    x = QTableWidgetItem()
-
-                    y = QTableWidgetItem()
-                    x.setText(t)
-                    y.setText(a)
-                    self.cells.append([x, y])
-                    self.tableWidget.setItem(i, 0, x)
-                    self.tableWidget.setItem(i, 1, y)
-                    self.tableWidget.insertRow(i + 1)
+            unit, t, a = read_excitation_table(self.fileName)
+            if unit == 'g':
+                self.comboBox.setCurrentIndex(0)
+            elif unit == 'm/s2':
+                self.comboBox.setCurrentIndex(1)
+
+            self.cells = []
+            for i in range(t.size):
+                x = QTableWidgetItem()
+                y = QTableWidgetItem()
+                x.setText(np.format_float_positional(t[i], trim='-'))
+                y.setText(np.format_float_positional(a[i], trim='-'))
+                self.cells.append([x, y])
+                self.tableWidget.setItem(i, 0, x)
+                self.tableWidget.setItem(i, 1, y)
+                self.tableWidget.insertRow(i + 1)
 
             self.tableWidget.removeRow(i + 1)
             self.plot_excitation()
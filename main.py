@@ -7,6 +7,7 @@ It utilises PyQt5 as the GUI framework.
 This is the main script of the project and will be used to generate the .exe file for
 distribution.
 """
+import multiprocessing
 import os
 import re
 import sys
@@ -41,7 +42,7 @@ class RunSimulationThread(QThread):
         mass = assemble_mass_matrix(self.inputData.stories, self.inputData.tlcd)
         damping = assemble_damping_matrix(self.inputData.stories, self.inputData.tlcd)
         stiffness = assemble_stiffness_matrix(self.inputData.stories, self.inputData.tlcd)
-        force = assemble_force_matrix(self.inputData.excitation, mass, self.inputData.configurations)
+        force = ExcitationForce(self.inputData.excitation, mass, self.inputData.configurations)
 
         outputData_ = OutputData(mass, damping, stiffness, force, self.inputData.configurations, self.inputData.tlcd)
         self.mySignal.emit(outputData_)
@@ -57,36 +58,17 @@ class RunSetOfSimulationsThread(QThread):
         self.frequencies = frequencies
 
     def run(self):
-        displacmentList = []
-        dmfList = []
-        totalIter = len(self.frequencies)
-
         self.mass = assemble_mass_matrix(self.inputData.stories, self.inputData.tlcd)
         self.damping = assemble_damping_matrix(self.inputData.stories, self.inputData.tlcd)
         self.stiffness = assemble_stiffness_matrix(self.inputData.stories, self.inputData.tlcd)
 
-        for i, j in zip(self.frequencies, range(len(self.frequencies))):
-            resp = self.simulation(self.inputData, i)
-            x = resp[0]
-            dmf = resp[1]
-            displacmentList.append(x)
-            dmfList.append(dmf)
-
-            percentageDone = (j + 1) / totalIter * 100
-            self.percentageSignal.emit(percentageDone)
-        signal = [self.frequencies, displacmentList, dmfList]
+        # Frequency chunks are solved on a process pool; progress is reported as chunks complete
+        outputDMF_ = calc_dmf_sweep(self.mass, self.damping, self.stiffness, self.inputData.excitation,
+                                    self.frequencies, self.inputData.configurations, self.inputData.tlcd,
+                                    progress=lambda done: self.percentageSignal.emit(done * 100))
+        signal = [self.frequencies, outputDMF_.displacements.tolist(), outputDMF_.dmf.tolist()]
         self.mySignal.emit(signal)
 
-    def simulation(self, inputData_, frequency):
-        inputData_.excitation.frequencyInput = frequency
-        inputData_.excitation.relativeFrequency = False
-        inputData_.excitation.calc_frequency()
-
-        force = assemble_force_matrix(inputData_.excitation, self.mass, inputData_.configurations)
-
-        outputData_ = OutputData(self.mass, self.damping, self.stiffness, force, inputData_.configurations, inputData_.tlcd)
-        return [outputData_.maxDisplacement, outputData_.DMF]
-
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     """
@@ -429,52 +411,15 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
             self.new_file()
             self.fileName = fileName
         self.setWindowTitle('Dynapy TLCD Analyser - [{}]'.format(self.fileName))
-        self.file = open(self.fileName, 'r', encoding='utf-8')
-        self.file.readline()
-        self.file.readline()
-        storiesNumber = self.file.readline()[:-1]
-        storiesData = self.file.readline()[:-1]
-        self.file.readline()
-        self.file.readline()
-        self.file.readline()
-        tlcdData = self.file.readline()[:-1]
-        self.file.readline()
-        self.file.readline()
-        self.file.readline()
-        excitationData = self.file.readline()[:-1]
-        self.file.readline()
-        self.file.readline()
-        self.file.readline()
-        configurationsData = self.file.readline()[:-1]
-
-        storiesNumber = eval(storiesNumber)
-        storiesData = eval(storiesData)
-        tlcdData = eval(tlcdData)
-        excitationData = eval(excitationData)
-        configurationsData = eval(configurationsData)
-
-        for i in range(1, storiesNumber + 1):
-            inputData.stories.update({i: eval(storiesData[i])})
+        # Not memory-mapped, so the project can be saved back over its own sidecar
+        project = load_project(self.fileName, mmap=False)
+        inputData.stories = project.stories
+        inputData.tlcd = project.tlcd
+        inputData.excitation = project.excitation
+        inputData.configurations = project.configurations
+        for i in range(1, len(inputData.stories) + 1):
             self.storyNumberComboBox.addItem(str(i + 1))
 
-        if tlcdData is not None:
-            if tlcdData[0] == 'Basic TLCD':
-                inputData.tlcd = TLCD(tlcdData[0], tlcdData[1], tlcdData[2], tlcdData[3], amount=tlcdData[4], contraction=tlcdData[5])
-            elif tlcdData[0] == 'Pressurized TLCD':
-                inputData.tlcd = TLCD(tlcdData[0], tlcdData[1], tlcdData[2], tlcdData[3], tlcdData[4], tlcdData[5], tlcdData[6], tlcdData[7])
-
-        if excitationData[0] == 'Sine Wave':
-            inputData.excitation = Excitation(excitationData[0], excitationData[1], excitationData[2],
-                                              excitationData[3], excitationData[4], excitationData[5],
-                                              inputData.stories, inputData.tlcd)
-        elif excitationData[0] == 'General Excitation':
-            inputData.excitation = Excitation(excitationData[0], t=excitationData[1], a=excitationData[2],
-                                              fileName=excitationData[3],
-                                              structure=inputData.stories, tlcd=inputData.tlcd)
-        inputData.configurations = Configurations(configurationsData[0], configurationsData[1], configurationsData[2],
-                                                  configurationsData[3], configurationsData[4], configurationsData[5],
-                                                  configurationsData[6])
-
         self.set_structure_text_change()
         self.structureWidget.structureCanvas.painter(inputData.stories)
 
@@ -525,43 +470,8 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
     def save_file(self):
         """ Checks for self.fileName: if None, calls save_file_as(), otherwise proceeds to the next check.
         Checks if all data was input: if not, raises error03, otherwise save file to self.fileName directory.
-        Save file has the following structure:
-
-        Structure:
-        -------------------
-        /number of stories/
-        /dictionray with story namber as key and Story() call string with proper args/
-
-        TLCD:
-        -------------------
-        /tuple with TLCD() args/
-
-        Excitation:
-        -------------------
-        /tuple with Excitation() args/
-
-        Configurations:
-        -------------------
-        /tuple with Configurations() args/
-
-        *** Example: ***
-
-        Structure:
-        -------------------
-        1
-        {1: 'Story(10000.0, 3.0, 0.35, 0.35, 25000000000.0, "Engastado-Engastado")'}
-
-        TLCD:
-        -------------------
-        ('TLCD Simples', 0.3, 10.0, 1.0)
-
-        Excitation:
-        -------------------
-        ('Seno', 5.0, 45.554650526392187, 1.0, 3.0, 5.0)
-
-        Configurations:
-        -------------------
-        ('Método das Diferenças Finitas', 0.001, 0.0, 0.0, 0.02, 998.2071, 1.003e-06, 9.807)
+        The file is written by DynaPy.save_project (DynaPy file version 2: JSON header, General Excitation arrays in a
+        binary .npz sidecar). Version 1 files are still opened by open_file.
 
         :return: None
         """
@@ -572,44 +482,7 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
             error03_msg = "Fill in all data in the Structures, TLCD and Excitation tabs before saving."
             QMessageBox.warning(self, error03_title, error03_msg, QMessageBox.Ok)
         else:
-            self.file = open(self.fileName, 'w', encoding='utf-8')
-            self.file.write('Structure: \n-------------------\n')
-            self.file.write('{}\n'.format(len(inputData.stories)))
-
-            stories = {}
-            for i, j in inputData.stories.items():
-                stories.update({i: 'Story({}, {}, {}, {}, {}, "{}")'.format(j.mass, j.height, j.width,
-                                                                            j.depth, j.E, j.support)})
-            self.file.write('{}\n'.format(stories))
-
-            self.file.write('\nTLCD: \n-------------------\n')
-            tlcd = inputData.tlcd
-            if tlcd is None:
-                tlcdData = None
-            elif tlcd.type == 'Basic TLCD':
-                tlcdData = (tlcd.type, tlcd.diameter, tlcd.width, tlcd.waterHeight, tlcd.amount, tlcd.contraction)
-            elif tlcd.type == 'Pressurized TLCD':
-                tlcdData = (tlcd.type, tlcd.diameter, tlcd.width, tlcd.waterHeight, tlcd.gasHeight, tlcd.gasPressure, tlcd.amount, tlcd.contraction)
-            self.file.write('{}\n'.format(tlcdData))
-
-            self.file.write('\nExcitation: \n-------------------\n')
-            excitation = inputData.excitation
-            if excitation.type == 'Sine Wave':
-                excitationData = (excitation.type, excitation.amplitude, excitation.frequencyInput,
-                                  excitation.relativeFrequency, excitation.exctDuration, excitation.anlyDuration)
-            elif excitation.type == 'General Excitation':
-                excitationData = (excitation.type, excitation.t_input, excitation.a_input, excitation.fileName)
-            self.file.write('{}\n'.format(excitationData))
-
-            self.file.write('\nConfigurations: \n-------------------\n')
-            configurations = inputData.configurations
-            configurationsData = (configurations.method, configurations.timeStep, configurations.initialDisplacement,
-                                  configurations.initialVelocity, configurations.dampingRatio,
-                                  configurations.liquidSpecificMass, configurations.kineticViscosity,
-                                  configurations.gravity)
-            self.file.write('{}\n'.format(configurationsData))
-
-            self.file.close()
+            save_project(self.fileName, inputData)
 
     def save_file_as(self):
         """ Brings a file save dialog box, saves the file directory to self.fileName and calls self.save_file()
@@ -767,13 +640,19 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
         self.dmfSettingsDialog.le2 = QLineEdit(self)
         self.dmfSettingsDialog.le2.setPlaceholderText('2')
         self.dmfSettingsDialog.le2.setText(str(inputData.configurations.dmfUpperLimitFactor))
+        self.dmfSettingsDialog.label3 = QLabel('Method: ')
+        self.dmfSettingsDialog.cb = QComboBox(self)
+        self.dmfSettingsDialog.cb.addItems(['Time History', 'Steady State'])
+        self.dmfSettingsDialog.cb.setCurrentText(inputData.configurations.dmfMethod)
         self.dmfSettingsDialog.btn = QPushButton('Ok', self)
         self.dmfSettingsDialog.btn.clicked.connect(self.dmf_settings_config)
         self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.label1, 1, 1)
         self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.label2, 2, 1)
+        self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.label3, 3, 1)
         self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.le1, 1, 2)
         self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.le2, 2, 2)
-        self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.btn, 3, 1, 1, 2)
+        self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.cb, 3, 2)
+        self.dmfSettingsDialog.grid.addWidget(self.dmfSettingsDialog.btn, 4, 1, 1, 2)
         self.dmfSettingsDialog.setLayout(self.dmfSettingsDialog.grid)
         self.dmfSettingsDialog.setWindowTitle('DMF Discretization Settings')
         self.dmfSettingsDialog.setGeometry(300, 300, 300, 200)
@@ -783,6 +662,7 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
         try:
             inputData.configurations.dmfDiscretizationPoints = int(get_text(self.dmfSettingsDialog.le1))
             inputData.configurations.dmfUpperLimitFactor = float(get_text(self.dmfSettingsDialog.le2))
+            inputData.configurations.dmfMethod = get_text(self.dmfSettingsDialog.cb)
             self.dmfSettingsDialog.hide()
         except ValueError:
             error10_title = "Error 10"
@@ -922,6 +802,16 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
                 self.dmf_add_list4_item()
                 self.plot_dmf()
 
+            linearAnalysis = not (inputData.configurations.nonLinearAnalysis and inputData.tlcd is not None)
+            if inputData.configurations.dmfMethod == 'Steady State' and linearAnalysis:
+                mass = assemble_mass_matrix(inputData.stories, inputData.tlcd)
+                damping = assemble_damping_matrix(inputData.stories, inputData.tlcd)
+                stiffness = assemble_stiffness_matrix(inputData.stories, inputData.tlcd)
+                steadyStateDMF = calc_steady_state_dmf(mass, damping, stiffness, excitation, frequencies)
+                self.dmfProgressBar.setValue(100)
+                process([steadyStateDMF.frequencies, steadyStateDMF.displacements, steadyStateDMF.dmf])
+                return
+
             self.runSetOfSimulationsThread = RunSetOfSimulationsThread(inputData, frequencies)
             self.runSetOfSimulationsThread.mySignal.connect(process)
             self.runSetOfSimulationsThread.percentageSignal.connect(self.dmfProgressBar.setValue)
@@ -1082,7 +972,8 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
 
     # Excitation Methods
     def import_excitation(self):
-        fileName = QFileDialog.getOpenFileName(self, 'Load File', './save/Excitations', filter="Text File (*.txt)")[0]
+        fileName = QFileDialog.getOpenFileName(self, 'Load File', './save/Excitations',
+                                               filter="Excitation File (*.txt *.AT2 *.at2)")[0]
         self.excitationFileLineEdit.setText(fileName)
         self.confirmExcitationButton.click()
 
@@ -1142,29 +1033,16 @@ Preencha todos os dados e utilize o  comando "Calcular" para gerar o relatório.
         elif exct_type == 'General Excitation':
             fileName = get_text(self.excitationFileLineEdit)
             try:
-                file = open(fileName, 'r')
+                if os.path.splitext(fileName)[1].lower() == '.at2':
+                    record = read_peer_record(fileName, inputData.configurations.gravity)
+                    excitation = record.excitation(structure=inputData.stories, tlcd=inputData.tlcd)
+                else:
+                    t, a = read_excitation_file(fileName, inputData.configurations.gravity)
+                    excitation = Excitation(exct_type, t=t, a=a, structure=inputData.stories, tlcd=inputData.tlcd,
+                                            fileName=fileName)
             except FileNotFoundError:
                 return
-            unit = file.readline()
-            lines = int(file.readline())
-            g = inputData.configurations.gravity
-
-            t = []
-            a = []
-
-            for i in range(lines):
-                line = file.readline()
-                line = line.split(', ')
-                line[0] = float(line[0])
-                line[1] = float(line[1])
-                t.append(line[0])
-                if unit == 'unit: g\n':
-                    a.append(line[1] * g)
-                elif unit == 'unit: m/s2\n':
-                    a.append(line[1])
-
-            excitation = Excitation(exct_type, t=t, a=a, structure=inputData.stories, tlcd=inputData.tlcd,
-                                    fileName=fileName)
+
             inputData.excitation = excitation
 
             self.excitationWidget.excitationCanvas.plot_excitation(inputData.excitation.t_input,
@@ -1336,7 +1214,7 @@ Gravity acceleration: {} (m/s²)""".format(inputData.configurations.method, inpu
                    h2_M, outputData.massMatrix,
                    h2_C, outputData.dampingMatrix,
                    h2_K, outputData.stiffnessMatrix,
-                   h2_F, outputData.forceMatrix,
+                   h2_F, outputData.dynamicResponse.forceProvider.matrix(),
                    h1_dynResp, dmf, plot)
 
         self.reportTextBrowser.setText(report)
@@ -1351,44 +1229,16 @@ Gravity acceleration: {} (m/s²)""".format(inputData.configurations.method, inpu
         self.dynRespWidget.dynRespCanvas.draw()
 
     def dynamic_response_export_csv(self):
-        """ Exports CSV of the plotted data 
+        """ Exports CSV of the plotted data (time and displacement of the DOFs in list 2)
 
         :return: None
         """
-        dataList = []
-
-        plotList = []
-
-        for i in range(self.list1.count()):
-            self.list1.setCurrentRow(i)
-            item = get_text(self.list1)
-            if not self.list2.findItems(item, Qt.MatchExactly):
-                plotList.append((get_text(self.list1), False))
-            else:
-                plotList.append((get_text(self.list1), True))
-
-        t = outputData.dynamicResponse.t
-        dataList.append(t)
-        for i, j in plotList:
-            if j:
-                if not ('TLCD' in i):
-                    n = int(i.split('Story ')[1]) - 1
-                    x = outputData.dynamicResponse.x[n, :].A1
-                else:
-                    n = len(plotList) - 1
-                    x = outputData.dynamicResponse.x[n, :].A1
-                dataList.append(list(x))
-
-        dataList = list(zip(*dataList))
+        dofs = [i for i in range(self.list1.count())
+                if self.list2.findItems(self.list1.item(i).text(), Qt.MatchExactly)]
 
         filename = QFileDialog.getSaveFileName(self, 'Save as', './save', filter="CSV File (*.csv)")[0]
-        if filename != '': 
-            with open(filename, 'w') as file:
-                for i in dataList:
-                    line = str(i)
-                    line = line.strip('(')
-                    line = line.strip(')')
-                    file.write('{}\n'.format(line))
+        if filename != '':
+            export_response_csv(filename, outputData.dynamicResponse, 'x', dofs)
 
     def dynamic_response_add_list1_items(self):
         """ Adds all stories and the TLCD to list 1. Takes from inputData.
@@ -1681,4 +1531,5 @@ def compare_anal_sol(case):
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
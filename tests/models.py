@@ -0,0 +1,58 @@
+import numpy as np
+from DynaPy import (Configurations, Excitation, Story, TLCD, assemble_damping_matrix, assemble_force_matrix,
+                    assemble_mass_matrix, assemble_stiffness_matrix)
+
+
+class Model(object):
+    def __init__(self, stories=3, tlcd=True, excitation='Sine Wave', **configurations):
+        """ Small shear building with TLCD used by the tests, with its matrices and force.
+
+        :param stories: int - Number of stories.
+        :param tlcd: bool - True to add two basic TLCDs to the last story.
+        :param excitation: str - 'Sine Wave' (near resonance) or 'General Excitation' (random record).
+        :param configurations: any type - Arguments of Configurations (timeStep defaults to 0.002).
+        :return: None
+        """
+        configurations.setdefault('timeStep', 0.002)
+        self.configurations = Configurations(**configurations)
+        self.stories = {i: Story(height=3.) for i in range(1, stories + 1)}
+        self.tlcd = TLCD(diameter=0.3, width=5., waterHeight=0.5, amount=2,
+                         configurations=self.configurations) if tlcd else None
+        for story in self.stories.values():
+            story.calc_damping_coefficient(0.02)
+
+        if excitation == 'Sine Wave':
+            self.excitation = Excitation('Sine Wave', 5., 0.9, True, 3., 5., structure=self.stories, tlcd=self.tlcd)
+        else:
+            t = np.arange(1001) * 0.005
+            a = np.random.default_rng(0).normal(0., 1., t.size)
+            self.excitation = Excitation('General Excitation', t=t, a=a, structure=self.stories, tlcd=self.tlcd)
+
+        self.M = assemble_mass_matrix(self.stories, self.tlcd)
+        self.C = assemble_damping_matrix(self.stories, self.tlcd)
+        self.K = assemble_stiffness_matrix(self.stories, self.tlcd)
+
+    def force(self, configurations=None):
+        return assemble_force_matrix(self.excitation, self.M,
+                                     self.configurations if configurations is None else configurations)
+
+
+def exact_response(M, C, K, F, dt, x0=0., v0=0.):
+    """ Exact response of the state-space system to a force that varies linearly between samples, from the
+    eigendecomposition of the state matrix.
+    """
+    M, C, K = np.asarray(M), np.asarray(C), np.asarray(K)
+    n = M.shape[0]
+    MI = np.linalg.inv(M)
+    A = np.block([[np.zeros((n, n)), np.identity(n)], [-MI.dot(K), -MI.dot(C)]])
+    lambdas, psi = np.linalg.eig(A)
+    psiI = np.linalg.inv(psi)
+    e = np.exp(lambdas * dt)
+    step, constant, ramp = [psi.dot(np.diag(d)).dot(psiI).real for d in
+                            (e, (e - 1) / lambdas, (e - 1 - lambdas * dt) / (lambdas ** 2 * dt))]
+    B = np.vstack([np.zeros((n, n)), MI])
+    y = np.empty((F.shape[0], 2 * n))
+    y[0] = np.concatenate([np.full(n, x0), np.full(n, v0)])
+    for i in range(F.shape[0] - 1):
+        y[i + 1] = step.dot(y[i]) + constant.dot(B.dot(F[i])) + ramp.dot(B.dot(F[i + 1] - F[i]))
+    return y[:, :n], y[:, n:]
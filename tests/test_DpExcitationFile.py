@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from DynaPy import excitation_cache_file, read_excitation_file, read_excitation_table, read_peer_record
+
+
+class ExcitationCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheDirectory = os.path.join(self.directory.name, 'cache')
+        self.environment = mock.patch.dict(os.environ, {'DYNAPY_CACHE_DIR': self.cacheDirectory})
+        self.environment.start()
+        self.fileName = os.path.join(self.directory.name, 'record.txt')
+        self.t = np.arange(50) * 0.01
+        self.a = np.sin(7. * self.t)
+        self.write('g', self.a)
+
+    def tearDown(self):
+        self.environment.stop()
+        self.directory.cleanup()
+
+    def write(self, unit, a):
+        with open(self.fileName, 'w') as file:
+            file.write('unit: {}\n{}\n'.format(unit, self.t.size))
+            for i, j in zip(self.t, a):
+                file.write('{!r},{!r}\n'.format(i, j))
+
+    def test_cache(self):
+        unit, t, a = read_excitation_table(self.fileName)
+        self.assertEqual(unit, 'g')
+        self.assertTrue(np.array_equal(t, self.t) and np.array_equal(a, self.a))
+
+        # The cache goes to the cache directory, not next to the record
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['cache', 'record.txt'])
+        cacheFileName = excitation_cache_file(os.path.abspath(self.fileName))
+        self.assertEqual(os.listdir(self.cacheDirectory), [os.path.basename(cacheFileName)])
+
+        unit, t, a = read_excitation_table(self.fileName)
+        self.assertIsInstance(a, np.memmap)
+        self.assertTrue(np.array_equal(a, self.a))
+
+        # A changed record is read again
+        self.write('m/s2', 2 * self.a)
+        os.utime(self.fileName, ns=(os.stat(self.fileName).st_atime_ns, os.stat(self.fileName).st_mtime_ns + 10**9))
+        t, a = read_excitation_file(self.fileName, gravity=10.)
+        self.assertTrue(np.array_equal(a, 2 * self.a))
+
+    def test_no_cache(self):
+        t, a = read_excitation_file(self.fileName, gravity=10., cache=False)
+        self.assertTrue(np.allclose(a, 10. * self.a, rtol=1e-15))
+        self.assertFalse(os.path.exists(self.cacheDirectory))
+
+
+class PeerRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, 'RSN1_HELENA.A_A-HMC180.AT2')
+        self.a = np.random.default_rng(5).normal(0., 0.1, 203)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, unit, sampling, samples):
+        with open(self.fileName, 'w') as file:
+            file.write('PEER NGA STRONG MOTION DATABASE RECORD\nHelena Montana-01, 10/31/1935, Carroll College, 180\n')
+            file.write('ACCELERATION TIME SERIES IN UNITS OF {}\n{}\n'.format(unit, sampling))
+            for i in range(0, len(samples), 5):
+                file.write(''.join(samples[i:i + 5]) + '\n')
+
+    def test_formats(self):
+        samples = ['{:16.7E}'.format(i) for i in self.a]
+        for unit, factor in (('G', 9.807), ('CM/S/S', 0.01)):
+            for sampling in ('NPTS=  203, DT=   .0100 SEC', '  203    .0100    NPTS, DT'):
+                self.write(unit, sampling, samples)
+                record = read_peer_record(self.fileName, blockSize=100)
+                self.assertEqual((record.npts, record.dt), (203, 0.01))
+                self.assertTrue(np.allclose(record.a, self.a * factor, rtol=1e-7, atol=0.))
+                self.assertTrue(np.allclose(record.t, np.arange(203) * 0.01))
+                excitation = record.excitation()
+                self.assertEqual(excitation.type, 'General Excitation')
+                self.assertTrue(np.array_equal(excitation.a_input, record.a))
+
+    def test_fixed_width_fields(self):
+        # Negative samples touching the previous field
+        samples = ['{:11.4E}'.format(i) for i in self.a]
+        self.write('G', 'NPTS=  203, DT=   .0100 SEC', samples)
+        with self.assertRaises(ValueError):
+            read_peer_record(self.fileName)
+        record = read_peer_record(self.fileName, gravity=1., blockSize=64, fieldWidth=11)
+        self.assertTrue(np.allclose(record.a, self.a, rtol=1e-4, atol=1e-5))
+
+    def test_missing_samples(self):
+        self.write('G', 'NPTS=  250, DT=   .0100 SEC', ['{:16.7E}'.format(i) for i in self.a])
+        with self.assertRaises(ValueError):
+            read_peer_record(self.fileName)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from DynaPy import Configurations, ODESolver
+from DynaPy.DpKernels import kernels_available, numba, tlcd_constants, tlcd_damping
+from models import Model
+
+
+class KernelsTest(unittest.TestCase):
+    methods = ('Finite Differences Method', 'Average Acceleration Method', 'Runge-Kutta Method')
+
+    def test_backend(self):
+        self.assertFalse(kernels_available(Configurations(kernelBackend='NumPy')))
+        self.assertEqual(kernels_available(Configurations(kernelBackend='Numba')), numba is not None)
+
+    def test_tlcd_damping(self):
+        tlcd = Model().tlcd
+        constants = tlcd_constants(tlcd)
+        for velocity in (0., 1e-6, 1e-3, 0.1, 2.):
+            self.assertAlmostEqual(tlcd_damping(velocity, constants), tlcd.calculate_damping_coefficient(velocity),
+                                   delta=1e-12 * tlcd.calculate_damping_coefficient(2.))
+
+    def test_kernels_equal_numpy(self):
+        # Without numba the kernels run as plain Python functions, which are forced on to be tested
+        for method in self.methods:
+            for nonlinear in (False, True):
+                model = Model(stories=2, method=method, nonLinearAnalysis=nonlinear, timeStep=0.01,
+                              kernelBackend='Numba')
+                with mock.patch('DynaPy.DynaSolver.kernels_available', return_value=False):
+                    reference = ODESolver(model.M, model.C.copy(), model.K, model.force(), model.configurations,
+                                          model.tlcd)
+                with mock.patch('DynaPy.DynaSolver.kernels_available', return_value=True):
+                    compiled = ODESolver(model.M, model.C.copy(), model.K, model.force(), model.configurations,
+                                         model.tlcd)
+                for name in ('displacementArray', 'velocityArray', 'accelerationArray'):
+                    y, z = getattr(compiled, name), getattr(reference, name)
+                    self.assertLessEqual(np.absolute(y - z).max(), 1e-10 * np.absolute(z).max(),
+                                         (method, nonlinear, name))
+                self.assertTrue(np.allclose(compiled.C, reference.C, rtol=1e-10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+import numpy as np
+from DynaPy import Configurations, calc_dmf_sweep
+from models import Model
+
+
+class DmfSweepPoolTest(unittest.TestCase):
+    def test_pool_matches_in_process(self):
+        for method in ('Finite Differences Method', 'Runge-Kutta Method'):
+            model = Model(method=method, nonLinearAnalysis=True)
+            frequencies = np.linspace(2., 12., 6)
+            inProcess = calc_dmf_sweep(model.M, model.C, model.K, model.excitation, frequencies,
+                                       model.configurations, model.tlcd)
+            pooled = calc_dmf_sweep(model.M, model.C, model.K, model.excitation, frequencies, model.configurations,
+                                    model.tlcd, workers=2)
+            self.assertTrue(np.array_equal(pooled.frequencies, inProcess.frequencies))
+            self.assertTrue(np.allclose(pooled.dmf, inProcess.dmf, rtol=1e-12, atol=0.))
+            self.assertTrue(np.allclose(pooled.displacements, inProcess.displacements, rtol=1e-12, atol=0.))
+
+    def test_default_is_in_process(self):
+        self.assertEqual(Configurations().numberOfWorkers, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
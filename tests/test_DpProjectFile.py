@@ -0,0 +1,44 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from DynaPy import Configurations, Excitation, InputData, Story, TLCD, load_project, save_project
+
+
+class ProjectFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, 'project.dpfl')
+
+        inputData = InputData()
+        inputData.configurations = Configurations()
+        inputData.stories = {i: Story() for i in range(1, 4)}
+        inputData.tlcd = TLCD('Pressurized TLCD', 0.3, 4., 1., 0.4, 462042., 1, 1.)
+        self.t = np.arange(500) * 0.02
+        self.a = np.sin(self.t)
+        inputData.excitation = Excitation('General Excitation', t=self.t, a=self.a, fileName='record.txt',
+                                          structure=inputData.stories, tlcd=inputData.tlcd)
+        save_project(self.fileName, inputData)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_back_to_same_path(self):
+        for mmap in (False, True):
+            inputData = load_project(self.fileName, mmap=mmap)
+            save_project(self.fileName, inputData)
+            self.assertTrue(np.array_equal(inputData.excitation.t_input, self.t))
+            self.assertTrue(np.array_equal(inputData.excitation.a_input, self.a))
+
+            reopened = load_project(self.fileName, mmap=False)
+            self.assertTrue(np.array_equal(reopened.excitation.t_input, self.t))
+            self.assertTrue(np.array_equal(reopened.excitation.a_input, self.a))
+            self.assertEqual(len(reopened.stories), 3)
+            self.assertEqual(reopened.tlcd.type, 'Pressurized TLCD')
+        self.assertEqual(sorted(os.listdir(self.directory)), ['project.dpfl', 'project.npz'])
+
+
+if __name__ == '__main__':
+    unittest.main()
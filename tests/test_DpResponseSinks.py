@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from DynaPy import ExcitationForce, ODESolver, ResponseSink, StatisticsSink, export_response_csv
+from models import Model
+
+
+class RecordingSink(ResponseSink):
+    def __init__(self):
+        self.blocks = []
+        self.closed = False
+
+    def write(self, t, x, v, a):
+        self.blocks.append([i.copy() for i in (t, x, v, a)])
+
+    def close(self):
+        self.closed = True
+
+    def arrays(self):
+        return [np.concatenate(i) for i in zip(*self.blocks)]
+
+
+class StreamingTest(unittest.TestCase):
+    methods = ('Finite Differences Method', 'Average Acceleration Method', 'Linear Acceleration Method',
+               'Runge-Kutta Method', 'Adaptive Runge-Kutta Method', 'Modal Superposition Method')
+
+    def test_streaming_equals_in_memory(self):
+        blockSize = 64
+        for method in self.methods:
+            for nonlinear in (False, True):
+                if nonlinear and method == 'Modal Superposition Method':
+                    continue
+                model = Model(excitation='General Excitation', method=method, nonLinearAnalysis=nonlinear,
+                              timeStep=0.005, outputBlockSize=blockSize)
+                force = ExcitationForce(model.excitation, model.M, model.configurations)
+                memory = ODESolver(model.M, model.C.copy(), model.K, force, model.configurations, model.tlcd)
+                sink = RecordingSink()
+                statistics = StatisticsSink()
+                streamed = ODESolver(model.M, model.C.copy(), model.K, force, model.configurations, model.tlcd,
+                                     sinks=[sink, statistics])
+
+                self.assertTrue(sink.closed)
+                self.assertTrue(all(len(i[0]) == blockSize for i in sink.blocks[:-1]))
+                t, x, v, a = sink.arrays()
+                self.assertTrue(np.array_equal(t, memory.t))
+                for y, reference in ((x, memory.displacementArray), (v, memory.velocityArray),
+                                     (a, memory.accelerationArray)):
+                    self.assertLessEqual(np.absolute(y - reference).max(), 1e-12 * np.absolute(reference).max(),
+                                         (method, nonlinear))
+                self.assertTrue(np.allclose(statistics.peakDisplacement,
+                                            np.absolute(memory.displacementArray).max(axis=0), rtol=1e-12))
+
+                # Only a window of the run is kept
+                self.assertLessEqual(streamed.displacementArray.shape[0], blockSize + 4)
+                if hasattr(streamed, 'dampingVelocityArray'):
+                    self.assertLessEqual(streamed.dampingVelocityArray.size, blockSize + 4)
+                if hasattr(streamed, 'modalDisplacementArray'):
+                    self.assertLessEqual(streamed.modalDisplacementArray.shape[0], blockSize)
+
+
+class CsvExportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, 'response.csv')
+        model = Model(excitation='General Excitation', timeStep=0.005)
+        self.tlcdAmount = model.tlcd.amount
+        self.response = ODESolver(model.M, model.C, model.K, model.force(), model.configurations, model.tlcd)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_selection(self):
+        r = self.response
+        # Blocks that do not divide the decimation
+        export_response_csv(self.fileName, r, 'xvas', dofs=[0, 2], decimation=3, tlcdAmount=self.tlcdAmount,
+                            blockSize=100)
+        data = np.loadtxt(self.fileName, delimiter=',')
+        steps = slice(None, None, 3)
+        reference = np.hstack([r.t[steps, None], r.displacementArray[steps][:, [0, 2]],
+                               r.velocityArray[steps][:, [0, 2]], r.accelerationArray[steps][:, [0, 2]],
+                               r.displacementArray[steps, -self.tlcdAmount:]])
+        # Values are written with their shortest exact representation
+        self.assertTrue(np.array_equal(data, reference))
+        with open(self.fileName) as file:
+            self.assertEqual(file.readline().count(', '), reference.shape[1] - 1)
+
+    def test_precision(self):
+        export_response_csv(self.fileName, self.response, 'a', precision=6)
+        data = np.loadtxt(self.fileName, delimiter=',')
+        reference = np.hstack([self.response.t[:, None], self.response.accelerationArray])
+        self.assertTrue(np.allclose(data, reference, rtol=1e-5, atol=0.))
+
+    def test_invalid_responses(self):
+        with self.assertRaises(ValueError):
+            export_response_csv(self.fileName, self.response, 'xq')
+        with self.assertRaises(ValueError):
+            export_response_csv(self.fileName, self.response, 's')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from DynaPy import (ExcitationForce, OutputData, ResultStore, ResultStoreSink, load_output_data, load_output_dmf,
+                    save_output_data, save_output_dmf, calc_dmf_sweep)
+from models import Model
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.directory.name, 'results.npz')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_output_data_round_trip(self):
+        model = Model(excitation='General Excitation', timeStep=0.005)
+        force = ExcitationForce(model.excitation, model.M, model.configurations)
+        outputData = OutputData(model.M, model.C, model.K, force, model.configurations, model.tlcd)
+        save_output_data(self.fileName, outputData, chunkSize=100)
+        self.assertFalse(os.path.exists(self.fileName + '.tmp'))
+
+        loaded = load_output_data(self.fileName)
+        response = outputData.dynamicResponse
+        stored = loaded.dynamicResponse
+        self.assertTrue(np.array_equal(stored.t, response.t))
+        for name in ('displacementArray', 'velocityArray', 'accelerationArray'):
+            self.assertTrue(np.array_equal(getattr(stored, name), getattr(response, name)), name)
+        for name in ('massMatrix', 'dampingMatrix', 'stiffnessMatrix'):
+            self.assertTrue(np.array_equal(getattr(loaded, name), getattr(outputData, name)), name)
+        self.assertTrue(np.array_equal(stored.forceProvider.matrix(), force.matrix()))
+        self.assertTrue(np.array_equal(loaded.forceMatrix, force.matrix()))
+        self.assertEqual(loaded.DMF, [float(i) for i in outputData.DMF])
+        self.assertEqual(loaded.configurations.timeStep, model.configurations.timeStep)
+        for name in ('type', 'diameter', 'width', 'waterHeight', 'amount', 'mass', 'stiffness'):
+            self.assertEqual(getattr(loaded.tlcd, name), getattr(model.tlcd, name), name)
+
+        # Window of the history
+        window = load_output_data(self.fileName, dofs=[0, 3], start=1., stop=2.).dynamicResponse
+        steps = (response.t >= 1.) & (response.t <= 2.)
+        self.assertTrue(np.array_equal(window.t, response.t[steps]))
+        self.assertTrue(np.array_equal(window.displacementArray, response.displacementArray[steps][:, [0, 3]]))
+        self.assertTrue(np.array_equal(window.forceProvider.block(0, steps.sum()),
+                                       force.block(0, response.t.size)[steps][:, [0, 3]]))
+
+    def test_failed_run_keeps_previous_store(self):
+        model = Model(tlcd=False, timeStep=0.01)
+        save_output_data(self.fileName, OutputData(model.M, model.C, model.K, model.force(), model.configurations,
+                                                   None))
+        sink = ResultStoreSink(self.fileName)
+        sink.write(np.zeros(3), np.zeros((3, 2)), np.zeros((3, 2)), np.zeros((3, 2)))
+        sink.archive.close()
+        store = ResultStore(self.fileName)
+        self.assertEqual(store.metadata['type'], 'OutputData')
+        store.close()
+
+    def test_output_dmf_round_trip(self):
+        model = Model(stories=2, tlcd=False, timeStep=0.01)
+        model.excitation.anlyDuration = model.excitation.exctDuration = 2.
+        outputDMF = calc_dmf_sweep(model.M, model.C, model.K, model.excitation, [1., 2., 3.], model.configurations,
+                                   None)
+        save_output_dmf(self.fileName, outputDMF, model.configurations)
+        loaded, configurations = load_output_dmf(self.fileName)
+        self.assertTrue(np.array_equal(loaded.frequencies, outputDMF.frequencies))
+        self.assertTrue(np.array_equal(loaded.dmf, outputDMF.dmf))
+        self.assertEqual(configurations.timeStep, 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from DynaPy import Configurations, Excitation, Story, TLCD
+
+
+class ConstructorsTest(unittest.TestCase):
+    def test_keyword_arguments(self):
+        story = Story(mass=12.e3, dampingCoefficient=1.e3)
+        self.assertEqual(story.dampingCoefficient, 1.e3)
+        self.assertIsNone(story.dampingRatio)
+        story = Story(dampingRatio=0.05)
+        self.assertAlmostEqual(story.dampingCoefficient, 0.05 * story.criticalDamping)
+        for cls in (Story, TLCD):
+            with self.assertRaises(TypeError):
+                cls(bogus=1.)
+        with self.assertRaises(TypeError):
+            Excitation('Sine Wave', bogus=1.)
+        with self.assertRaises(AttributeError):
+            Story().bogus = 1.
+
+    def test_unknown_types(self):
+        with self.assertRaises(ValueError):
+            Story(support='Roller')
+        with self.assertRaises(ValueError):
+            TLCD('Magnetic TLCD')
+        with self.assertRaises(ValueError):
+            Excitation('Square Wave')
+
+    def test_replace_equals_construction(self):
+        story = Story(height=3.)
+        story.calc_damping_coefficient(0.02)
+        changed = story.replace(mass=15.e3, support='Pin-Pin')
+        reference = Story(mass=15.e3, height=3., support='Pin-Pin', dampingRatio=0.02)
+        for name in Story.__slots__:
+            self.assertEqual(getattr(changed, name), getattr(reference, name), name)
+        self.assertEqual(story.mass, 10.e3)
+
+        configurations = Configurations()
+        tlcd = TLCD(diameter=0.3, width=5., waterHeight=0.5, amount=2, configurations=configurations)
+        changed = tlcd.replace(diameter=0.4, kineticViscosity=2e-6)
+        reference = TLCD(diameter=0.4, width=5., waterHeight=0.5, amount=2, kineticViscosity=2e-6,
+                         configurations=configurations)
+        for name in ('mass', 'stiffness', 'naturalFrequency', 'dampingCoefficientConstant',
+                     'contracionDampingConstant'):
+            self.assertAlmostEqual(getattr(changed, name), getattr(reference, name), delta=1e-12 * abs(
+                getattr(reference, name)), msg=name)
+
+        stories = {1: Story(), 2: Story()}
+        excitation = Excitation('Sine Wave', 2., 0.9, True, 3., 5., structure=stories)
+        changed = excitation.replace(frequencyInput=1.1)
+        self.assertAlmostEqual(changed.frequency, Excitation('Sine Wave', 2., 1.1, True, 3., 5.,
+                                                             structure=stories).frequency)
+        self.assertEqual(excitation.frequencyInput, 0.9)
+
+
+if __name__ == '__main__':
+    unittest.main()
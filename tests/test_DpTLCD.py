@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+from DynaPy import Configurations, TLCD
+
+
+class DampingTableTest(unittest.TestCase):
+    def test_error_against_formula(self):
+        for diameter in (0.05, 0.3, 1.):
+            tlcd = TLCD(diameter=diameter, configurations=Configurations())
+            table = tlcd.damping_table()
+            v0 = table.thresholdVelocity
+            r = np.logspace(-15, 0, 601)
+            velocity = np.concatenate([[0., v0], v0 * (1 - r[r < 1]), v0 * (1 + r), np.linspace(0., 120., 2401)])
+
+            interpolated = tlcd.interpolate_damping_coefficient(velocity)
+            exact = np.array([tlcd.calculate_damping_coefficient(i) for i in velocity])
+            self.assertTrue(np.all(np.isfinite(interpolated)))
+
+            # Table error, plus the rounding error of the formula close to v0 (see DampingTable)
+            distance = np.absolute(velocity - v0) / v0
+            bound = (5e-8 * distance + 1e-15) * np.maximum(interpolated, exact)
+            self.assertTrue(np.all(np.absolute(interpolated - exact) * distance <= bound), diameter)
+            self.assertLess(table.error, 5e-8)
+
+            below = velocity < v0 * (1 - 1e-12)
+            self.assertTrue(np.array_equal(interpolated[below], exact[below]))
+
+
+if __name__ == '__main__':
+    unittest.main()
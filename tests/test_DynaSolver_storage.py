@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+from DynaPy import ODESolver
+from models import Model
+
+
+class StorageTest(unittest.TestCase):
+    methods = ('Finite Differences Method', 'Average Acceleration Method', 'Runge-Kutta Method')
+
+    def test_time_major_arrays(self):
+        for method in self.methods:
+            model = Model(method=method, timeStep=0.01)
+            response = ODESolver(model.M, model.C, model.K, model.force(), model.configurations, model.tlcd)
+            nt, n = len(response.t), model.M.shape[0]
+            for array, matrix in ((response.displacementArray, response.x), (response.velocityArray, response.v),
+                                  (response.accelerationArray, response.a)):
+                self.assertIsInstance(array, np.ndarray)
+                self.assertEqual(array.shape, (nt, n))
+                self.assertEqual(array.dtype, np.float64)
+                self.assertTrue(array.flags.c_contiguous)
+                # x, v and a are np.matrix views in the (DOFs, time steps) layout
+                self.assertIsInstance(matrix, np.matrix)
+                self.assertEqual(matrix.shape, (n, nt))
+                self.assertTrue(np.shares_memory(matrix, array))
+                self.assertTrue(np.array_equal(matrix[n - 1, :].A1, array[:, n - 1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+from DynaPy import (BandedMatrix, ExcitationForce, OutputData, StoryTable, assemble_damping_matrix,
+                    assemble_mass_matrix, assemble_stiffness_matrix, calc_steady_state_dmf)
+from models import Model
+
+
+class AssemblyTest(unittest.TestCase):
+    def test_story_table_and_bands(self):
+        for tlcd in (False, True):
+            model = Model(stories=5, tlcd=tlcd)
+            table = StoryTable.from_stories(model.stories)
+            for assemble, dense in ((assemble_mass_matrix, model.M), (assemble_damping_matrix, model.C),
+                                    (assemble_stiffness_matrix, model.K)):
+                self.assertTrue(np.allclose(assemble(table, model.tlcd), dense, rtol=1e-14, atol=0.))
+                banded = assemble(model.stories, model.tlcd, banded=True)
+                self.assertIsInstance(banded, BandedMatrix)
+                self.assertTrue(np.array_equal(banded.todense(), np.asarray(dense)))
+                self.assertTrue(np.array_equal(banded.diagonal(), np.diag(np.asarray(dense))))
+                self.assertEqual(banded[2, 3], dense[2, 3])
+                self.assertEqual(banded[0, 4], 0.)
+
+    def test_banded_through_output_data(self):
+        model = Model(stories=4, nonLinearAnalysis=True)
+        M, C, K = [assemble(model.stories, model.tlcd, banded=True) for assemble in
+                   (assemble_mass_matrix, assemble_damping_matrix, assemble_stiffness_matrix)]
+        # The nonlinear runs update the TLCD damping of the damping matrix they are given
+        force = ExcitationForce(model.excitation, model.M, model.configurations)
+        dense = OutputData(model.M, model.C.copy(), model.K, force, model.configurations, model.tlcd)
+        force = ExcitationForce(model.excitation, M, model.configurations)
+        banded = OutputData(M, C.copy(), K, force, model.configurations, model.tlcd)
+        self.assertTrue(np.allclose(banded.dynamicResponse.displacementArray, dense.dynamicResponse.displacementArray,
+                                    rtol=1e-12, atol=1e-15))
+        self.assertTrue(np.allclose(banded.DMF, dense.DMF, rtol=1e-12))
+
+        frequencies = np.linspace(1., 40., 50)
+        self.assertTrue(np.allclose(calc_steady_state_dmf(M, C, K, model.excitation, frequencies).dmf,
+                                    calc_steady_state_dmf(model.M, model.C, model.K, model.excitation, frequencies).dmf,
+                                    rtol=1e-12))
+
+
+if __name__ == '__main__':
+    unittest.main()
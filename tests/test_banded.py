@@ -0,0 +1,38 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from DynaPy import BandedMatrix, Configurations, ODESolver
+from models import Model
+
+
+class BandedTest(unittest.TestCase):
+    methods = ('Finite Differences Method', 'Average Acceleration Method', 'Runge-Kutta Method')
+
+    def test_band_solve(self):
+        model = Model(stories=8)
+        A = np.asarray(model.K + 3. * model.M)
+        b = np.random.default_rng(1).normal(size=(A.shape[0], 3))
+        banded = BandedMatrix.from_dense(A)
+        self.assertTrue(np.array_equal(banded.todense(), A))
+        self.assertTrue(np.allclose(banded.inverse().dot(b), np.linalg.solve(A, b), rtol=1e-12, atol=1e-15))
+        self.assertTrue(np.allclose(banded.inverse().dot(b[:, 0]), np.linalg.solve(A, b[:, 0]), rtol=1e-12,
+                                    atol=1e-15))
+
+    def test_banded_equals_dense(self):
+        for method in self.methods:
+            model = Model(stories=6, method=method, nonLinearAnalysis=True)
+            dense = ODESolver(model.M, model.C, model.K, model.force(), model.configurations, model.tlcd)
+            configurations = Configurations(method=method, nonLinearAnalysis=True, timeStep=0.002,
+                                            matrixStructure='Banded')
+            # The band solves are forced on to be tested without numba, and left to fall back to dense otherwise
+            for available in (True, False):
+                with mock.patch('DynaPy.DynaSolver.banded_available', return_value=available):
+                    banded = ODESolver(model.M, model.C, model.K, model.force(), configurations, model.tlcd)
+                scale = np.absolute(dense.displacementArray).max()
+                self.assertLess(np.absolute(banded.displacementArray - dense.displacementArray).max(), 1e-9 * scale,
+                                (method, available))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+import numpy as np
+from DynaPy import Excitation, ODESolver
+from models import Model
+
+
+class DormandPrinceTest(unittest.TestCase):
+    def run_model(self, timeStep, nonlinear):
+        model = Model(stories=2, method='Adaptive Runge-Kutta Method', timeStep=timeStep, nonLinearAnalysis=nonlinear,
+                      absoluteTolerance=1e-13, relativeTolerance=1e-12)
+        # Excitation over the whole analysis, a smooth force sampled at timeStep
+        model.excitation = Excitation('Sine Wave', 5., 0.9, True, 1., 1., structure=model.stories, tlcd=model.tlcd)
+        return ODESolver(model.M, model.C.copy(), model.K, model.force(), model.configurations, model.tlcd)
+
+    def test_fourth_order_convergence(self):
+        for nonlinear in (False, True):
+            runs = [self.run_model(0.02 / 2 ** i, nonlinear) for i in range(4)]
+            errors = [np.absolute(runs[i].displacementArray - runs[i + 1].displacementArray[::2]).max()
+                      for i in range(3)]
+            orders = np.log2(np.array(errors[:-1]) / errors[1:])
+            self.assertTrue(np.all(orders > 3.5), (nonlinear, orders))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+from DynaPy import ODESolver
+from models import Model
+
+
+def reference_fdm(model, nonlinear):
+    """ Central differences that assemble and solve the step operator at every step, with the TLCD damping taken
+    from the liquid velocity of the previous steps as the solver did before it was factorized once.
+    """
+    M, K = np.asarray(model.M), np.asarray(model.K)
+    C = np.asarray(model.C).copy()
+    F = np.asarray(model.force()).T
+    dt = model.configurations.timeStep
+    nt, n = F.shape
+    dofs = list(range(n - model.tlcd.amount, n))
+    x = np.zeros((nt + 2, n))  # x[i + 1] is time step i, x[0] and x[-1] the steps before and after the run
+    a0 = np.linalg.solve(M, F[0] - C.dot(np.zeros(n)) - K.dot(x[1]))
+    x[0] = x[1] + a0 * dt ** 2 / 2
+    if nonlinear:
+        C[dofs, dofs] = model.tlcd.calculate_damping_coefficient(0.)
+    for i in range(nt):
+        # The step after the run keeps the damping of the last one
+        if nonlinear and 2 <= i < nt - 1:
+            velocity = abs(x[i - 1, -1] - x[i + 1, -1]) / (2 * dt)
+            C[dofs, dofs] = model.tlcd.calculate_damping_coefficient(velocity)
+        gamma = M / dt ** 2 + C / (2 * dt)
+        alpha = M / dt ** 2 - C / (2 * dt)
+        x[i + 2] = np.linalg.solve(gamma, F[i] - (K - 2 * M / dt ** 2).dot(x[i + 1]) - alpha.dot(x[i]))
+    v = (x[2:] - x[:-2]) / (2 * dt)
+    a = (x[2:] - 2 * x[1:-1] + x[:-2]) / dt ** 2
+    return x[1:-1], v, a
+
+
+class FiniteDifferencesTest(unittest.TestCase):
+    def test_against_reference(self):
+        for nonlinear in (False, True):
+            model = Model(method='Finite Differences Method', nonLinearAnalysis=nonlinear, timeStep=0.005)
+            response = ODESolver(model.M, model.C.copy(), model.K, model.force(), model.configurations, model.tlcd)
+            for y, reference in zip((response.displacementArray, response.velocityArray, response.accelerationArray),
+                                    reference_fdm(model, nonlinear)):
+                self.assertLessEqual(np.absolute(y - reference).max(), 1e-9 * np.absolute(reference).max(), nonlinear)
+
+
+if __name__ == '__main__':
+    unittest.main()
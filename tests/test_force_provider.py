@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+from DynaPy import ExcitationForce, MatrixForce, ODESolver, interpolate_midpoints
+from models import Model
+
+
+class ForceProviderTest(unittest.TestCase):
+    def test_sine_force(self):
+        model = Model()
+        force = ExcitationForce(model.excitation, model.M, model.configurations)
+        excitation = model.excitation
+        t = np.arange(force.shape[1]) * model.configurations.timeStep
+        amplitude = excitation.amplitude * np.diag(model.M).copy()
+        amplitude[-model.tlcd.amount:] = 0.
+        reference = np.outer(np.where(t <= excitation.exctDuration + 1e-9, np.sin(excitation.frequency * t), 0.),
+                             amplitude)
+        self.assertTrue(np.allclose(force.block(0, force.shape[1]), reference, rtol=0., atol=1e-12))
+        self.assertTrue(np.allclose(force.peak(), np.absolute(reference).max(axis=0), rtol=1e-12))
+        self.assertTrue(np.array_equal(force.nonzero_steps(), np.any(reference != 0, axis=1)))
+
+    def test_rows(self):
+        model = Model(excitation='General Excitation')
+        force = ExcitationForce(model.excitation, model.M, model.configurations)
+        force.blockSize = 64
+        F = force.block(0, force.shape[1])
+        self.assertTrue(np.array_equal(np.asarray(force.matrix()), F.T))
+
+        operator = np.random.default_rng(1).normal(size=(5, 5))
+        rows = force.rows(operator)
+        reference = F.dot(operator.T)
+        midpoints = interpolate_midpoints(reference)
+        for i in (0, 1, 63, 64, 65, 127, 128, 500, len(rows) - 2):
+            self.assertTrue(np.allclose(rows[i], reference[i], rtol=1e-12, atol=1e-12), i)
+            self.assertTrue(np.allclose(rows.midpoint(i), midpoints[i], rtol=1e-12, atol=1e-12), i)
+        self.assertTrue(np.allclose(rows.array(), reference, rtol=1e-12, atol=1e-12))
+        self.assertTrue(np.allclose(rows.block(100, 300), reference[100:300], rtol=1e-12, atol=1e-12))
+
+    def test_solver_with_provider(self):
+        for method in ('Finite Differences Method', 'Average Acceleration Method', 'Runge-Kutta Method'):
+            model = Model(excitation='General Excitation', method=method, timeStep=0.005)
+            force = ExcitationForce(model.excitation, model.M, model.configurations)
+            force.blockSize = 100
+            provided = ODESolver(model.M, model.C, model.K, force, model.configurations, model.tlcd)
+            dense = ODESolver(model.M, model.C, model.K, MatrixForce(force.matrix()), model.configurations,
+                              model.tlcd)
+            scale = np.absolute(dense.displacementArray).max()
+            self.assertLessEqual(np.absolute(provided.displacementArray - dense.displacementArray).max(),
+                                 1e-12 * scale, method)
+
+
+if __name__ == '__main__':
+    unittest.main()
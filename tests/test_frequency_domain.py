@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+from DynaPy import Configurations, Excitation, ODESolver
+from models import Model, exact_response
+
+
+class FrequencyDomainTest(unittest.TestCase):
+    def test_forced_response(self):
+        # The transform takes the force as band-limited and the reference as linear between samples, the two
+        # responses converge to each other with O(dt**2)
+        errors = []
+        for timeStep in (0.004, 0.002):
+            model = Model(stories=3, method='Frequency Domain Method', timeStep=timeStep, nonLinearAnalysis=False)
+            model.excitation = Excitation('Sine Wave', 5., 0.9, True, 5., 5., structure=model.stories,
+                                          tlcd=model.tlcd)
+            force = model.force()
+            response = ODESolver(model.M, model.C, model.K, force, model.configurations, model.tlcd)
+            x, v = exact_response(model.M, model.C, model.K, np.asarray(force).T, timeStep)
+            errors.append(np.absolute(response.displacementArray - x).max() / np.absolute(x).max())
+            self.assertLess(np.absolute(response.velocityArray - v).max(), 0.05 * np.absolute(v).max())
+        self.assertLess(errors[-1], 1e-3)
+        self.assertGreater(np.log2(errors[0] / errors[1]), 1.8)
+
+    def test_initial_conditions(self):
+        model = Model(stories=3, timeStep=0.01)
+        configurations = Configurations(method='Frequency Domain Method', nonLinearAnalysis=False, timeStep=0.01,
+                                        initialDisplacement=0.01, initialVelocity=-0.02)
+        force = np.mat(np.zeros(model.force().shape))
+        response = ODESolver(model.M, model.C, model.K, force, configurations, model.tlcd)
+        x, v = exact_response(model.M, model.C, model.K, np.asarray(force).T, 0.01, 0.01, -0.02)
+        self.assertLessEqual(np.absolute(response.displacementArray - x).max(), 1e-9 * np.absolute(x).max())
+        self.assertLessEqual(np.absolute(response.velocityArray - v).max(), 1e-9 * np.absolute(v).max())
+
+
+if __name__ == '__main__':
+    unittest.main()
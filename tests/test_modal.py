@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+from DynaPy import ODESolver
+from models import Model, exact_response
+
+
+class ModalSuperpositionTest(unittest.TestCase):
+    def test_all_modes_are_exact(self):
+        # Stiffness proportional damping has no off-diagonal modal damping to neglect
+        model = Model(stories=4, tlcd=False, excitation='General Excitation', method='Modal Superposition Method',
+                      numberOfModes=4, timeStep=0.005)
+        C = 2e-3 * model.K
+        F = np.asarray(model.force()).T
+        response = ODESolver(model.M, C, model.K, model.force(), model.configurations)
+        x, v = exact_response(model.M, C, model.K, F, 0.005)
+        self.assertLessEqual(np.absolute(response.displacementArray - x).max(), 1e-9 * np.absolute(x).max())
+        self.assertLessEqual(np.absolute(response.velocityArray - v).max(), 1e-9 * np.absolute(v).max())
+
+    def test_truncation(self):
+        model = Model(stories=6, tlcd=False, method='Modal Superposition Method', numberOfModes=2)
+        response = ODESolver(model.M, model.C, model.K, model.force(), model.configurations)
+        self.assertEqual(response.modalShapes.shape, (6, 2))
+
+        model = Model(stories=6, tlcd=False, method='Modal Superposition Method', modalMassParticipation=0.95)
+        response = ODESolver(model.M, model.C, model.K, model.force(), model.configurations)
+        M = np.asarray(model.M)
+        participation = np.cumsum(response.modalShapes.T.dot(M.sum(axis=1)) ** 2) / M.sum()
+        self.assertGreaterEqual(participation[-1], 0.95)
+        if response.modalShapes.shape[1] > 1:
+            self.assertLess(participation[-2], 0.95)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+from DynaPy import assemble_modes_matrix, generalized_eigen, get_natural_frequencies_by_modal
+from models import Model
+
+
+class ModesTest(unittest.TestCase):
+    def test_two_dofs(self):
+        m, k = 2., 50.
+        M = np.mat(np.diag([m, m]))
+        K = np.mat([[2 * k, -k], [-k, k]])
+        omega = np.sqrt(k / m * np.array([(3 - 5 ** 0.5) / 2, (3 + 5 ** 0.5) / 2]))
+        self.assertTrue(np.allclose(get_natural_frequencies_by_modal(M, K), omega, rtol=1e-14))
+        phi, frequencies = assemble_modes_matrix(M, K, return_frequencies=True)
+        self.assertIsInstance(phi, np.matrix)
+        self.assertTrue(np.allclose(frequencies, omega, rtol=1e-14))
+        # First mode with both DOFs in phase, ratio of the golden section
+        self.assertAlmostEqual(phi[1, 0] / phi[0, 0], (1 + 5 ** 0.5) / 2, places=12)
+
+    def test_mass_normalized_modes(self):
+        model = Model(stories=8)
+        M, K = np.asarray(model.M), np.asarray(model.K)
+        omega, phi = generalized_eigen(model.M, model.K)
+        self.assertTrue(np.all(np.diff(omega) > 0))
+        self.assertTrue(np.allclose(phi.T.dot(M).dot(phi), np.identity(M.shape[0]), rtol=0., atol=1e-12))
+        self.assertTrue(np.allclose(K.dot(phi), M.dot(phi) * omega ** 2, rtol=1e-10, atol=1e-8 * np.absolute(K).max()))
+        reference = np.sort(np.sqrt(np.linalg.eigvals(np.linalg.solve(M, K)).real))
+        self.assertTrue(np.allclose(omega, reference, rtol=1e-10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+from DynaPy import ODESolver
+from models import Model
+
+
+def reference_newmark(model, gamma, beta, nonlinear):
+    """ Incremental Newmark integration that assembles and solves the effective stiffness at every step, with the
+    TLCD damping of the step written in the damping matrix as the solver did before it was factorized once.
+    """
+    M, K = np.asarray(model.M), np.asarray(model.K)
+    C = np.asarray(model.C).copy()
+    F = np.asarray(model.force()).T
+    dt = model.configurations.timeStep
+    nt, n = F.shape
+    dofs = list(range(n - model.tlcd.amount, n))
+    x, v, a = np.zeros((nt, n)), np.zeros((nt, n)), np.zeros((nt, n))
+    a[0] = np.linalg.solve(M, F[0] - C.dot(v[0]) - K.dot(x[0]))
+    for i in range(nt - 2):
+        if nonlinear:
+            C[dofs, dofs] = model.tlcd.calculate_damping_coefficient(abs(v[i, -1]))
+        k_eff = K + gamma / (beta * dt) * C + M / (beta * dt ** 2)
+        dp = F[i + 1] - F[i] + (M / (beta * dt) + gamma / beta * C).dot(v[i]) + \
+            (M / (2 * beta) + dt * (gamma / (2 * beta) - 1) * C).dot(a[i])
+        dx = np.linalg.solve(k_eff, dp)
+        dv = gamma / (beta * dt) * dx - gamma / beta * v[i] + dt * (1 - gamma / (2 * beta)) * a[i]
+        da = dx / (beta * dt ** 2) - v[i] / (beta * dt) - a[i] / (2 * beta)
+        x[i + 1], v[i + 1], a[i + 1] = x[i] + dx, v[i] + dv, a[i] + da
+    return x, v, a
+
+
+class NewmarkTest(unittest.TestCase):
+    def test_against_reference(self):
+        for method, beta in (('Average Acceleration Method', 1 / 4), ('Linear Acceleration Method', 1 / 6)):
+            for nonlinear in (False, True):
+                model = Model(method=method, nonLinearAnalysis=nonlinear, timeStep=0.005)
+                response = ODESolver(model.M, model.C.copy(), model.K, model.force(), model.configurations,
+                                     model.tlcd)
+                for y, reference in zip((response.displacementArray, response.velocityArray,
+                                         response.accelerationArray), reference_newmark(model, 1 / 2, beta, nonlinear)):
+                    self.assertLessEqual(np.absolute(y - reference).max(), 1e-9 * np.absolute(reference).max(),
+                                         (method, nonlinear))
+
+
+if __name__ == '__main__':
+    unittest.main()
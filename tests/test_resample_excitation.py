@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+from DynaPy import resample_excitation
+
+
+class ResampleExcitationTest(unittest.TestCase):
+    def setUp(self):
+        # Non-uniform record, resampled past its end
+        rng = np.random.default_rng(3)
+        self.tr = np.cumsum(rng.uniform(0.005, 0.02, 300))
+        self.ar = rng.normal(size=300)
+        self.t = np.arange(0., self.tr[-1] + 1., 0.003)
+        self.inside = (self.t >= self.tr[0]) & (self.t <= self.tr[-1])
+
+    def test_linear(self):
+        a = resample_excitation(self.tr, self.ar, self.t)
+        self.assertTrue(np.allclose(a, np.where(self.inside, np.interp(self.t, self.tr, self.ar), 0.), rtol=1e-12,
+                                    atol=1e-12))
+        # Record samples are reproduced
+        self.assertTrue(np.allclose(resample_excitation(self.tr, self.ar, self.tr), self.ar, rtol=1e-12))
+
+    def test_zero_order_hold(self):
+        a = resample_excitation(self.tr, self.ar, self.t, 'Zero-Order Hold')
+        i = np.searchsorted(self.tr, self.t, side='right') - 1
+        self.assertTrue(np.array_equal(a[self.inside], self.ar[i[self.inside]]))
+        self.assertTrue(np.all(a[~self.inside] == 0.))
+
+    def test_cubic_reproduces_parabolas(self):
+        ar = 2. - 3. * self.tr + 0.5 * self.tr ** 2
+        a = resample_excitation(self.tr, ar, self.t, 'Cubic')
+        self.assertTrue(np.allclose(a[self.inside], (2. - 3. * self.t + 0.5 * self.t ** 2)[self.inside], rtol=1e-10,
+                                    atol=1e-10))
+        self.assertTrue(np.all(a[~self.inside] == 0.))
+
+    def test_unknown_interpolation(self):
+        with self.assertRaises(ValueError):
+            resample_excitation(self.tr, self.ar, self.t, 'Spline')
+
+
+if __name__ == '__main__':
+    unittest.main()
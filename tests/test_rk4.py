@@ -0,0 +1,24 @@
+import unittest
+
+import numpy as np
+from DynaPy import Excitation, ODESolver
+from models import Model
+
+
+class RungeKuttaTest(unittest.TestCase):
+    def run_model(self, timeStep):
+        model = Model(stories=2, method='Runge-Kutta Method', timeStep=timeStep)
+        # Excitation over the whole analysis, a smooth force sampled at timeStep
+        model.excitation = Excitation('Sine Wave', 5., 0.9, True, 1., 1., structure=model.stories, tlcd=model.tlcd)
+        return ODESolver(model.M, model.C, model.K, model.force(), model.configurations, model.tlcd)
+
+    def test_fourth_order_convergence(self):
+        runs = [self.run_model(0.01 / 2 ** i) for i in range(4)]
+        for name in ('displacementArray', 'velocityArray'):
+            errors = [np.absolute(getattr(runs[i], name) - getattr(runs[i + 1], name)[::2]).max() for i in range(3)]
+            orders = np.log2(np.array(errors[:-1]) / errors[1:])
+            self.assertTrue(np.all(orders > 3.7), (name, orders))
+
+
+if __name__ == '__main__':
+    unittest.main()
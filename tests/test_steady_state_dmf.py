@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+from DynaPy import calc_steady_state_dmf
+from models import Model
+
+
+class SteadyStateDmfTest(unittest.TestCase):
+    def test_single_story(self):
+        model = Model(stories=1, tlcd=False)
+        m, c, k = model.M[0, 0], model.C[0, 0], model.K[0, 0]
+        omega, ksi = (k / m) ** 0.5, c / (2 * (k * m) ** 0.5)
+        frequencies = np.linspace(0.1, 3., 59) * omega
+        outputDMF = calc_steady_state_dmf(model.M, model.C, model.K, model.excitation, frequencies)
+        r = frequencies / omega
+        dmf = 1 / np.sqrt((1 - r ** 2) ** 2 + (2 * ksi * r) ** 2)
+        self.assertTrue(np.allclose(outputDMF.dmf.A1, dmf, rtol=1e-12))
+        self.assertTrue(np.allclose(outputDMF.displacements.A1, dmf * model.excitation.amplitude * m / k,
+                                    rtol=1e-12))
+
+    def test_loaded_dofs(self):
+        model = Model(stories=3)
+        frequencies = np.linspace(1., 30., 30)
+        outputDMF = calc_steady_state_dmf(model.M, model.C, model.K, model.excitation, frequencies)
+        # The TLCDs are not loaded and are left out
+        self.assertEqual(outputDMF.dmf.shape, (30, 3))
+        # Amplitudes from the real form of the harmonic equations:
+        # (K - w**2*M)*a - w*C*b = F and w*C*a + (K - w**2*M)*b = 0
+        M, C, K = np.asarray(model.M), np.asarray(model.C), np.asarray(model.K)
+        force = model.excitation.amplitude * np.diag(M).copy()
+        force[3:] = 0.
+        for i, w in enumerate(frequencies):
+            A = np.block([[K - w ** 2 * M, -w * C], [w * C, K - w ** 2 * M]])
+            ab = np.linalg.solve(A, np.concatenate([force, np.zeros(5)]))
+            x = np.hypot(ab[:5], ab[5:])[:3]
+            self.assertTrue(np.allclose(outputDMF.displacements[i].A1, x, rtol=1e-10))
+            self.assertTrue(np.allclose(outputDMF.dmf[i].A1, x * np.diag(K)[:3] / force[:3], rtol=1e-10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+from DynaPy import OutputData
+from models import Model
+
+
+class SummaryRunTest(unittest.TestCase):
+    methods = ('Finite Differences Method', 'Average Acceleration Method', 'Runge-Kutta Method',
+               'Frequency Domain Method')
+
+    def test_summary_equals_full_run(self):
+        for method in self.methods:
+            model = Model(method=method, nonLinearAnalysis=method != 'Frequency Domain Method',
+                          outputBlockSize=256)
+            full = OutputData(model.M, model.C.copy(), model.K, model.force(), model.configurations, model.tlcd)
+            summary = OutputData(model.M, model.C.copy(), model.K, model.force(), model.configurations, model.tlcd,
+                                 summary=True)
+            response = full.dynamicResponse
+            t = response.t
+            for name, y in (('Displacement', response.displacementArray), ('Velocity', response.velocityArray),
+                            ('Acceleration', response.accelerationArray)):
+                peak = np.absolute(y).max(axis=0)
+                self.assertTrue(np.allclose(getattr(summary, 'peak' + name), peak, rtol=1e-12, atol=0.), method)
+                self.assertTrue(np.array_equal(getattr(summary, 'peak' + name + 'Time'),
+                                               t[np.absolute(y).argmax(axis=0)]), method)
+                self.assertTrue(np.allclose(getattr(summary, 'rms' + name), np.sqrt((y ** 2).mean(axis=0)),
+                                            rtol=1e-12, atol=0.), method)
+            stroke = response.displacementArray[:, -model.tlcd.amount:]
+            self.assertTrue(np.allclose(summary.minStroke, stroke.min(axis=0), rtol=1e-12, atol=0.))
+            self.assertTrue(np.allclose(summary.maxStroke, stroke.max(axis=0), rtol=1e-12, atol=0.))
+            self.assertTrue(np.allclose(summary.DMF, full.DMF, rtol=1e-12, atol=0.))
+            # Only a window of the history is kept
+            if method != 'Frequency Domain Method':
+                self.assertLessEqual(summary.dynamicResponse.displacementArray.shape[0], 256 + 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
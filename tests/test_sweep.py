@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+from DynaPy import ExcitationForce, OutputData, SweepSolver
+from models import Model
+
+
+class SweepSolverTest(unittest.TestCase):
+    def test_equals_per_frequency_runs(self):
+        frequencies = np.array([3., 7.5, 12.])
+        for method in SweepSolver.methods:
+            for nonlinear in (False, True):
+                model = Model(method=method, nonLinearAnalysis=nonlinear, timeStep=0.005)
+                sweep = SweepSolver(model.M, model.C.copy(), model.K, model.excitation, frequencies,
+                                    model.configurations, model.tlcd)
+                # The sweep reads the TLCD damping from the damping table, the runs from the formula
+                rtol = 1e-6 if nonlinear else 1e-10
+                for i, frequency in enumerate(frequencies):
+                    excitation = model.excitation.replace(relativeFrequency=False, frequencyInput=frequency)
+                    force = ExcitationForce(excitation, model.M, model.configurations)
+                    outputData = OutputData(model.M, model.C.copy(), model.K, force, model.configurations, model.tlcd)
+                    self.assertTrue(np.allclose(sweep.maxDisplacement[i], outputData.maxDisplacement, rtol=rtol,
+                                                atol=0.), (method, nonlinear, frequency))
+                    self.assertTrue(np.allclose(sweep.DMF[i], outputData.DMF, rtol=rtol, atol=0.))
+
+
+if __name__ == '__main__':
+    unittest.main()